@@ -1,7 +1,32 @@
 import os
+import argparse
+import asyncio
+import bisect
+import calendar
+import codecs
+import cProfile
+import csv
+import difflib
+import heapq
+import io
 import json
+import mmap
+import pstats
+import re
+import shutil
+import sqlite3
+import struct
 import sys
-from datetime import datetime
+import time
+import unicodedata
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+from functools import lru_cache, wraps
+from http import HTTPStatus
+from urllib.parse import unquote, urlsplit
 
 
 # Aktifkan ANSI dan Unicode untuk Windows
@@ -13,6 +38,9 @@ if sys.platform == "win32":
     kernel32.SetConsoleMode(kernel32.GetStdHandle(-11), 7)
     # Set code page ke UTF-8
     os.system('chcp 65001 > nul')
+    import msvcrt
+else:
+    import fcntl
 
 class Colors:
     """
@@ -48,50 +76,3275 @@ class Colors:
     BG_YELLOW = '\033[43m'
     BG_RED = '\033[41m'
 
+# Pola kode warna ANSI (dikompilasi sekali, dipakai oleh renderer tabel)
+ANSI_PATTERN = re.compile(r'\033\[[0-9;]*m')
+
+
+def lebar_tampil(teks):
+    """
+    Menghitung panjang teks yang terlihat di terminal (tanpa kode warna ANSI).
+    
+    Args:
+        teks (str): Teks yang mungkin berisi kode warna
+    
+    Returns:
+        int: Jumlah karakter yang terlihat
+    """
+    if '\033[' not in teks:
+        return len(teks)
+    return len(ANSI_PATTERN.sub('', teks))
+
+
+def lebar_kolom_terminal(teks):
+    """
+    Menghitung jumlah kolom terminal yang dipakai teks (tanpa kode warna ANSI).
+    
+    Berbeda dengan lebar_tampil, karakter lebar (emoji, huruf CJK) dihitung
+    dua kolom dan karakter tanpa lebar (kombinasi, variation selector emoji
+    yang membuat karakter sebelumnya tampil lebar) dihitung sesuai efeknya.
+    Dipakai untuk memastikan satu baris tidak terlipat di terminal.
+    
+    Args:
+        teks (str): Teks yang mungkin berisi kode warna
+    
+    Returns:
+        int: Jumlah kolom terminal
+    """
+    teks = ANSI_PATTERN.sub('', teks)
+    if teks.isascii():
+        return len(teks)
+    return sum(map(_lebar_karakter, teks))
+
+
+def _lebar_karakter(karakter):
+    """Helper: Jumlah kolom terminal untuk satu karakter (lihat lebar_kolom_terminal)"""
+    if karakter == '\ufe0f':
+        return 1
+    if unicodedata.combining(karakter) or unicodedata.category(karakter) == 'Cf':
+        return 0
+    return 2 if unicodedata.east_asian_width(karakter) in ('W', 'F') else 1
+
+
+def potong_kolom_terminal(teks, lebar):
+    """
+    Memotong teks agar tidak lebih dari lebar kolom terminal.
+    
+    Kode warna ANSI dipertahankan; teks yang dipotong diakhiri '…' dan
+    kode reset warna.
+    
+    Args:
+        teks (str): Teks yang mungkin berisi kode warna
+        lebar (int): Jumlah kolom maksimal
+    
+    Returns:
+        str: Teks yang muat dalam satu baris terminal
+    """
+    if lebar_kolom_terminal(teks) <= lebar:
+        return teks
+    hasil = []
+    kolom = 0
+    posisi = 0
+    for kode in (*ANSI_PATTERN.finditer(teks), None):
+        for karakter in teks[posisi:kode.start() if kode else len(teks)]:
+            kolom += _lebar_karakter(karakter)
+            # Sisakan satu kolom untuk '…'
+            if kolom > lebar - 1:
+                return ''.join(hasil) + '…' + Colors.END
+            hasil.append(karakter)
+        if kode:
+            hasil.append(kode.group())
+            posisi = kode.end()
+    return ''.join(hasil)
+
+
+def waktu_sekarang():
+    """
+    Mengambil waktu saat ini dalam dua bentuk sekaligus.
+    
+    Returns:
+        tuple: (tanggal, ts) dengan tanggal berformat '%Y-%m-%d %H:%M:%S'
+               dan ts berupa detik sejak epoch (lihat parse_tanggal)
+    """
+    sekarang = datetime.now().replace(microsecond=0)
+    return sekarang.strftime('%Y-%m-%d %H:%M:%S'), calendar.timegm(sekarang.timetuple())
+
+
+def parse_tanggal(tanggal):
+    """
+    Mengubah string tanggal '%Y-%m-%d %H:%M:%S' menjadi timestamp integer.
+    
+    Timestamp dihitung dari jam dinding lokal apa adanya (tanpa zona waktu),
+    sehingga selalu bisa dikembalikan ke string yang sama persis.
+    
+    Args:
+        tanggal (str): Tanggal dan jam transaksi
+    
+    Returns:
+        int: Detik sejak 1970-01-01 00:00:00
+    """
+    return calendar.timegm(datetime.fromisoformat(tanggal).timetuple())
+
+
+def rupiah(nilai):
+    """
+    Mengubah nominal menjadi integer rupiah.
+    
+    Data lama menyimpan nominal sebagai float; pecahannya dibulatkan ke
+    rupiah terdekat (0,5 ke atas). Nominal yang sudah integer dikembalikan apa adanya.
+    
+    Args:
+        nilai (int | float): Nominal
+    
+    Returns:
+        int: Nominal dalam rupiah
+    """
+    if isinstance(nilai, int):
+        return nilai
+    return int(Decimal(str(nilai)).quantize(Decimal(1), rounding=ROUND_HALF_UP))
+
+
+def lengkapi_transaksi(transaksi):
+    """
+    Menormalkan transaksi dari data lama: menambahkan key 'ts' jika baru
+    punya 'tanggal', dan mengubah 'jumlah' menjadi integer rupiah.
+    """
+    if 'ts' not in transaksi:
+        transaksi['ts'] = parse_tanggal(transaksi['tanggal'])
+    transaksi['jumlah'] = rupiah(transaksi['jumlah'])
+    return transaksi
+
+
+def sisip_urut_waktu(daftar, transaksi):
+    """
+    Menambahkan transaksi ke list yang urut berdasarkan 'ts'.
+    
+    Transaksi baru biasanya paling akhir (cukup append); transaksi dengan
+    tanggal lama (misal hasil impor) disisipkan di posisinya dengan
+    binary search, sehingga list tetap kronologis.
+    
+    Args:
+        daftar (list | RiwayatMalas): List transaksi yang sudah urut
+        transaksi (dict): Transaksi yang punya key 'ts'
+    """
+    if isinstance(daftar, RiwayatMalas):
+        daftar.sisip(transaksi)
+        return
+    
+    ts = transaksi['ts']
+    if not daftar or daftar[-1]['ts'] <= ts:
+        daftar.append(transaksi)
+        return
+    
+    lo, hi = 0, len(daftar)
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if daftar[mid]['ts'] <= ts:
+            lo = mid + 1
+        else:
+            hi = mid
+    daftar.insert(lo, transaksi)
+
+
+def parse_jumlah(teks):
+    """
+    Mengubah teks nominal menjadi integer rupiah.
+    
+    Menerima '50000', 'Rp 50.000' atau '50.000,00' (format ribuan
+    Indonesia). Semua nominal disimpan sebagai rupiah bulat, jadi
+    nominal dengan pecahan (misal '50000.5') ditolak.
+    
+    Args:
+        teks (str): Nominal dalam bentuk teks
+    
+    Returns:
+        int: Nominal dalam rupiah
+    
+    Raises:
+        ValueError: Jika teks bukan angka atau bukan rupiah bulat
+    """
+    teks = teks.strip().replace('Rp', '').replace('rp', '').replace(' ', '')
+    if re.fullmatch(r'\d{1,3}(\.\d{3})+(,\d+)?', teks):
+        teks = teks.replace('.', '').replace(',', '.')
+    try:
+        nilai = Decimal(teks)
+    except InvalidOperation:
+        raise ValueError(f"bukan angka: {teks!r}") from None
+    if not nilai.is_finite() or nilai != nilai.to_integral_value():
+        raise ValueError(f"bukan rupiah bulat: {teks!r}")
+    return int(nilai)
+
+
+@lru_cache(maxsize=4096)
+def _format_hari(hari):
+    return time.strftime('%d/%m/%Y', time.gmtime(hari * 86400))
+
+
+@lru_cache(maxsize=4096)
+def _format_hari_iso(hari):
+    return time.strftime('%Y-%m-%d', time.gmtime(hari * 86400))
+
+
+def tanggal_dari_ts(ts):
+    """
+    Kebalikan parse_tanggal: timestamp → string '%Y-%m-%d %H:%M:%S'.
+    
+    Seperti pisah_tanggal_jam, tanggal di-cache per hari dan jam dihitung
+    dengan pembagian integer.
+    
+    Args:
+        ts (int): Timestamp transaksi
+    
+    Returns:
+        str: Tanggal dan jam transaksi
+    """
+    hari, detik = divmod(ts, 86400)
+    jam, detik = divmod(detik, 3600)
+    menit, detik = divmod(detik, 60)
+    return f"{_format_hari_iso(hari)} {jam:02d}:{menit:02d}:{detik:02d}"
+
+
+def pisah_tanggal_jam(ts):
+    """
+    Memformat timestamp menjadi tanggal dan jam untuk ditampilkan.
+    
+    Format tanggal di-cache per hari, sedangkan jam dihitung dengan
+    pembagian integer, jadi tidak ada parsing string per baris.
+    
+    Args:
+        ts (int): Timestamp transaksi
+    
+    Returns:
+        tuple: ('dd/mm/yyyy', 'HH:MM:SS')
+    """
+    hari, detik = divmod(ts, 86400)
+    jam, detik = divmod(detik, 3600)
+    menit, detik = divmod(detik, 60)
+    return _format_hari(hari), f"{jam:02d}:{menit:02d}:{detik:02d}"
+
+
+def parse_tanggal_user(teks):
+    """
+    Membaca tanggal yang diketik user atau ditulis di file CSV.
+    
+    Menerima 'YYYY-MM-DD' atau 'dd/mm/yyyy', boleh dengan jam 'HH:MM:SS'.
+    Semua input tanggal memakai fungsi ini, jadi format yang diterima
+    pencarian, impor CSV dan command-line selalu sama.
+    
+    Args:
+        teks (str): Tanggal dari user
+    
+    Returns:
+        tuple: (datetime, pakai_jam) dengan pakai_jam True jika teks berisi jam
+    
+    Raises:
+        ValueError: Jika format tanggal tidak dikenali
+    """
+    teks = teks.strip()
+    for fmt, pakai_jam in (('%Y-%m-%d %H:%M:%S', True), ('%Y-%m-%d', False),
+                           ('%d/%m/%Y %H:%M:%S', True), ('%d/%m/%Y', False)):
+        try:
+            return datetime.strptime(teks, fmt), pakai_jam
+        except ValueError:
+            continue
+    raise ValueError(f"tanggal tidak dikenali: {teks!r}")
+
+
+def parse_batas_tanggal(teks, akhir_hari=False):
+    """
+    Mengubah batas rentang tanggal dari user menjadi timestamp.
+    
+    Format sama dengan parse_tanggal_user. Tanpa jam, batas awal dihitung
+    dari 00:00:00 dan batas akhir (akhir_hari=True) sampai 23:59:59,
+    sehingga rentang selalu mencakup hari terakhirnya.
+    
+    Args:
+        teks (str): Tanggal yang diketik user
+        akhir_hari (bool): True untuk batas akhir rentang
+    
+    Returns:
+        int: Timestamp (lihat parse_tanggal)
+    
+    Raises:
+        ValueError: Jika format tanggal tidak dikenali
+    """
+    waktu, pakai_jam = parse_tanggal_user(teks)
+    ts = calendar.timegm(waktu.timetuple())
+    return ts + 86399 if akhir_hari and not pakai_jam else ts
+
+
+def rentang_ts(daftar, awal, akhir):
+    """
+    Mencari posisi transaksi dengan awal <= ts <= akhir di list urut waktu.
+    
+    Args:
+        daftar (list | RiwayatMalas): Transaksi yang urut berdasarkan 'ts'
+        awal (int): Timestamp awal (inklusif)
+        akhir (int): Timestamp akhir (inklusif)
+    
+    Returns:
+        tuple: (lo, hi) sehingga daftar[lo:hi] adalah transaksi dalam rentang
+    """
+    lo = bisect.bisect_left(daftar, awal, key=lambda t: t['ts'])
+    hi = bisect.bisect_right(daftar, akhir, lo=lo, key=lambda t: t['ts'])
+    return lo, hi
+
+
+class RiwayatMalas:
+    """
+    Riwayat transaksi yang baru dibaca dari file saat dibutuhkan.
+    
+    Jumlah transaksi dan total nominalnya sudah diketahui sejak data
+    dimuat, jadi len(), ringkasan kas dan penambahan transaksi baru tidak
+    perlu membaca file. Iterasi atau indexing membaca riwayat sekali
+    (digabung dengan transaksi baru sejak dimuat), lalu hasilnya disimpan
+    di memori (lihat PenyimpananShard dan PenyimpananJSON).
+    
+    Atribut:
+        total: Jumlah nominal semua transaksi
+    """
+    
+    def __init__(self, pemuat, jumlah=0, total=0):
+        """
+        Args:
+            pemuat (callable): Fungsi tanpa argumen yang mengembalikan list transaksi
+            jumlah (int): Jumlah transaksi menurut roster
+            total (int | float): Total nominal transaksi menurut roster
+        """
+        self._pemuat = pemuat
+        self._data = None
+        self._baru = []
+        self._jumlah = jumlah
+        self.total = rupiah(total)
+    
+    @property
+    def termuat(self):
+        """True jika isi shard sudah dibaca ke memori"""
+        return self._data is not None
+    
+    def _muat(self):
+        """Helper: Baca shard sekali dan simpan hasilnya di memori"""
+        if self._data is None:
+            self._data = self.baca()
+            self._baru = []
+            PENGUKUR.hitung('riwayat_dibaca')
+        return self._data
+    
+    def baca(self):
+        """
+        Mengembalikan isi riwayat (urut waktu) tanpa menyimpannya di memori.
+        
+        Dipakai saat menulis ulang database, agar riwayat yang belum pernah
+        dibuka tidak ikut tertahan di memori setelahnya.
+        """
+        if self._data is not None:
+            return self._data
+        data = [lengkapi_transaksi(t) for t in self._pemuat()]
+        data.extend(self._baru)
+        data.sort(key=lambda t: t['ts'])
+        return data
+    
+    def ganti_pemuat(self, pemuat):
+        """
+        Mengganti sumber riwayat setelah file database ditulis ulang.
+        
+        Sumber baru sudah berisi transaksi baru sejak dimuat, jadi
+        transaksi tersebut tidak perlu ditahan lagi di memori.
+        """
+        self._pemuat = pemuat
+        self._baru = []
+    
+    def __len__(self):
+        return self._jumlah if self._data is None else len(self._data)
+    
+    def __bool__(self):
+        return len(self) > 0
+    
+    def __iter__(self):
+        return iter(self._muat())
+    
+    def __getitem__(self, index):
+        return self._muat()[index]
+    
+    def sisip(self, transaksi):
+        """
+        Menambahkan transaksi baru.
+        
+        Jika riwayat belum dibaca, file tidak perlu dibuka: transaksi
+        disimpan terpisah dan baru digabung saat riwayat dibutuhkan.
+        """
+        if self._data is None:
+            self._jumlah += 1
+            self._baru.append(transaksi)
+        else:
+            sisip_urut_waktu(self._data, transaksi)
+        self.total += transaksi['jumlah']
+
+
+def isi_riwayat(daftar):
+    """
+    Isi riwayat untuk dibaca sekali jalan, tanpa menahannya di memori.
+    
+    Args:
+        daftar (list | RiwayatMalas): Riwayat transaksi
+    
+    Returns:
+        list: Riwayat yang belum dibuka dibaca lewat RiwayatMalas.baca
+    """
+    return daftar.baca() if isinstance(daftar, RiwayatMalas) else daftar
+
+
+def total_jumlah(daftar):
+    """
+    Menjumlahkan nominal transaksi tanpa membaca shard yang belum dimuat.
+    
+    Args:
+        daftar (list | RiwayatMalas): Daftar transaksi
+    
+    Returns:
+        int: Total nominal
+    """
+    if isinstance(daftar, RiwayatMalas):
+        return daftar.total
+    return sum(t['jumlah'] for t in daftar)
+
+
+class RingkasanKas:
+    """
+    Agregat kas kelas yang diperbarui secara bertahap setiap ada perubahan.
+    
+    Dibangun sekali saat data dimuat, lalu setiap perubahan cukup
+    mengurangi kontribusi lama dan menambah kontribusi baru (O(1)),
+    sehingga menu utama dan laporan tidak perlu menjumlah ulang semua data.
+    
+    Atribut:
+        total_pemasukan: Jumlah saldo semua siswa
+        total_pengeluaran: Jumlah semua pengeluaran umum
+        jumlah_transaksi: Jumlah transaksi siswa + pengeluaran umum
+        sudah_bayar: Jumlah siswa dengan saldo > 0
+        belum_bayar: Jumlah siswa dengan saldo <= 0
+    """
+    
+    def __init__(self):
+        self.total_pemasukan = 0
+        self.total_pengeluaran = 0
+        self.jumlah_transaksi = 0
+        self.sudah_bayar = 0
+        self.belum_bayar = 0
+    
+    @property
+    def saldo(self):
+        """Saldo kas = total pemasukan - total pengeluaran"""
+        return self.total_pemasukan - self.total_pengeluaran
+    
+    @property
+    def jumlah_siswa(self):
+        return self.sudah_bayar + self.belum_bayar
+    
+    def bangun_ulang(self, data_siswa, pengeluaran_umum):
+        """
+        Menghitung ulang semua agregat dari nol (dipakai saat data dimuat).
+        
+        Args:
+            data_siswa (list): Daftar data siswa
+            pengeluaran_umum (list): Daftar pengeluaran umum
+        """
+        self.__init__()
+        for siswa in data_siswa:
+            self.tambah_siswa(siswa)
+        self.total_pengeluaran = total_jumlah(pengeluaran_umum)
+        self.jumlah_transaksi += len(pengeluaran_umum)
+    
+    def tambah_siswa(self, siswa):
+        """Menambahkan kontribusi satu siswa (saldo, transaksi, status bayar)"""
+        self.total_pemasukan += siswa['saldo']
+        self.jumlah_transaksi += len(siswa['transaksi'])
+        if siswa['saldo'] > 0:
+            self.sudah_bayar += 1
+        else:
+            self.belum_bayar += 1
+    
+    def kurangi_siswa(self, siswa):
+        """Menghapus kontribusi satu siswa (kebalikan dari tambah_siswa)"""
+        self.total_pemasukan -= siswa['saldo']
+        self.jumlah_transaksi -= len(siswa['transaksi'])
+        if siswa['saldo'] > 0:
+            self.sudah_bayar -= 1
+        else:
+            self.belum_bayar -= 1
+    
+    def tambah_pengeluaran(self, jumlah):
+        """Menambahkan satu pengeluaran umum"""
+        self.total_pengeluaran += jumlah
+        self.jumlah_transaksi += 1
+
+
+@lru_cache(maxsize=4096)
+def _kunci_periode_hari(hari):
+    tanggal = datetime(1970, 1, 1) + timedelta(days=hari)
+    tahun_iso, minggu_iso, _ = tanggal.isocalendar()
+    return f"{tanggal.year:04d}-{tanggal.month:02d}", f"{tahun_iso:04d}-W{minggu_iso:02d}"
+
+
+def kunci_periode(ts):
+    """
+    Menentukan periode bulan dan minggu (ISO) sebuah transaksi.
+    
+    Hasil dihitung sekali per hari (cache), bukan per transaksi.
+    
+    Args:
+        ts (int): Timestamp transaksi
+    
+    Returns:
+        tuple: ('YYYY-MM', 'YYYY-Www')
+    """
+    return _kunci_periode_hari(ts // 86400)
+
+
+class RekapPeriode:
+    """
+    Rekap pemasukan dan pengeluaran per bulan dan per minggu.
+    
+    Setiap periode menyimpan total pemasukan, total pengeluaran, rincian
+    pemasukan per siswa, dan rincian per keterangan. Rekap dibangun sekali
+    saat pertama kali dibutuhkan (membaca semua riwayat), lalu diperbarui
+    setiap ada perubahan, sehingga laporan cukup membaca daftar periode
+    tanpa menelusuri ulang semua transaksi.
+    
+    Atribut:
+        siap: True jika rekap sudah dibangun dan harus ikut diperbarui
+        bulan: 'YYYY-MM' → data periode
+        minggu: 'YYYY-Www' → data periode (minggu ISO)
+    
+    Data periode:
+        {'pemasukan': int, 'pengeluaran': int,
+         'per_siswa': {nama: pemasukan},
+         'per_keterangan': {keterangan: [pemasukan, pengeluaran]}}
+    """
+    
+    def __init__(self):
+        self.siap = False
+        self.bulan = {}
+        self.minggu = {}
+    
+    def bangun_ulang(self, data_siswa, pengeluaran_umum):
+        """
+        Membangun rekap dari semua riwayat transaksi.
+        
+        Args:
+            data_siswa (list): Daftar data siswa
+            pengeluaran_umum (list): Daftar pengeluaran umum
+        """
+        self.__init__()
+        for siswa in data_siswa:
+            for t in siswa['transaksi']:
+                self.tambah(t, siswa['nama'])
+        for p in pengeluaran_umum:
+            self.tambah(p)
+        self.siap = True
+    
+    def tambah(self, transaksi, nama=None, faktor=1):
+        """
+        Menambahkan satu transaksi ke periode bulan dan minggunya.
+        
+        Args:
+            transaksi (dict): Transaksi yang punya 'ts', 'jumlah', 'keterangan'
+            nama (str): Nama siswa untuk setoran; None untuk pengeluaran umum
+            faktor (int): 1 untuk menambah, -1 untuk mengurangi
+        """
+        jumlah = transaksi['jumlah'] * faktor
+        kolom = 0 if nama is not None else 1
+        keterangan = transaksi.get('keterangan') or ('Setoran Tunai' if nama is not None else '-')
+        
+        for tabel, kunci in zip((self.bulan, self.minggu), kunci_periode(transaksi['ts'])):
+            periode = tabel.get(kunci)
+            if periode is None:
+                periode = tabel[kunci] = {'pemasukan': 0, 'pengeluaran': 0, 'per_siswa': {}, 'per_keterangan': {}}
+            
+            if nama is not None:
+                periode['pemasukan'] += jumlah
+                sisa = periode['per_siswa'].get(nama, 0) + jumlah
+                if sisa:
+                    periode['per_siswa'][nama] = sisa
+                else:
+                    periode['per_siswa'].pop(nama, None)
+            else:
+                periode['pengeluaran'] += jumlah
+            
+            kategori = periode['per_keterangan'].setdefault(keterangan, [0, 0])
+            kategori[kolom] += jumlah
+            if kategori == [0, 0]:
+                del periode['per_keterangan'][keterangan]
+            if not periode['per_keterangan']:
+                del tabel[kunci]
+    
+    def kurangi(self, transaksi, nama=None):
+        """Menghapus kontribusi satu transaksi (kebalikan dari tambah)"""
+        self.tambah(transaksi, nama, -1)
+    
+    def ganti_nama(self, lama, baru):
+        """Memindahkan rincian per siswa ke nama baru di semua periode"""
+        for tabel in (self.bulan, self.minggu):
+            for periode in tabel.values():
+                if lama in periode['per_siswa']:
+                    periode['per_siswa'][baru] = periode['per_siswa'].pop(lama)
+    
+    def kosongkan(self):
+        """Menghapus semua periode (rekap tetap dianggap siap)"""
+        self.bulan = {}
+        self.minggu = {}
+
+
+class IndeksWaktu:
+    """
+    Index setoran semua siswa yang urut berdasarkan waktu.
+    
+    Riwayat setiap siswa dan pengeluaran umum sudah urut waktu masing-masing,
+    tetapi setoran semua siswa tersebar di banyak list. Index ini menyatukan
+    semuanya dalam satu list timestamp terurut (untuk binary search) dengan
+    pasangan (siswa, transaksi) di posisi yang sama, sehingga query rentang
+    tanggal cukup memotong list tanpa menelusuri seluruh riwayat.
+    
+    Seperti RekapPeriode, index dibangun saat pertama kali dibutuhkan lalu
+    diperbarui di terapkan_record. Entri menyimpan referensi data siswa,
+    jadi ganti nama tidak perlu mengubah index.
+    
+    Atribut:
+        siap: True jika index sudah dibangun dan harus ikut diperbarui
+    """
+    
+    def __init__(self):
+        self.siap = False
+        self._ts = []
+        self._isi = []
+    
+    def __len__(self):
+        return len(self._ts)
+    
+    def bangun_ulang(self, data_siswa):
+        """
+        Membangun index dari riwayat semua siswa.
+        
+        Args:
+            data_siswa (list): Daftar data siswa (riwayat masing-masing urut waktu)
+        """
+        sumber = [self._entri_siswa(siswa) for siswa in data_siswa if siswa['transaksi']]
+        gabungan = list(heapq.merge(*sumber, key=lambda x: x[1]['ts']))
+        self._ts = [t['ts'] for _, t in gabungan]
+        self._isi = gabungan
+        self.siap = True
+    
+    @staticmethod
+    def _entri_siswa(siswa):
+        for t in siswa['transaksi']:
+            yield siswa, t
+    
+    def tambah(self, siswa, transaksi):
+        """Menyisipkan satu setoran di posisinya (biasanya paling akhir)"""
+        pos = bisect.bisect_right(self._ts, transaksi['ts'])
+        self._ts.insert(pos, transaksi['ts'])
+        self._isi.insert(pos, (siswa, transaksi))
+    
+    def keluarkan_siswa(self, siswa):
+        """Menghapus semua setoran milik satu siswa (hapus/reset siswa)"""
+        sisa = [i for i, (pemilik, _) in enumerate(self._isi) if pemilik is not siswa]
+        self._ts = [self._ts[i] for i in sisa]
+        self._isi = [self._isi[i] for i in sisa]
+    
+    def kosongkan(self):
+        """Menghapus semua entri (index tetap dianggap siap)"""
+        self._ts = []
+        self._isi = []
+    
+    def antara(self, awal, akhir):
+        """
+        Mengambil setoran dengan awal <= ts <= akhir.
+        
+        Args:
+            awal (int): Timestamp awal (inklusif)
+            akhir (int): Timestamp akhir (inklusif)
+        
+        Returns:
+            list: Pasangan (siswa, transaksi), urut waktu
+        """
+        lo = bisect.bisect_left(self._ts, awal)
+        hi = bisect.bisect_right(self._ts, akhir, lo=lo)
+        return self._isi[lo:hi]
+    
+    def __getitem__(self, posisi):
+        """Pasangan (siswa, transaksi) di posisi tertentu"""
+        return self._isi[posisi]
+    
+    def ts(self, posisi):
+        """Timestamp setoran di posisi tertentu"""
+        return self._ts[posisi]
+    
+    def posisi(self, ts):
+        """Posisi setoran pertama dengan timestamp >= ts"""
+        return bisect.bisect_left(self._ts, ts)
+
+
+class BarisDaftar:
+    """
+    Sumber baris untuk tampilkan_halaman dari satu daftar urut waktu.
+    
+    Daftar (list atau RiwayatMalas) hanya dipotong sebanyak satu halaman,
+    dan lompat ke tanggal memakai binary search pada 'ts'.
+    """
+    
+    def __init__(self, daftar):
+        """
+        Args:
+            daftar (list | RiwayatMalas): Transaksi yang urut berdasarkan 'ts'
+        """
+        self._daftar = daftar
+    
+    def __len__(self):
+        return len(self._daftar)
+    
+    def potong(self, awal, akhir):
+        """Mengambil baris dari posisi awal sampai sebelum akhir"""
+        return self._daftar[awal:akhir]
+    
+    def posisi_ts(self, ts):
+        """Posisi baris pertama dengan timestamp >= ts"""
+        return bisect.bisect_left(self._daftar, ts, key=lambda t: t['ts'])
+
+
+class BarisGabungan:
+    """
+    Setoran semua siswa dan pengeluaran umum sebagai satu daftar urut waktu.
+    
+    Sumber baris untuk tampilkan_halaman yang bisa diakses per posisi tanpa
+    menggabung seluruh transaksi. Setoran diambil dari IndeksWaktu dan
+    pengeluaran dari daftarnya sendiri (keduanya urut waktu). Awal sebuah
+    halaman dicari dengan binary search pada pembagian posisi di antara
+    kedua daftar, lalu satu halaman digabung dengan dua penunjuk.
+    
+    Urutan dan bentuk baris sama dengan iter_semua_transaksi: pada
+    timestamp yang sama setoran ditampilkan lebih dulu.
+    """
+    
+    def __init__(self, indeks_waktu, pengeluaran):
+        """
+        Args:
+            indeks_waktu (IndeksWaktu): Index setoran yang sudah dibangun
+            pengeluaran (list | RiwayatMalas): Pengeluaran umum (urut waktu)
+        """
+        self._setoran = indeks_waktu
+        self._pengeluaran = pengeluaran
+    
+    def __len__(self):
+        return len(self._setoran) + len(self._pengeluaran)
+    
+    def _bagi(self, posisi):
+        """Helper: (i, j) sehingga i setoran dan j pengeluaran pertama = baris sebelum posisi"""
+        setoran, pengeluaran = self._setoran, self._pengeluaran
+        lo, hi = max(0, posisi - len(pengeluaran)), min(posisi, len(setoran))
+        while lo < hi:
+            i = (lo + hi + 1) // 2
+            j = posisi - i
+            if j >= len(pengeluaran) or setoran.ts(i - 1) <= pengeluaran[j]['ts']:
+                lo = i
+            else:
+                hi = i - 1
+        return lo, posisi - lo
+    
+    def potong(self, awal, akhir):
+        """Mengambil baris dari posisi awal sampai sebelum akhir"""
+        setoran, pengeluaran = self._setoran, self._pengeluaran
+        i, j = self._bagi(awal)
+        hasil = []
+        for _ in range(awal, min(akhir, len(self))):
+            if j >= len(pengeluaran) or (i < len(setoran) and setoran.ts(i) <= pengeluaran[j]['ts']):
+                siswa, t = setoran[i]
+                i += 1
+                hasil.append({
+                    'tanggal': t['tanggal'],
+                    'ts': t['ts'],
+                    'nama': siswa['nama'],
+                    'jumlah': t['jumlah'],
+                    'keterangan': t.get('keterangan', 'Setoran Tunai'),
+                    'is_income': True
+                })
+            else:
+                p = pengeluaran[j]
+                j += 1
+                hasil.append({
+                    'tanggal': p['tanggal'],
+                    'ts': p['ts'],
+                    'nama': 'KAS UMUM',
+                    'jumlah': p['jumlah'],
+                    'keterangan': p['keterangan'],
+                    'is_income': False
+                })
+        return hasil
+    
+    def posisi_ts(self, ts):
+        """Posisi baris pertama dengan timestamp >= ts"""
+        return self._setoran.posisi(ts) + bisect.bisect_left(self._pengeluaran, ts, key=lambda p: p['ts'])
+
+
+class BarisQuery:
+    """
+    Sumber baris untuk tampilkan_halaman dari query semua_transaksi.
+    
+    Dipakai penyimpanan yang mendukung query (SQLite): setiap halaman
+    diambil dengan LIMIT/OFFSET dan posisi tanggal dihitung lewat index.
+    """
+    
+    def __init__(self, storage):
+        """
+        Args:
+            storage (PenyimpananSQLite): Penyimpanan dengan mendukung_query
+        """
+        self._storage = storage
+        self._jumlah = storage.jumlah_semua_transaksi()
+    
+    def __len__(self):
+        return self._jumlah
+    
+    def potong(self, awal, akhir):
+        """Mengambil baris dari posisi awal sampai sebelum akhir"""
+        return list(self._storage.semua_transaksi(lewati=awal, batas=akhir - awal))
+    
+    def posisi_ts(self, ts):
+        """Posisi baris pertama dengan timestamp >= ts"""
+        return self._storage.posisi_transaksi(ts)
+
+
+TOKEN_PATTERN = re.compile(r'\w+')
+
+
+def token_teks(teks):
+    """
+    Memecah teks menjadi token kata untuk pencarian (case-insensitive).
+    
+    Args:
+        teks (str): Teks keterangan atau kata kunci
+    
+    Returns:
+        list: Token huruf kecil, misal 'Biaya Kegiatan - bus' → ['biaya', 'kegiatan', 'bus']
+    """
+    return TOKEN_PATTERN.findall(teks.casefold())
+
+
+class IndeksKeterangan:
+    """
+    Inverted index kata di keterangan transaksi.
+    
+    Menyimpan token → list pasangan (siswa, transaksi) untuk semua setoran
+    dan pengeluaran (siswa None untuk pengeluaran umum), ditambah daftar
+    token terurut untuk pencarian awalan dengan bisect. Pencarian cukup
+    mengambil posting list token yang cocok, tanpa membaca riwayat.
+    
+    Seperti IndeksWaktu, index dibangun saat pertama kali dibutuhkan lalu
+    diperbarui di terapkan_record. Entri siswa menyimpan referensi data
+    siswa, jadi ganti nama tidak perlu mengubah index.
+    
+    Atribut:
+        siap: True jika index sudah dibangun dan harus ikut diperbarui
+    """
+    
+    def __init__(self):
+        self.siap = False
+        self._posting = {}
+        self._token_urut = []
+    
+    def bangun_ulang(self, data_siswa, pengeluaran_umum):
+        """
+        Membangun index dari semua riwayat transaksi.
+        
+        Args:
+            data_siswa (list): Daftar data siswa
+            pengeluaran_umum (list): Daftar pengeluaran umum
+        """
+        self.__init__()
+        for siswa in data_siswa:
+            for t in siswa['transaksi']:
+                self.tambah(siswa, t)
+        for p in pengeluaran_umum:
+            self.tambah(None, p)
+        self.siap = True
+    
+    @staticmethod
+    def _keterangan(siswa, transaksi):
+        if siswa is None:
+            return transaksi.get('keterangan') or ''
+        return transaksi.get('keterangan', 'Setoran Tunai')
+    
+    def tambah(self, siswa, transaksi):
+        """
+        Menambahkan satu transaksi ke posting list setiap token keterangannya.
+        
+        Args:
+            siswa (dict): Data siswa pemilik setoran, None untuk pengeluaran umum
+            transaksi (dict): Transaksi yang ditambahkan
+        """
+        for token in set(token_teks(self._keterangan(siswa, transaksi))):
+            posting = self._posting.get(token)
+            if posting is None:
+                posting = self._posting[token] = []
+                bisect.insort(self._token_urut, token)
+            posting.append((siswa, transaksi))
+    
+    def keluarkan_siswa(self, siswa):
+        """Menghapus semua setoran milik satu siswa (hapus/reset siswa)"""
+        token_siswa = set()
+        for t in siswa['transaksi']:
+            token_siswa.update(token_teks(self._keterangan(siswa, t)))
+        for token in token_siswa:
+            posting = self._posting.get(token)
+            if posting is None:
+                continue
+            posting[:] = [entri for entri in posting if entri[0] is not siswa]
+            if not posting:
+                del self._posting[token]
+                del self._token_urut[bisect.bisect_left(self._token_urut, token)]
+    
+    def kosongkan(self):
+        """Menghapus semua entri (index tetap dianggap siap)"""
+        self._posting = {}
+        self._token_urut = []
+    
+    def _cocok_awalan(self, awalan):
+        """Helper: Semua entri dengan token yang diawali awalan, per id transaksi"""
+        hasil = {}
+        i = bisect.bisect_left(self._token_urut, awalan)
+        while i < len(self._token_urut) and self._token_urut[i].startswith(awalan):
+            for entri in self._posting[self._token_urut[i]]:
+                hasil[id(entri[1])] = entri
+            i += 1
+        return hasil
+    
+    def cari(self, kata_kunci):
+        """
+        Mencari transaksi yang keterangannya memuat semua kata kunci.
+        
+        Setiap kata kunci cocok dengan token yang diawali kata tersebut,
+        misal 'foto' cocok dengan 'Biaya Fotokopi'.
+        
+        Args:
+            kata_kunci (str): Satu atau beberapa kata
+        
+        Returns:
+            list: Pasangan (siswa, transaksi), urut waktu
+        """
+        hasil = None
+        # Mulai dari kata terpanjang: biasanya paling sedikit hasilnya
+        for awalan in sorted(set(token_teks(kata_kunci)), key=len, reverse=True):
+            cocok = self._cocok_awalan(awalan)
+            hasil = cocok if hasil is None else {k: v for k, v in hasil.items() if k in cocok}
+            if not hasil:
+                return []
+        if hasil is None:
+            return []
+        return sorted(hasil.values(), key=lambda entri: entri[1]['ts'])
+
+
+class IndeksNama:
+    """
+    Index nama siswa untuk pencarian cepat dan penyisipan terurut.
+    
+    Menyimpan dua struktur yang selalu sinkron dengan data_siswa:
+    - dict nama (casefold) → data siswa, untuk cek duplikat O(1)
+    - list nama (casefold) yang terurut, untuk pencarian awalan dengan bisect
+    
+    data_siswa sendiri tetap diurutkan berdasarkan nama, dan siswa baru
+    disisipkan langsung di posisinya (tanpa sort ulang seluruh list).
+    
+    Atribut:
+        data_siswa: List data siswa yang di-index (urut berdasarkan nama)
+    """
+    
+    def __init__(self):
+        self.data_siswa = []
+        self._per_kunci = {}
+        self._kunci_urut = []
+        self._nama_urut = []
+    
+    def bangun_ulang(self, data_siswa):
+        """
+        Membangun index dari awal (dipakai saat data dimuat).
+        
+        Args:
+            data_siswa (list): Daftar data siswa (diurutkan di tempat jika belum urut)
+        """
+        data_siswa.sort(key=lambda x: x['nama'])
+        self.data_siswa = data_siswa
+        self._per_kunci = {siswa['nama'].casefold(): siswa for siswa in data_siswa}
+        self._kunci_urut = sorted(self._per_kunci)
+        self._nama_urut = [siswa['nama'] for siswa in data_siswa]
+    
+    def cari(self, nama):
+        """
+        Mencari siswa dengan nama persis (case-insensitive).
+        
+        Returns:
+            dict: Data siswa, atau None jika tidak ada
+        """
+        return self._per_kunci.get(nama.casefold())
+    
+    def posisi(self, siswa):
+        """Mengembalikan index (0-based) siswa di data_siswa"""
+        return bisect.bisect_left(self._nama_urut, siswa['nama'])
+    
+    def sisipkan(self, siswa):
+        """Menyisipkan siswa baru ke data_siswa dan index sesuai urutan nama"""
+        pos = bisect.bisect_left(self._nama_urut, siswa['nama'])
+        self.data_siswa.insert(pos, siswa)
+        self._nama_urut.insert(pos, siswa['nama'])
+        
+        kunci = siswa['nama'].casefold()
+        self._per_kunci[kunci] = siswa
+        bisect.insort(self._kunci_urut, kunci)
+    
+    def keluarkan(self, siswa):
+        """Mengeluarkan siswa dari data_siswa dan index"""
+        pos = self.posisi(siswa)
+        del self.data_siswa[pos]
+        del self._nama_urut[pos]
+        
+        kunci = siswa['nama'].casefold()
+        del self._per_kunci[kunci]
+        del self._kunci_urut[bisect.bisect_left(self._kunci_urut, kunci)]
+    
+    def cari_awalan(self, awalan, batas=20):
+        """
+        Mencari siswa yang namanya diawali teks tertentu (case-insensitive).
+        
+        Args:
+            awalan (str): Awal nama yang diketik user
+            batas (int): Jumlah hasil maksimal
+        
+        Returns:
+            list: Data siswa yang cocok, urut berdasarkan nama
+        """
+        awalan = awalan.casefold()
+        hasil = []
+        i = bisect.bisect_left(self._kunci_urut, awalan)
+        while i < len(self._kunci_urut) and self._kunci_urut[i].startswith(awalan) and len(hasil) < batas:
+            hasil.append(self._per_kunci[self._kunci_urut[i]])
+            i += 1
+        return hasil
+    
+    def cari_mirip(self, teks, batas=5):
+        """
+        Mencari siswa dengan nama yang mirip (untuk salah ketik).
+        
+        Args:
+            teks (str): Nama yang diketik user
+            batas (int): Jumlah hasil maksimal
+        
+        Returns:
+            list: Data siswa yang namanya paling mirip
+        """
+        kunci = difflib.get_close_matches(teks.casefold(), self._kunci_urut, n=batas, cutoff=0.6)
+        return [self._per_kunci[k] for k in kunci]
+
+
+class Layar:
+    """
+    Komposisi layar terminal berbasis frame.
+    
+    Satu tampilan menu disusun dulu di memori (mulai → tulis → tampilkan),
+    lalu dikirim ke terminal dengan satu kali tulis. Layar dibersihkan
+    dengan kode ANSI, bukan dengan menjalankan perintah 'cls'/'clear'.
+    Jika layar masih menampilkan frame sebelumnya, hanya baris yang
+    berubah yang ditulis ulang (selama setiap baris muat di satu baris
+    terminal).
+    
+    Atribut:
+        CLEAR: Kode ANSI untuk kursor ke pojok kiri atas + hapus layar dan scrollback
+        RUANG_PROMPT: Baris yang disisakan di bawah frame untuk prompt dan pesan
+        menyusun: True selama frame sedang disusun
+    """
+    CLEAR = '\033[H\033[2J\033[3J'
+    RUANG_PROMPT = 8
+    
+    def __init__(self, output=None):
+        self.output = output or sys.stdout
+        self.menyusun = False
+        self._baris = []
+        self._lebar = None
+        self._frame_lama = None
+    
+    def bersihkan(self):
+        """Membersihkan layar; frame sebelumnya dianggap sudah tidak terlihat"""
+        self.output.write(self.CLEAR)
+        self.output.flush()
+        self._frame_lama = None
+    
+    def mulai(self, potong=False):
+        """
+        Mulai menyusun frame baru.
+        
+        Args:
+            potong (bool): Potong setiap baris agar muat selebar terminal, sehingga
+                           satu baris frame selalu satu baris layar
+        """
+        self.menyusun = True
+        self._baris = []
+        # Satu kolom disisakan: di sebagian terminal baris yang pas selebar layar ikut terlipat
+        self._lebar = shutil.get_terminal_size().columns - 1 if potong else None
+    
+    def tulis(self, teks=''):
+        """Menambahkan teks (boleh berisi beberapa baris) ke frame"""
+        baris = teks.split('\n')
+        if self._lebar:
+            baris = [potong_kolom_terminal(b, self._lebar) for b in baris]
+        self._baris.extend(baris)
+    
+    def tampilkan(self, sebagian=False):
+        """
+        Menulis frame yang sudah disusun ke terminal dalam satu kali tulis.
+        
+        Args:
+            sebagian (bool): True jika layar dijamin masih menampilkan frame
+                             sebelumnya di bagian atas (hanya ada sedikit baris
+                             input/pesan di bawahnya). Baris yang sama dilewati,
+                             baris yang berubah ditimpa, dan sisa layar di
+                             bawah frame dihapus.
+        """
+        baris = self._baris
+        self.menyusun = False
+        self._baris = []
+        
+        ukuran_terminal = shutil.get_terminal_size()
+        bisa_sebagian = (
+            sebagian
+            and self._frame_lama is not None
+            and len(self._frame_lama) == len(baris)
+            # Sisakan ruang untuk prompt dan pesan agar layar tidak sempat scroll
+            and len(baris) + self.RUANG_PROMPT <= ukuran_terminal.lines
+            # Posisi kursor per baris hanya benar jika tidak ada baris yang terlipat
+            and all(lebar_kolom_terminal(teks) <= ukuran_terminal.columns for teks in baris)
+        )
+        
+        if bisa_sebagian:
+            bagian = [
+                f"\033[{i};1H{teks}\033[K"
+                for i, (teks, lama) in enumerate(zip(baris, self._frame_lama), 1)
+                if teks != lama
+            ]
+            bagian.append(f"\033[{len(baris) + 1};1H\033[J")
+        else:
+            bagian = [self.CLEAR, '\n'.join(baris), '\n']
+        
+        self.output.write(''.join(bagian))
+        self.output.flush()
+        self._frame_lama = baris
+
+
+class Pengukur:
+    """
+    Pencatat waktu dan counter operasi (profiling), nonaktif secara default.
+    
+    Saat diaktifkan (KALCER_PROFIL=1 atau --profil), method KasKelas di
+    METHOD_DIUKUR dibungkus pencatat waktu. Selama nonaktif tidak ada yang
+    dibungkus, dan hitung() langsung kembali, jadi hampir tanpa biaya.
+    Waktu aksi menu termasuk waktu menunggu input user.
+    
+    Atribut:
+        METHOD_DIUKUR: Method KasKelas yang dicatat waktunya
+        AKSI_MENU: Method yang bisa diprofil dengan cProfile (aksi menu utama)
+        aktif: True jika pencatatan berjalan
+        operasi: nama → [jumlah panggilan, total detik, detik terlama]
+        counter: nama → jumlah (byte dibaca/ditulis, baris tabel, dst)
+        profil_berikut: True jika aksi menu berikutnya dijalankan dengan cProfile
+        laporan_cprofile: Hasil cProfile terakhir (teks), atau ''
+    """
+    AKSI_MENU = (
+        'setor_iuran', 'tambah_pengeluaran', 'impor_csv', 'lihat_saldo', 'lihat_transaksi_siswa',
+        'lihat_semua_transaksi', 'lihat_laporan_siswa', 'lihat_arus_kas',
+        'cari_transaksi_tanggal', 'cari_transaksi_keterangan', 'export_data', 'kelola_siswa',
+        'reset_transaksi', 'ganti_kelas'
+    )
+    METHOD_DIUKUR = AKSI_MENU + (
+        'load_data', 'save_data', 'checkpoint', 'catat_jurnal', 'muat_jurnal',
+        'buat_tabel_dinamis', 'buat_tabel_stream'
+    )
+    
+    def __init__(self):
+        self.aktif = False
+        self.profil_berikut = False
+        self.reset()
+    
+    def reset(self):
+        """Mengosongkan semua catatan"""
+        self.operasi = {}
+        self.counter = {}
+        self.laporan_cprofile = ''
+    
+    def aktifkan(self, kelas):
+        """
+        Mulai mencatat: bungkus method di METHOD_DIUKUR milik kelas.
+        
+        Args:
+            kelas (type): Kelas yang method-nya diukur (KasKelas)
+        """
+        if self.aktif:
+            return
+        self.aktif = True
+        for nama in self.METHOD_DIUKUR:
+            setattr(kelas, nama, self._bungkus(nama, getattr(kelas, nama)))
+    
+    def _bungkus(self, nama, fungsi):
+        """Helper: Method pengganti yang mencatat waktu (atau menjalankan cProfile)"""
+        @wraps(fungsi)
+        def terukur(*args, **kwargs):
+            if self.profil_berikut and nama in self.AKSI_MENU:
+                self.profil_berikut = False
+                return self._jalankan_cprofile(nama, fungsi, args, kwargs)
+            mulai = time.perf_counter()
+            try:
+                return fungsi(*args, **kwargs)
+            finally:
+                self.catat_waktu(nama, time.perf_counter() - mulai)
+        return terukur
+    
+    def _jalankan_cprofile(self, nama, fungsi, args, kwargs):
+        """Helper: Jalankan satu aksi di bawah cProfile dan simpan ringkasannya"""
+        profil = cProfile.Profile()
+        mulai = time.perf_counter()
+        try:
+            return profil.runcall(fungsi, *args, **kwargs)
+        finally:
+            self.catat_waktu(nama, time.perf_counter() - mulai)
+            teks = io.StringIO()
+            pstats.Stats(profil, stream=teks).sort_stats('cumulative').print_stats(25)
+            self.laporan_cprofile = f"cProfile: {nama}\n{teks.getvalue()}"
+    
+    def catat_waktu(self, nama, detik):
+        """Menambahkan satu panggilan operasi beserta lamanya"""
+        data = self.operasi.get(nama)
+        if data is None:
+            data = self.operasi[nama] = [0, 0.0, 0.0]
+        data[0] += 1
+        data[1] += detik
+        data[2] = max(data[2], detik)
+    
+    def hitung(self, nama, jumlah=1):
+        """Menambah counter (tidak melakukan apa-apa jika nonaktif)"""
+        if self.aktif:
+            self.counter[nama] = self.counter.get(nama, 0) + jumlah
+    
+    def data(self):
+        """
+        Returns:
+            dict: Semua catatan dalam bentuk siap di-dump ke JSON
+        """
+        return {
+            'waktu': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            'operasi': {
+                nama: {
+                    'panggilan': panggilan,
+                    'total_ms': round(total * 1000, 3),
+                    'rata_ms': round(total / panggilan * 1000, 3),
+                    'maks_ms': round(maks * 1000, 3)
+                }
+                for nama, (panggilan, total, maks) in sorted(self.operasi.items())
+            },
+            'counter': dict(sorted(self.counter.items())),
+            'cprofile': self.laporan_cprofile
+        }
+
+
+# Satu pengukur untuk seluruh program (lihat Pengukur.aktifkan)
+PENGUKUR = Pengukur()
+
+
+class DataRusak(ValueError):
+    """
+    Database tidak bisa dibaca sampai habis.
+    
+    Atribut:
+        offset: Posisi byte di file tempat kerusakan ditemukan
+        sebagian: Data valid yang berhasil dibaca sebelum posisi tersebut
+                  (format sama dengan hasil Penyimpanan.muat), atau None
+    """
+    
+    def __init__(self, offset, pesan, sebagian=None):
+        super().__init__(f"{pesan} (byte {offset})")
+        self.offset = offset
+        self.pesan = pesan
+        self.sebagian = sebagian
+
+
+class PembacaJSONBertahap:
+    """
+    Pembaca file JSON sepotong demi sepotong.
+    
+    File dibaca per blok dan hanya satu nilai (misal satu data siswa)
+    yang di-parse dan ditahan di memori pada satu waktu, sehingga file
+    arsip yang sangat besar tetap bisa dibuka di komputer dengan RAM kecil.
+    Posisi byte setiap nilai ikut dicatat, untuk index dan laporan kerusakan.
+    
+    Atribut:
+        UKURAN_BLOK: Jumlah byte yang dibaca setiap kali
+        BATAS_NILAI: Ukuran maksimal satu nilai (karakter) sebelum dianggap rusak
+    """
+    UKURAN_BLOK = 1 << 16
+    BATAS_NILAI = 1 << 26
+    
+    def __init__(self, f):
+        """
+        Args:
+            f: File yang dibuka dalam mode biner ('rb')
+        """
+        self._f = f
+        self._decoder = codecs.getincrementaldecoder('utf-8')()
+        self._json = json.JSONDecoder()
+        self._buf = ''
+        self._pos = 0
+        self._offset = 0
+        self._habis = False
+    
+    def posisi(self):
+        """Posisi byte di file untuk karakter berikutnya yang akan dibaca"""
+        return self._offset + len(self._buf[:self._pos].encode('utf-8'))
+    
+    def _isi(self, ukuran=None):
+        """Helper: Tambah isi buffer dari file; False jika file sudah habis"""
+        if self._habis:
+            return False
+        blok = self._f.read(ukuran or self.UKURAN_BLOK)
+        PENGUKUR.hitung('byte_dibaca', len(blok))
+        if not blok:
+            self._habis = True
+            self._buf += self._decoder.decode(b'', final=True)
+            return False
+        self._buf += self._decoder.decode(blok)
+        return True
+    
+    def _buang_terbaca(self):
+        """Helper: Buang bagian buffer yang sudah dibaca"""
+        if self._pos > self.UKURAN_BLOK:
+            self._offset += len(self._buf[:self._pos].encode('utf-8'))
+            self._buf = self._buf[self._pos:]
+            self._pos = 0
+    
+    def intip(self):
+        """Mengembalikan karakter berikutnya (bukan spasi) tanpa membacanya, '' jika habis"""
+        while True:
+            while self._pos < len(self._buf) and self._buf[self._pos] in ' \t\r\n':
+                self._pos += 1
+            if self._pos < len(self._buf):
+                return self._buf[self._pos]
+            if not self._isi():
+                return ''
+    
+    def ambil(self, diharapkan):
+        """
+        Membaca satu karakter struktur JSON ('{', ',', ':', dst).
+        
+        Args:
+            diharapkan (str): Karakter-karakter yang boleh muncul
+        
+        Returns:
+            str: Karakter yang dibaca
+        
+        Raises:
+            DataRusak: Jika karakter berikutnya tidak sesuai
+        """
+        c = self.intip()
+        if not c or c not in diharapkan:
+            ditemukan = repr(c) if c else 'akhir file'
+            raise DataRusak(self.posisi(), f"diharapkan {' atau '.join(map(repr, diharapkan))}, ditemukan {ditemukan}")
+        self._pos += 1
+        return c
+    
+    def nilai(self):
+        """
+        Membaca satu nilai JSON lengkap (objek, list, string, angka, ...).
+        
+        Nilai yang salah di tengah buffer langsung dilaporkan; buffer hanya
+        diperbesar jika nilai mungkin terpotong di ujung buffer, dan paling
+        besar BATAS_NILAI, agar file rusak tidak terbaca seluruhnya ke memori.
+        
+        Raises:
+            DataRusak: Jika nilai tidak valid, terlalu besar, atau file
+                       berakhir di tengah nilai
+        """
+        self.intip()
+        while True:
+            try:
+                hasil, akhir = self._json.raw_decode(self._buf, self._pos)
+                # Nilai yang berakhir tepat di ujung buffer bisa saja terpotong (misal angka)
+                if akhir < len(self._buf) or self._habis:
+                    self._pos = akhir
+                    return hasil
+            except json.JSONDecodeError as e:
+                # Kesalahan jauh dari ujung buffer tidak akan hilang dengan membaca lebih
+                # banyak (kecuali string yang belum ditutup, yang bisa saja sangat panjang)
+                pasti_rusak = e.pos + 8 < len(self._buf) and not e.msg.startswith('Unterminated string')
+                if self._habis or pasti_rusak:
+                    offset = self.posisi() + len(self._buf[self._pos:e.pos].encode('utf-8'))
+                    raise DataRusak(offset, e.msg) from None
+            if len(self._buf) - self._pos > self.BATAS_NILAI:
+                raise DataRusak(self.posisi(), f"nilai lebih dari {self.BATAS_NILAI >> 20} MB, kemungkinan file rusak")
+            # Perbesar buffer berlipat agar nilai yang besar tidak di-parse berulang kali
+            self._isi(max(self.UKURAN_BLOK, len(self._buf) - self._pos))
+    
+    def elemen_list(self):
+        """
+        Membaca list JSON satu elemen demi satu elemen.
+        
+        Yields:
+            tuple: (offset_awal, nilai, offset_akhir) untuk setiap elemen
+        """
+        self.ambil('[')
+        if self.intip() == ']':
+            self._pos += 1
+            return
+        while True:
+            self.intip()
+            awal = self.posisi()
+            isi = self.nilai()
+            yield awal, isi, self.posisi()
+            self._buang_terbaca()
+            if self.ambil(',]') == ']':
+                return
+
+
+class KunciBerkas:
+    """
+    Kunci antar-proses berbasis file, sekaligus tempat stempel versi database.
+    
+    File kunci berisi satu objek JSON kecil:
+        generasi : jurnal_seq terakhir yang ditulis proses mana pun
+        snapshot : berapa kali snapshot sudah ditulis ulang (checkpoint)
+    
+    Dengan stempel ini, proses lain cukup membaca file kecil tersebut untuk
+    tahu apakah database berubah, tanpa membaca ulang database-nya.
+    Kunci bersifat reentrant di dalam satu proses (with bersarang hanya
+    mengunci sekali), dan memakai fcntl.flock (Linux/macOS) atau
+    msvcrt.locking (Windows).
+    
+    Atribut:
+        BATAS_TUNGGU: Lama menunggu kunci (detik) sebelum TimeoutError
+                      (bisa diubah lewat KALCER_BATAS_TUNGGU)
+        path: Path file kunci
+    """
+    BATAS_TUNGGU = 10.0
+    
+    def __init__(self, path):
+        self.path = path
+        self.batas_tunggu = angka_dari_env('KALCER_BATAS_TUNGGU', self.BATAS_TUNGGU)
+        self._file = None
+        self._kedalaman = 0
+    
+    def __enter__(self):
+        if self._kedalaman == 0:
+            self._file = open(self.path, 'a+b')
+            try:
+                self._kunci()
+            except BaseException:
+                self._file.close()
+                self._file = None
+                raise
+        self._kedalaman += 1
+        return self
+    
+    def __exit__(self, *exc):
+        self.lepas()
+        return False
+    
+    def coba(self):
+        """
+        Mencoba mengambil kunci sekali, tanpa menunggu.
+        
+        Dipakai kode asyncio yang menunggu kunci dengan asyncio.sleep
+        (lihat ServerKas). Kunci yang didapat dilepas dengan lepas().
+        
+        Returns:
+            bool: True jika kunci didapat (atau sudah dipegang proses ini)
+        """
+        if self._kedalaman == 0:
+            self._file = open(self.path, 'a+b')
+            if not self._coba_kunci():
+                self._file.close()
+                self._file = None
+                return False
+        self._kedalaman += 1
+        return True
+    
+    def lepas(self):
+        """Melepas kunci sekali (pasangan __enter__ atau coba yang berhasil)"""
+        self._kedalaman -= 1
+        if self._kedalaman == 0:
+            try:
+                self._lepas()
+            finally:
+                self._file.close()
+                self._file = None
+    
+    def _kunci(self):
+        """Helper: Tunggu sampai kunci didapat (dicoba ulang setiap 50 ms)"""
+        batas = time.monotonic() + self.batas_tunggu
+        while not self._coba_kunci():
+            if time.monotonic() >= batas:
+                raise TimeoutError(f"database sedang dipakai proses lain ({self.path})")
+            time.sleep(0.05)
+    
+    def _coba_kunci(self):
+        """Helper: Satu kali percobaan mengunci tanpa menunggu"""
+        try:
+            if sys.platform == "win32":
+                self._file.seek(0)
+                msvcrt.locking(self._file.fileno(), msvcrt.LK_NBLCK, 1)
+            else:
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return True
+        except OSError:
+            return False
+    
+    def _lepas(self):
+        if sys.platform == "win32":
+            self._file.seek(0)
+            msvcrt.locking(self._file.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+    
+    def baca(self):
+        """
+        Membaca stempel versi (harus sedang memegang kunci).
+        
+        Returns:
+            dict: {'generasi': int, 'snapshot': int}, nol jika belum pernah ditulis
+        """
+        self._file.seek(0)
+        isi = self._file.read()
+        try:
+            stempel = json.loads(isi) if isi.strip() else {}
+        except ValueError:
+            stempel = {}
+        return {'generasi': stempel.get('generasi', 0), 'snapshot': stempel.get('snapshot', 0)}
+    
+    def tulis(self, stempel):
+        """Menulis stempel versi (harus sedang memegang kunci)"""
+        self._file.seek(0)
+        self._file.truncate()
+        self._file.write(json.dumps(stempel).encode('utf-8'))
+        self._file.flush()
+
+
+class Penyimpanan(ABC):
+    """
+    Antarmuka dasar untuk media penyimpanan data kas kelas.
+    
+    KasKelas hanya berbicara dengan objek penyimpanan melalui method di bawah,
+    sehingga file JSON dan database SQLite bisa dipakai bergantian.
+    
+    Beberapa proses boleh memakai database yang sama: setiap penulisan
+    dilakukan sambil memegang kunci() dan memperbarui stempel versi (lihat
+    KunciBerkas). Sebelum menulis, KasKelas memanggil perubahan_luar() untuk
+    mengambil perubahan dari proses lain.
+    
+    Subclass wajib mengisi ada, muat, simpan dan catat; backend yang belum
+    lengkap sudah gagal saat dibuat (TypeError), bukan di tengah penyimpanan.
+    
+    Atribut:
+        lokasi: Path file database yang ditampilkan ke user
+        mendukung_query: True jika laporan bisa diambil langsung lewat query
+        memakai_jurnal: True jika perubahan ditulis ke jurnal dan perlu checkpoint
+    """
+    lokasi = ''
+    mendukung_query = False
+    memakai_jurnal = False
+    _kunci = None
+    _stempel = None
+    
+    def kunci(self):
+        """
+        Kunci antar-proses untuk database ini (dipakai dengan 'with').
+        
+        Returns:
+            KunciBerkas: Kunci di file <lokasi>.lock
+        """
+        if self._kunci is None:
+            self._kunci = KunciBerkas(self.lokasi + '.lock')
+        return self._kunci
+    
+    def tandai_sinkron(self):
+        """Mencatat stempel versi saat ini sebagai versi data di memori (setelah dimuat)"""
+        with self.kunci() as kunci:
+            self._stempel = kunci.baca()
+    
+    def _perbarui_stempel(self, generasi, snapshot_baru=False):
+        """Helper: Catat penulisan oleh proses ini di stempel versi"""
+        with self.kunci() as kunci:
+            stempel = kunci.baca()
+            stempel['generasi'] = generasi
+            if snapshot_baru:
+                stempel['snapshot'] += 1
+            kunci.tulis(stempel)
+        self._stempel = stempel
+    
+    def perubahan_luar(self):
+        """
+        Mengambil perubahan yang ditulis proses lain sejak data dimuat.
+        
+        Harus dipanggil sambil memegang kunci(). Jika stempel versi tidak
+        berubah, tidak ada file database yang dibaca.
+        
+        Returns:
+            list: Record perubahan dari proses lain (kosong jika tidak ada),
+                  atau None jika data harus dimuat ulang (misal snapshot
+                  sudah ditulis ulang proses lain)
+        """
+        if self._stempel is None:
+            return []
+        stempel = self.kunci().baca()
+        if stempel == self._stempel:
+            return []
+        if stempel['snapshot'] != self._stempel['snapshot']:
+            return None
+        records = self._jurnal_baru()
+        if records is not None:
+            self._stempel = stempel
+        return records
+    
+    def _jurnal_baru(self):
+        """Helper: Record jurnal yang belum dibaca, None jika tidak didukung"""
+        return None
+    
+    @abstractmethod
+    def ada(self):
+        """Mengecek apakah database sudah ada."""
+    
+    @abstractmethod
+    def muat(self):
+        """
+        Membaca snapshot data.
+        
+        Returns:
+            dict: {'data_siswa': [...], 'pengeluaran_umum': [...], 'jurnal_seq': int}
+        """
+    
+    def baca_jurnal(self):
+        """Menghasilkan record perubahan yang belum masuk snapshot (jika ada)."""
+        return iter(())
+    
+    @abstractmethod
+    def simpan(self, data):
+        """Menulis ulang seluruh data (snapshot lengkap)."""
+    
+    @abstractmethod
+    def catat(self, record):
+        """Menyimpan satu record perubahan (lihat KasKelas.terapkan_record)."""
+    
+    def catat_batch(self, records):
+        """Menyimpan beberapa record perubahan sekaligus (satu kali tulis)."""
+        for record in records:
+            self.catat(record)
+    
+    def perlu_kompaksi(self):
+        """Mengecek apakah ada perubahan yang sebaiknya digabung ke snapshot."""
+        return False
+    
+    def info_jurnal(self):
+        """
+        Mengambil ukuran jurnal yang belum digabung ke snapshot.
+        
+        Returns:
+            tuple: (jumlah record, ukuran file dalam byte)
+        """
+        return 0, 0
+    
+    def cadangkan(self):
+        """
+        Menyalin database apa adanya sebelum ditimpa (misal karena rusak).
+        
+        Returns:
+            str: Path salinan, atau None jika tidak didukung
+        """
+        return None
+
+
+class PenyimpananJSON(Penyimpanan):
+    """
+    Penyimpanan berbasis file JSON (snapshot) ditambah file jurnal append-only.
+    
+    Setiap perubahan ditulis sebagai satu baris JSON di file jurnal, dan
+    snapshot lengkap hanya ditulis ulang saat kompaksi.
+    
+    Snapshot dibaca bertahap (lihat PembacaJSONBertahap): yang ditahan di
+    memori hanya nama, saldo, jumlah transaksi dan posisi byte data setiap
+    siswa. Riwayat transaksi dibaca dari posisi tersebut saat dibutuhkan,
+    lewat file snapshot yang tetap dibuka, sehingga snapshot baru yang
+    ditulis proses lain tidak mengacaukan posisi byte tersebut.
+    
+    Posisi byte jurnal yang sudah dibaca juga dicatat, jadi perubahan dari
+    proses lain cukup dibaca dari ujung jurnal (lihat perubahan_luar).
+    
+    Atribut:
+        lokasi: Path file snapshot JSON
+        journal_file: Path file jurnal (.journal)
+    """
+    
+    memakai_jurnal = True
+    
+    def __init__(self, filename):
+        self.lokasi = filename
+        self.journal_file = os.path.splitext(filename)[0] + '.journal'
+        self._jumlah_jurnal = None
+        self._posisi_jurnal = None
+        self._berkas = None
+    
+    def ada(self):
+        return os.path.exists(self.lokasi)
+    
+    def muat(self):
+        """
+        Raises:
+            DataRusak: Jika file rusak; data valid sebelum posisi kerusakan
+                       tersedia di atribut 'sebagian'
+        """
+        hasil = {'data_siswa': [], 'pengeluaran_umum': [], 'jurnal_seq': 0}
+        # File tidak ditutup: riwayat dibaca belakangan dari file yang sama
+        self._tutup()
+        self._buka()
+        try:
+            self._baca_bertahap(PembacaJSONBertahap(self._berkas), hasil)
+        except DataRusak as e:
+            e.sebagian = hasil
+            raise
+        return hasil
+    
+    def _buka(self):
+        """Helper: Buka file snapshot untuk pembacaan riwayat"""
+        self._berkas = open(self.lokasi, 'rb')
+    
+    def _tutup(self):
+        """Helper: Tutup file snapshot yang sedang dibuka (jika ada)"""
+        if self._berkas is not None:
+            self._berkas.close()
+            self._berkas = None
+    
+    def _baca_bertahap(self, pembaca, hasil):
+        """Helper: Telusuri snapshot; data_siswa dan pengeluaran_umum dibaca per record"""
+        pembaca.ambil('{')
+        if pembaca.intip() == '}':
+            return
+        
+        while True:
+            pembaca.intip()
+            awal = pembaca.posisi()
+            kunci = pembaca.nilai()
+            if not isinstance(kunci, str):
+                raise DataRusak(awal, "nama key harus berupa string")
+            pembaca.ambil(':')
+            
+            if kunci == 'data_siswa':
+                for awal, siswa, akhir in pembaca.elemen_list():
+                    try:
+                        transaksi = siswa['transaksi']
+                        hasil['data_siswa'].append({
+                            "nama": siswa['nama'],
+                            "transaksi": RiwayatMalas(self._pemuat(awal, akhir, 'transaksi'),
+                                                      len(transaksi), total_jumlah(transaksi)),
+                            "saldo": siswa['saldo']
+                        })
+                    except (KeyError, TypeError):
+                        raise DataRusak(awal, "data siswa tidak lengkap") from None
+            
+            elif kunci == 'pengeluaran_umum':
+                pembaca.intip()
+                awal = akhir = pembaca.posisi() + 1
+                jumlah = total = 0
+                try:
+                    for posisi, p, akhir in pembaca.elemen_list():
+                        try:
+                            total += p['jumlah']
+                        except (KeyError, TypeError):
+                            raise DataRusak(posisi, "data pengeluaran tidak lengkap") from None
+                        jumlah += 1
+                finally:
+                    # Jika rusak di tengah list, pengeluaran sebelumnya tetap bisa dibaca
+                    hasil['pengeluaran_umum'] = RiwayatMalas(
+                        self._pemuat(awal - 1, akhir, penutup=b']'), jumlah, total
+                    )
+            
+            elif kunci == 'jurnal_seq':
+                hasil['jurnal_seq'] = pembaca.nilai()
+            else:
+                pembaca.nilai()
+            
+            if pembaca.ambil(',}') == '}':
+                return
+    
+    def _pemuat(self, awal, akhir, kunci=None, penutup=b''):
+        """
+        Helper: Fungsi pembaca satu potongan snapshot untuk RiwayatMalas.
+        
+        Potongan dibaca dari file snapshot yang sedang terbuka, bukan dari
+        path-nya, jadi tetap benar walau proses lain sudah mengganti file.
+        File diambil saat membaca (seperti PenyimpananBiner), agar pemuat
+        tetap bisa dipakai setelah snapshot yang sama dibuka ulang.
+        
+        Args:
+            awal, akhir (int): Posisi byte potongan di file
+            kunci (str): Ambil key ini dari objek hasil parse (opsional)
+            penutup (bytes): Teks yang ditambahkan sebelum di-parse
+        """
+        def baca():
+            berkas = self._berkas
+            berkas.seek(awal)
+            isi = json.loads(berkas.read(akhir - awal) + penutup)
+            PENGUKUR.hitung('byte_dibaca', akhir - awal)
+            return isi[kunci] if kunci else isi
+        return baca
+    
+    def baca_jurnal(self):
+        """
+        Membaca record dari file jurnal satu per satu.
+        
+        Baris terakhir yang terpotong (misal listrik mati saat menulis)
+        menghentikan pembacaan dengan peringatan. Posisi akhir baris valid
+        terakhir dicatat untuk perubahan_luar dan catat_batch.
+        """
+        self._jumlah_jurnal = 0
+        self._posisi_jurnal = 0
+        yield from self._baca_jurnal_dari(0)
+    
+    def _baca_jurnal_dari(self, posisi):
+        """Helper: Record jurnal mulai dari posisi byte tertentu"""
+        if not os.path.exists(self.journal_file):
+            return
+        
+        with open(self.journal_file, 'rb') as f:
+            f.seek(posisi)
+            for nomor_baris, baris in enumerate(f, 1):
+                if baris.strip():
+                    try:
+                        if not baris.endswith(b'\n'):
+                            raise ValueError("baris terpotong")
+                        record = json.loads(baris)
+                    except ValueError:
+                        print(f"{Colors.YELLOW}⚠ Jurnal rusak di baris {nomor_baris}, sisa jurnal diabaikan{Colors.END}")
+                        return
+                    self._jumlah_jurnal += 1
+                    yield record
+                self._posisi_jurnal += len(baris)
+    
+    def _jurnal_baru(self):
+        if self._posisi_jurnal is None:
+            return None
+        if os.path.exists(self.journal_file) and os.path.getsize(self.journal_file) < self._posisi_jurnal:
+            return None
+        return list(self._baca_jurnal_dari(self._posisi_jurnal))
+    
+    def simpan(self, data):
+        """
+        Menulis snapshot ke file sementara per record, lalu mengganti file lama.
+        
+        Hasilnya sama dengan json.dump(data, indent=2), tetapi riwayat yang
+        belum dibuka dibaca satu per satu dari file lama sehingga tidak
+        semuanya berada di memori sekaligus.
+        """
+        sementara = self.lokasi + '.tmp'
+        posisi_baru = []
+        offset = 0
+        
+        # Posisi riwayat di file baru; pemuatnya dibuat setelah file baru dibuka
+        def pemuat_baru(riwayat, *posisi):
+            posisi_baru.append((riwayat, posisi))
+        
+        with open(sementara, 'wb') as f:
+            def tulis(teks):
+                nonlocal offset
+                isi = teks.encode('utf-8')
+                f.write(isi)
+                offset += len(isi)
+            
+            def tulis_elemen(i, elemen):
+                tulis(',\n    ' if i else '\n    ')
+                tulis(json.dumps(elemen, indent=2, ensure_ascii=False).replace('\n', '\n    '))
+            
+            for i, (kunci, nilai) in enumerate(data.items()):
+                tulis((',\n  ' if i else '{\n  ') + json.dumps(kunci) + ': ')
+                
+                if kunci == 'data_siswa' and nilai:
+                    tulis('[')
+                    for j, siswa in enumerate(nilai):
+                        riwayat = siswa['transaksi']
+                        malas = isinstance(riwayat, RiwayatMalas)
+                        awal = offset + (6 if j else 5)
+                        tulis_elemen(j, dict(siswa, transaksi=riwayat.baca() if malas else riwayat))
+                        if malas:
+                            pemuat_baru(riwayat, awal, offset, 'transaksi')
+                    tulis('\n  ]')
+                
+                elif kunci == 'pengeluaran_umum' and nilai:
+                    malas = isinstance(nilai, RiwayatMalas)
+                    awal = offset
+                    tulis('[')
+                    for j, p in enumerate(nilai.baca() if malas else nilai):
+                        tulis_elemen(j, p)
+                    tulis('\n  ]')
+                    if malas:
+                        pemuat_baru(nilai, awal, offset)
+                
+                else:
+                    tulis(json.dumps(list(nilai) if isinstance(nilai, RiwayatMalas) else nilai,
+                                     indent=2, ensure_ascii=False).replace('\n', '\n  '))
+            tulis('\n}' if data else '{}')
+            f.flush()
+            os.fsync(f.fileno())
+        
+        PENGUKUR.hitung('byte_ditulis', offset)
+        self._ganti_snapshot(sementara, posisi_baru, data.get('jurnal_seq', 0))
+    
+    def _ganti_snapshot(self, sementara, posisi_baru, jurnal_seq):
+        """
+        Helper: Pasang snapshot baru yang sudah lengkap di file sementara.
+        
+        Jika file lama tidak bisa diganti, file sementara dihapus, snapshot
+        lama dibuka kembali dan OSError diteruskan ke pemanggil.
+        
+        Args:
+            sementara (str): Path file snapshot baru
+            posisi_baru (list): Tuple (riwayat, argumen _pemuat) untuk riwayat
+                                yang belum dibuka
+            jurnal_seq (int): Nomor urut record terakhir di snapshot
+        """
+        # File lama ditutup dulu (di Windows file yang terbuka tidak bisa diganti)
+        self._tutup()
+        try:
+            os.replace(sementara, self.lokasi)
+        except OSError:
+            # Misal file sedang dibuka bendahara lain: snapshot lama tetap
+            # dipakai, jadi dibuka lagi untuk riwayat yang belum dibaca
+            self._buka()
+            try:
+                os.remove(sementara)
+            except OSError:
+                pass
+            raise
+        self._buka()
+        
+        # Riwayat yang belum dibuka sekarang dibaca dari posisinya di file baru
+        for riwayat, posisi in posisi_baru:
+            riwayat.ganti_pemuat(self._pemuat(*posisi))
+        
+        # Snapshot sudah berisi semua perubahan, jurnal bisa dikosongkan
+        if os.path.exists(self.journal_file):
+            open(self.journal_file, 'w').close()
+        self._jumlah_jurnal = 0
+        self._posisi_jurnal = 0
+        self._perbarui_stempel(jurnal_seq, snapshot_baru=True)
+    
+    def catat(self, record):
+        self.catat_batch([record])
+    
+    def catat_batch(self, records):
+        baris = ''.join(json.dumps(record, ensure_ascii=False) + '\n' for record in records).encode('utf-8')
+        with self.kunci(), open(self.journal_file, 'ab') as f:
+            # Sisa baris rusak/terpotong di ujung jurnal (yang sudah diabaikan
+            # saat dibaca) dibuang, agar record baru tidak ikut terabaikan.
+            # Hanya jika tidak ada proses lain yang menulis sejak jurnal dibaca.
+            if (self._posisi_jurnal is not None and f.tell() != self._posisi_jurnal
+                    and self._stempel == self.kunci().baca()):
+                f.truncate(self._posisi_jurnal)
+            f.write(baris)
+            f.flush()
+            os.fsync(f.fileno())
+            if self._posisi_jurnal is not None:
+                self._posisi_jurnal = f.tell()
+            self._perbarui_stempel(records[-1]['seq'])
+        PENGUKUR.hitung('byte_ditulis', len(baris))
+        if self._jumlah_jurnal is not None:
+            self._jumlah_jurnal += len(records)
+    
+    def perlu_kompaksi(self):
+        return os.path.exists(self.journal_file) and os.path.getsize(self.journal_file) > 0
+    
+    def info_jurnal(self):
+        if not os.path.exists(self.journal_file):
+            return 0, 0
+        if self._jumlah_jurnal is None:
+            with open(self.journal_file, 'rb') as f:
+                self._jumlah_jurnal = sum(1 for baris in f if baris.strip())
+        return self._jumlah_jurnal, os.path.getsize(self.journal_file)
+    
+    def cadangkan(self):
+        cadangan = self.lokasi + '.rusak'
+        shutil.copy2(self.lokasi, cadangan)
+        if os.path.exists(self.journal_file):
+            shutil.copy2(self.journal_file, self.journal_file + '.rusak')
+        return cadangan
+
+
+class PenyimpananBiner(PenyimpananJSON):
+    """
+    Penyimpanan file biner ringkas (.kalc) yang dibaca lewat mmap.
+    
+    Setiap transaksi disimpan sebagai record berukuran tetap 32 byte, dan
+    semua teks (nama, keterangan) disimpan sekali saja di tabel string,
+    sehingga file jauh lebih kecil dari JSON ber-indent dan record ke-N
+    bisa langsung dibaca tanpa mem-parse isi file lainnya.
+    
+    Struktur file (little-endian):
+        header  : magic b'KALC', versi, jurnal_seq, jumlah dan posisi bagian
+                  lain, ringkasan pengeluaran (lihat HEADER)
+        siswa   : per siswa id nama, saldo, record awal, jumlah dan total
+                  transaksi (lihat SISWA)
+        record  : ts, id siswa (TANPA_ID = pengeluaran), jenis, jumlah,
+                  id keterangan, id tanggal (lihat RECORD); record setiap
+                  siswa berurutan, pengeluaran umum di bagian akhir
+        string  : posisi awal setiap string (uint64), lalu isi UTF-8-nya
+    
+    Tanggal biasanya tidak disimpan karena bisa dibentuk ulang dari ts
+    (lihat tanggal_dari_ts); hanya tanggal berformat lain yang masuk tabel
+    string. Perubahan tetap ditulis ke jurnal JSON Lines seperti
+    PenyimpananJSON, dan snapshot biner ditulis ulang saat checkpoint.
+    
+    Atribut:
+        lokasi: Path file .kalc
+        journal_file: Path file jurnal (<lokasi>.journal)
+        jumlah_record: Jumlah record transaksi di snapshot
+    """
+    MAGIC = b'KALC'
+    VERSI = 1
+    HEADER = struct.Struct('<4sHHQIIQQQQQqI4x')
+    KOLOM_HEADER = ('magic', 'versi', 'cadangan', 'jurnal_seq', 'jumlah_siswa', 'jumlah_string',
+                    'jumlah_record', 'posisi_siswa', 'posisi_record', 'posisi_string',
+                    'jumlah_pengeluaran', 'total_pengeluaran', 'id_update')
+    SISWA = struct.Struct('<IqQIq')
+    RECORD = struct.Struct('<qIB3xqII')
+    TANPA_ID = 0xFFFFFFFF
+    JENIS = ('keluar', 'setor')
+    
+    def __init__(self, filename):
+        super().__init__(filename)
+        self.journal_file = filename + '.journal'
+        self.jumlah_record = 0
+        self._mm = None
+        self._header = None
+        self._cache_teks = {}
+    
+    def _buka(self):
+        super()._buka()
+        # mmap menolak file kosong, jadi ukuran dicek sebelum dipetakan
+        ukuran = os.fstat(self._berkas.fileno()).st_size
+        if ukuran < self.HEADER.size:
+            raise DataRusak(ukuran, "file biner terpotong")
+        self._mm = mmap.mmap(self._berkas.fileno(), 0, access=mmap.ACCESS_READ)
+        self._cache_teks = {}
+        self._header = dict(zip(self.KOLOM_HEADER, self.HEADER.unpack_from(self._mm, 0)))
+        if self._header['magic'] != self.MAGIC:
+            raise DataRusak(0, "bukan file KALCer biner")
+        if self._header['versi'] != self.VERSI:
+            raise DataRusak(4, f"versi file biner {self._header['versi']} tidak dikenal")
+        self.jumlah_record = self._header['jumlah_record']
+        if self._header['posisi_string'] + 8 * (self._header['jumlah_string'] + 1) > len(self._mm):
+            raise DataRusak(len(self._mm), "file biner terpotong")
+    
+    def _tutup(self):
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+        super()._tutup()
+    
+    def muat(self):
+        """
+        Raises:
+            DataRusak: Jika file bukan file biner KALCer atau terpotong
+        """
+        self._tutup()
+        self._buka()
+        header = self._header
+        
+        data_siswa = []
+        for i in range(header['jumlah_siswa']):
+            id_nama, saldo, awal, jumlah, total = self.SISWA.unpack_from(
+                self._mm, header['posisi_siswa'] + i * self.SISWA.size)
+            data_siswa.append({
+                "nama": self.teks(id_nama),
+                "transaksi": RiwayatMalas(self._pemuat(awal, awal + jumlah), jumlah, total),
+                "saldo": saldo
+            })
+        awal = self.jumlah_record - header['jumlah_pengeluaran']
+        return {
+            'data_siswa': data_siswa,
+            'pengeluaran_umum': RiwayatMalas(self._pemuat(awal, self.jumlah_record),
+                                             header['jumlah_pengeluaran'], header['total_pengeluaran']),
+            'jurnal_seq': header['jurnal_seq']
+        }
+    
+    def teks(self, id_teks):
+        """
+        Membaca satu string dari tabel string.
+        
+        Args:
+            id_teks (int): Nomor string
+        
+        Returns:
+            str: Isi string (None untuk TANPA_ID)
+        """
+        if id_teks == self.TANPA_ID:
+            return None
+        hasil = self._cache_teks.get(id_teks)
+        if hasil is None:
+            posisi_string, jumlah_string = self._header['posisi_string'], self._header['jumlah_string']
+            awal, akhir = struct.unpack_from('<QQ', self._mm, posisi_string + 8 * id_teks)
+            isi = posisi_string + 8 * (jumlah_string + 1)
+            hasil = self._cache_teks[id_teks] = self._mm[isi + awal:isi + akhir].decode('utf-8')
+        return hasil
+    
+    def record(self, n):
+        """
+        Membaca record transaksi ke-n langsung dari posisinya di file.
+        
+        Args:
+            n (int): Nomor record (0-based)
+        
+        Returns:
+            dict: Transaksi seperti di riwayat, ditambah key 'siswa'
+                  (nama siswa, atau None untuk pengeluaran umum)
+        """
+        if not 0 <= n < self.jumlah_record:
+            raise IndexError(n)
+        nilai = self.RECORD.unpack_from(self._mm, self._header['posisi_record'] + n * self.RECORD.size)
+        id_siswa = nilai[1]
+        siswa = None
+        if id_siswa != self.TANPA_ID:
+            posisi = self._header['posisi_siswa'] + id_siswa * self.SISWA.size
+            siswa = self.teks(self.SISWA.unpack_from(self._mm, posisi)[0])
+        return dict(self._transaksi(nilai), siswa=siswa)
+    
+    def iter_record(self, awal, akhir):
+        """
+        Menghasilkan transaksi dari record awal sampai sebelum akhir.
+        
+        Hanya potongan file tersebut yang dibaca dari mmap.
+        
+        Yields:
+            dict: Transaksi seperti di riwayat
+        """
+        ukuran = self.RECORD.size
+        posisi = self._header['posisi_record']
+        potongan = self._mm[posisi + awal * ukuran:posisi + akhir * ukuran]
+        PENGUKUR.hitung('byte_dibaca', len(potongan))
+        for nilai in self.RECORD.iter_unpack(potongan):
+            yield self._transaksi(nilai)
+    
+    def _transaksi(self, nilai):
+        """Helper: Record yang sudah di-unpack → dict transaksi (urutan key sama dengan JSON)"""
+        ts, id_siswa, jenis, jumlah, id_keterangan, id_tanggal = nilai
+        tanggal = tanggal_dari_ts(ts) if id_tanggal == self.TANPA_ID else self.teks(id_tanggal)
+        if id_siswa == self.TANPA_ID:
+            return {"tanggal": tanggal, "keterangan": self.teks(id_keterangan), "jumlah": jumlah, "ts": ts}
+        transaksi = {"tanggal": tanggal, "jenis": self.JENIS[jenis], "jumlah": jumlah}
+        if id_keterangan != self.TANPA_ID:
+            transaksi["keterangan"] = self.teks(id_keterangan)
+        transaksi["ts"] = ts
+        return transaksi
+    
+    def _pemuat(self, awal, akhir):
+        """Helper: Fungsi pembaca riwayat (record awal..akhir) untuk RiwayatMalas"""
+        def baca():
+            return list(self.iter_record(awal, akhir))
+        return baca
+    
+    def simpan(self, data):
+        """
+        Menulis snapshot biner ke file sementara, lalu mengganti file lama.
+        
+        Riwayat yang belum dibuka dibaca satu per satu dari snapshot lama
+        (lihat isi_riwayat), jadi tidak semuanya berada di memori sekaligus.
+        """
+        sementara = self.lokasi + '.tmp'
+        id_teks = {}
+        posisi_baru = []
+        entri_siswa = []
+        nomor = 0
+        
+        def teks(nilai):
+            if nilai is None:
+                return self.TANPA_ID
+            if nilai not in id_teks:
+                id_teks[nilai] = len(id_teks)
+            return id_teks[nilai]
+        
+        def tulis_riwayat(f, riwayat, id_siswa):
+            nonlocal nomor
+            awal, total = nomor, 0
+            potongan = bytearray()
+            for t in isi_riwayat(riwayat):
+                jumlah = rupiah(t['jumlah'])
+                ts = t['ts']
+                tanggal = t['tanggal']
+                id_tanggal = self.TANPA_ID if tanggal == tanggal_dari_ts(ts) else teks(tanggal)
+                jenis = 0 if id_siswa == self.TANPA_ID else self.JENIS.index(t['jenis'])
+                potongan += self.RECORD.pack(ts, id_siswa, jenis, jumlah, teks(t.get('keterangan')), id_tanggal)
+                total += jumlah
+                nomor += 1
+            f.write(potongan)
+            if isinstance(riwayat, RiwayatMalas):
+                posisi_baru.append((riwayat, (awal, nomor)))
+            return awal, nomor - awal, total
+        
+        siswa_list = data['data_siswa']
+        posisi_siswa = self.HEADER.size
+        posisi_record = posisi_siswa + len(siswa_list) * self.SISWA.size
+        with open(sementara, 'wb') as f:
+            f.write(bytes(posisi_record))
+            for i, siswa in enumerate(siswa_list):
+                awal, jumlah, total = tulis_riwayat(f, siswa['transaksi'], i)
+                entri_siswa.append(self.SISWA.pack(teks(siswa['nama']), rupiah(siswa['saldo']), awal, jumlah, total))
+            _, jumlah_pengeluaran, total_pengeluaran = tulis_riwayat(f, data['pengeluaran_umum'], self.TANPA_ID)
+            id_update = teks(data.get('terakhir_update'))
+            
+            # Tabel string: posisi awal tiap string lalu isinya
+            posisi_string = f.tell()
+            isi = [nilai.encode('utf-8') for nilai in id_teks]
+            posisi = [0]
+            for b in isi:
+                posisi.append(posisi[-1] + len(b))
+            f.write(struct.pack(f'<{len(posisi)}Q', *posisi))
+            f.write(b''.join(isi))
+            ukuran = f.tell()
+            
+            f.seek(0)
+            f.write(self.HEADER.pack(self.MAGIC, self.VERSI, 0, data.get('jurnal_seq', 0), len(siswa_list),
+                                     len(id_teks), nomor, posisi_siswa, posisi_record, posisi_string,
+                                     jumlah_pengeluaran, total_pengeluaran, id_update))
+            f.write(b''.join(entri_siswa))
+            f.flush()
+            os.fsync(f.fileno())
+        
+        PENGUKUR.hitung('byte_ditulis', ukuran)
+        self._ganti_snapshot(sementara, posisi_baru, data.get('jurnal_seq', 0))
+
+
+class PenyimpananSQLite(Penyimpanan):
+    """
+    Penyimpanan berbasis database SQLite (modul standar sqlite3).
+    
+    Skema:
+        siswa       : id, nama (unik, case-insensitive), saldo
+        setoran     : id, siswa_id, tanggal, jenis, jumlah, keterangan, ts
+        pengeluaran : id, tanggal, keterangan, jumlah, ts
+        meta        : kunci, nilai (jurnal_seq, terakhir_update)
+    
+    Setiap perubahan langsung dieksekusi sebagai satu transaksi SQL, dan
+    laporan per siswa / semua transaksi diambil lewat query ber-index.
+    
+    Atribut:
+        lokasi: Path file database (.db)
+        conn: Koneksi sqlite3 yang terbuka
+    """
+    mendukung_query = True
+    
+    SKEMA = """
+        CREATE TABLE IF NOT EXISTS siswa (
+            id INTEGER PRIMARY KEY,
+            nama TEXT NOT NULL UNIQUE COLLATE NOCASE,
+            saldo INTEGER NOT NULL DEFAULT 0
+        );
+        CREATE TABLE IF NOT EXISTS setoran (
+            id INTEGER PRIMARY KEY,
+            siswa_id INTEGER NOT NULL REFERENCES siswa(id) ON DELETE CASCADE,
+            tanggal TEXT NOT NULL,
+            jenis TEXT NOT NULL,
+            jumlah INTEGER NOT NULL,
+            keterangan TEXT,
+            ts INTEGER
+        );
+        CREATE TABLE IF NOT EXISTS pengeluaran (
+            id INTEGER PRIMARY KEY,
+            tanggal TEXT NOT NULL,
+            keterangan TEXT,
+            jumlah INTEGER NOT NULL,
+            ts INTEGER
+        );
+        CREATE TABLE IF NOT EXISTS meta (
+            kunci TEXT PRIMARY KEY,
+            nilai TEXT
+        );
+        CREATE INDEX IF NOT EXISTS idx_setoran_siswa ON setoran(siswa_id, tanggal);
+        CREATE INDEX IF NOT EXISTS idx_setoran_tanggal ON setoran(tanggal);
+        CREATE INDEX IF NOT EXISTS idx_pengeluaran_tanggal ON pengeluaran(tanggal);
+    """
+    
+    def __init__(self, filename):
+        self.lokasi = filename
+        self._sudah_ada = os.path.exists(filename)
+        self.conn = sqlite3.connect(filename)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA foreign_keys = ON")
+        self.conn.executescript(self.SKEMA)
+        self._tambah_kolom_ts()
+    
+    def _tambah_kolom_ts(self):
+        """Helper: Tambahkan kolom ts ke database lama dan isi dari kolom tanggal"""
+        for tabel in ('setoran', 'pengeluaran'):
+            kolom = [row['name'] for row in self.conn.execute(f"PRAGMA table_info({tabel})")]
+            if 'ts' not in kolom:
+                with self.conn:
+                    self.conn.execute(f"ALTER TABLE {tabel} ADD COLUMN ts INTEGER")
+                    self.conn.execute(f"UPDATE {tabel} SET ts = CAST(strftime('%s', tanggal) AS INTEGER)")
+    
+    def ada(self):
+        return self._sudah_ada
+    
+    def muat(self):
+        data_siswa = []
+        per_id = {}
+        for row in self.conn.execute("SELECT id, nama, saldo FROM siswa ORDER BY nama COLLATE BINARY"):
+            siswa = {"nama": row['nama'], "transaksi": [], "saldo": row['saldo']}
+            per_id[row['id']] = siswa
+            data_siswa.append(siswa)
+        
+        for row in self.conn.execute("SELECT siswa_id, tanggal, jenis, jumlah, keterangan, ts FROM setoran ORDER BY tanggal, id"):
+            per_id[row['siswa_id']]['transaksi'].append({
+                "tanggal": row['tanggal'],
+                "jenis": row['jenis'],
+                "jumlah": row['jumlah'],
+                "keterangan": row['keterangan'],
+                "ts": row['ts']
+            })
+        
+        pengeluaran_umum = [
+            {"tanggal": row['tanggal'], "keterangan": row['keterangan'], "jumlah": row['jumlah'], "ts": row['ts']}
+            for row in self.conn.execute("SELECT tanggal, keterangan, jumlah, ts FROM pengeluaran ORDER BY tanggal, id")
+        ]
+        
+        row = self.conn.execute("SELECT nilai FROM meta WHERE kunci = 'jurnal_seq'").fetchone()
+        return {
+            'data_siswa': data_siswa,
+            'pengeluaran_umum': pengeluaran_umum,
+            'jurnal_seq': int(row['nilai']) if row else 0
+        }
+    
+    def simpan(self, data):
+        with self.conn:
+            self.conn.execute("DELETE FROM setoran")
+            self.conn.execute("DELETE FROM pengeluaran")
+            self.conn.execute("DELETE FROM siswa")
+            for siswa in data['data_siswa']:
+                cur = self.conn.execute(
+                    "INSERT INTO siswa (nama, saldo) VALUES (?, ?)", (siswa['nama'], siswa['saldo'])
+                )
+                self.conn.executemany(
+                    "INSERT INTO setoran (siswa_id, tanggal, jenis, jumlah, keterangan, ts) VALUES (?, ?, ?, ?, ?, ?)",
+                    [(cur.lastrowid, t['tanggal'], t['jenis'], t['jumlah'], t.get('keterangan'), t['ts'])
+                     for t in siswa['transaksi']]
+                )
+            self.conn.executemany(
+                "INSERT INTO pengeluaran (tanggal, keterangan, jumlah, ts) VALUES (?, ?, ?, ?)",
+                [(p['tanggal'], p['keterangan'], p['jumlah'], p['ts']) for p in data['pengeluaran_umum']]
+            )
+            self._tulis_meta(data['jurnal_seq'])
+        self._sudah_ada = True
+        self._perbarui_stempel(data['jurnal_seq'], snapshot_baru=True)
+    
+    def catat(self, record):
+        self.catat_batch([record])
+    
+    def catat_batch(self, records):
+        with self.conn:
+            for record in records:
+                self._eksekusi(record)
+            self._tulis_meta(records[-1]['seq'])
+        self._sudah_ada = True
+        self._perbarui_stempel(records[-1]['seq'])
+    
+    def _eksekusi(self, record):
+        """Helper: Terjemahkan satu record perubahan menjadi perintah SQL"""
+        op = record['op']
+        if op == 'setor':
+            t = record['transaksi']
+            siswa_id = self._id_siswa(record['nama'])
+            self.conn.execute(
+                "INSERT INTO setoran (siswa_id, tanggal, jenis, jumlah, keterangan, ts) VALUES (?, ?, ?, ?, ?, ?)",
+                (siswa_id, t['tanggal'], t['jenis'], t['jumlah'], t.get('keterangan'), t['ts'])
+            )
+            self.conn.execute("UPDATE siswa SET saldo = saldo + ? WHERE id = ?", (t['jumlah'], siswa_id))
+        elif op == 'keluar':
+            p = record['pengeluaran']
+            self.conn.execute(
+                "INSERT INTO pengeluaran (tanggal, keterangan, jumlah, ts) VALUES (?, ?, ?, ?)",
+                (p['tanggal'], p['keterangan'], p['jumlah'], p['ts'])
+            )
+        elif op == 'tambah_siswa':
+            self.conn.execute("INSERT INTO siswa (nama) VALUES (?)", (record['nama'],))
+        elif op == 'ubah_nama':
+            self.conn.execute("UPDATE siswa SET nama = ? WHERE id = ?", (record['baru'], self._id_siswa(record['lama'])))
+        elif op == 'hapus_siswa':
+            self.conn.execute("DELETE FROM siswa WHERE id = ?", (self._id_siswa(record['nama']),))
+        elif op == 'reset_siswa':
+            siswa_id = self._id_siswa(record['nama'])
+            self.conn.execute("DELETE FROM setoran WHERE siswa_id = ?", (siswa_id,))
+            self.conn.execute("UPDATE siswa SET saldo = 0 WHERE id = ?", (siswa_id,))
+        elif op == 'reset_semua':
+            self.conn.execute("DELETE FROM setoran")
+            self.conn.execute("DELETE FROM pengeluaran")
+            self.conn.execute("UPDATE siswa SET saldo = 0")
+        else:
+            raise ValueError(f"jenis record tidak dikenal: {op}")
+    
+    def _id_siswa(self, nama):
+        row = self.conn.execute("SELECT id FROM siswa WHERE nama = ?", (nama,)).fetchone()
+        if row is None:
+            raise KeyError(nama)
+        return row['id']
+    
+    def _tulis_meta(self, jurnal_seq):
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO meta (kunci, nilai) VALUES (?, ?)",
+            [('jurnal_seq', str(jurnal_seq)),
+             ('terakhir_update', datetime.now().strftime('%Y-%m-%d %H:%M:%S'))]
+        )
+    
+    # ----- Query untuk laporan -----
+    
+    def riwayat_siswa(self, nama):
+        """
+        Mengambil riwayat transaksi satu siswa lewat index idx_setoran_siswa.
+        
+        Args:
+            nama (str): Nama siswa
+        
+        Returns:
+            list: List dict transaksi (urut sesuai waktu dicatat)
+        """
+        return [
+            {"tanggal": row['tanggal'], "jenis": row['jenis'], "jumlah": rupiah(row['jumlah']),
+             "keterangan": row['keterangan'], "ts": row['ts']}
+            for row in self.conn.execute(
+                "SELECT s.tanggal, s.jenis, s.jumlah, s.keterangan, s.ts FROM setoran s "
+                "WHERE s.siswa_id = (SELECT id FROM siswa WHERE nama = ?) ORDER BY s.tanggal, s.id",
+                (nama,)
+            )
+        ]
+    
+    def semua_transaksi(self, lewati=0, batas=-1):
+        """
+        Mengambil semua pemasukan dan pengeluaran, urut berdasarkan tanggal.
+        
+        Pada tanggal yang sama setoran lebih dulu (lalu urut id), sehingga
+        urutannya tetap dan bisa diambil per halaman.
+        
+        Args:
+            lewati (int): Jumlah baris awal yang dilewati
+            batas (int): Jumlah baris maksimal (-1 = semua)
+        
+        Yields:
+            dict: {'tanggal', 'ts', 'nama', 'jumlah', 'keterangan', 'is_income'}
+        """
+        query = (
+            "SELECT st.tanggal AS tanggal, st.ts AS ts, sw.nama AS nama, st.jumlah AS jumlah, "
+            "       st.keterangan AS keterangan, 1 AS is_income, st.id AS id "
+            "FROM setoran st JOIN siswa sw ON sw.id = st.siswa_id "
+            "UNION ALL "
+            "SELECT tanggal, ts, 'KAS UMUM', jumlah, keterangan, 0, id FROM pengeluaran "
+            "ORDER BY tanggal, is_income DESC, id "
+            "LIMIT ? OFFSET ?"
+        )
+        for row in self.conn.execute(query, (batas, lewati)):
+            yield {
+                'tanggal': row['tanggal'],
+                'ts': row['ts'],
+                'nama': row['nama'],
+                'jumlah': rupiah(row['jumlah']),
+                'keterangan': row['keterangan'] or 'Setoran Tunai',
+                'is_income': bool(row['is_income'])
+            }
+    
+    def jumlah_semua_transaksi(self):
+        """
+        Returns:
+            int: Jumlah setoran ditambah jumlah pengeluaran
+        """
+        return self.conn.execute(
+            "SELECT (SELECT COUNT(*) FROM setoran) + (SELECT COUNT(*) FROM pengeluaran)"
+        ).fetchone()[0]
+    
+    def posisi_transaksi(self, ts):
+        """
+        Menghitung posisi transaksi pertama pada/sesudah waktu tertentu di
+        urutan semua_transaksi, lewat index tanggal.
+        
+        Args:
+            ts (int): Timestamp
+        
+        Returns:
+            int: Jumlah transaksi sebelum ts
+        """
+        tanggal = tanggal_dari_ts(ts)
+        return self.conn.execute(
+            "SELECT (SELECT COUNT(*) FROM setoran WHERE tanggal < ?) + "
+            "       (SELECT COUNT(*) FROM pengeluaran WHERE tanggal < ?)",
+            (tanggal, tanggal)
+        ).fetchone()[0]
+
+
+class PenyimpananShard(Penyimpanan):
+    """
+    Penyimpanan terpecah: roster kecil ditambah satu file riwayat per siswa.
+    
+    Struktur folder:
+        roster.json       : nama, saldo dan jumlah transaksi tiap siswa,
+                            ringkasan pengeluaran, jurnal_seq
+        siswa/<id>.jsonl  : riwayat setoran satu siswa (satu baris per transaksi)
+        pengeluaran.jsonl : riwayat pengeluaran umum
+    
+    Saat program dibuka hanya roster yang dibaca; riwayat transaksi baru
+    dibaca dari shard-nya saat pertama kali dibutuhkan (lihat RiwayatMalas).
+    Setiap perubahan menambah baris di shard yang bersangkutan lalu menulis
+    ulang roster, sehingga biayanya sebanding dengan jumlah siswa, bukan
+    dengan jumlah seluruh transaksi.
+    
+    Atribut:
+        lokasi: Path folder shard
+        roster_file: Path file roster.json
+    """
+    
+    def __init__(self, folder):
+        self.lokasi = folder
+        self.roster_file = os.path.join(folder, 'roster.json')
+        self.folder_siswa = os.path.join(folder, 'siswa')
+        self.pengeluaran_file = os.path.join(folder, 'pengeluaran.jsonl')
+        self._roster = {}
+        self._pengeluaran = {'jumlah_transaksi': 0, 'total': 0}
+        self._id_berikut = 1
+        self._jurnal_seq = 0
+    
+    def ada(self):
+        return os.path.exists(self.roster_file)
+    
+    def muat(self):
+        with open(self.roster_file, 'r', encoding='utf-8') as f:
+            roster = json.load(f)
+        
+        self._roster = {entri['nama'].casefold(): entri for entri in roster['siswa']}
+        self._pengeluaran = roster['pengeluaran']
+        self._id_berikut = roster['id_berikut']
+        self._jurnal_seq = roster['jurnal_seq']
+        
+        data_siswa = [
+            {
+                "nama": entri['nama'],
+                "transaksi": RiwayatMalas(self._pemuat(self._path_siswa(entri['id']), entri['jumlah_transaksi']),
+                                          entri['jumlah_transaksi'], entri['saldo']),
+                "saldo": entri['saldo']
+            }
+            for entri in roster['siswa']
+        ]
+        pengeluaran_umum = RiwayatMalas(self._pemuat(self.pengeluaran_file, self._pengeluaran['jumlah_transaksi']),
+                                        self._pengeluaran['jumlah_transaksi'],
+                                        self._pengeluaran['total'])
+        return {
+            'data_siswa': data_siswa,
+            'pengeluaran_umum': pengeluaran_umum,
+            'jurnal_seq': self._jurnal_seq
+        }
+    
+    def simpan(self, data):
+        # Baca dulu semua riwayat (bisa jadi masih di shard lama) sebelum ditimpa
+        isi_siswa = [(siswa, list(siswa['transaksi'])) for siswa in data['data_siswa']]
+        pengeluaran = list(data['pengeluaran_umum'])
+        
+        os.makedirs(self.folder_siswa, exist_ok=True)
+        
+        # Siswa yang sudah ada tetap memakai id (dan file shard) yang sama
+        roster_lama = self._roster
+        self._roster = {}
+        ganti = []
+        for siswa, transaksi in isi_siswa:
+            entri = roster_lama.get(siswa['nama'].casefold()) or self._entri_baru(siswa['nama'])
+            entri.update(nama=siswa['nama'], saldo=siswa['saldo'], jumlah_transaksi=len(transaksi))
+            self._roster[siswa['nama'].casefold()] = entri
+            ganti.append((self._path_siswa(entri['id']), transaksi))
+        ganti.append((self.pengeluaran_file, pengeluaran))
+        
+        # Semua shard ditulis lengkap ke file sementara dulu, baru mengganti
+        # file lama; program yang berhenti di tengah tidak memotong riwayat
+        for path, daftar in ganti:
+            self._tulis_shard(path + '.tmp', daftar, 'w')
+        for path, _ in ganti:
+            os.replace(path + '.tmp', path)
+        
+        self._pengeluaran = {'jumlah_transaksi': len(pengeluaran), 'total': total_jumlah(pengeluaran)}
+        self._jurnal_seq = data['jurnal_seq']
+        self._tulis_roster()
+        
+        # Shard siswa yang sudah tidak ada baru dihapus sesudah roster baru tersimpan
+        dipakai = {f"{entri['id']}.jsonl" for entri in self._roster.values()}
+        for nama_file in os.listdir(self.folder_siswa):
+            if nama_file not in dipakai:
+                os.remove(os.path.join(self.folder_siswa, nama_file))
+        self._perbarui_stempel(data['jurnal_seq'], snapshot_baru=True)
+    
+    def catat(self, record):
+        self.catat_batch([record])
+    
+    def catat_batch(self, records):
+        # Transaksi baru dikumpulkan per shard, lalu tiap shard ditulis sekali
+        tambahan = {}
+        kosong = {}
+        for record in records:
+            self._eksekusi(record, tambahan, kosong)
+        
+        for path, daftar in tambahan.items():
+            if path not in kosong:
+                self._tulis_shard(path, daftar, 'a')
+        self._jurnal_seq = records[-1]['seq']
+        self._tulis_roster()
+        
+        # Shard yang direset/dihapus baru diganti sesudah roster baru tersimpan,
+        # jadi roster lama tidak pernah menunjuk ke riwayat yang sudah terpotong
+        for path, hapus in kosong.items():
+            self._kosongkan_shard(path, tambahan.get(path, []), hapus)
+        self._perbarui_stempel(records[-1]['seq'])
+    
+    def _eksekusi(self, record, tambahan, kosong):
+        """
+        Helper: Terapkan satu record perubahan ke roster dan antrean shard.
+        
+        Args:
+            record (dict): Record perubahan
+            tambahan (dict): Path shard → transaksi yang akan ditambahkan
+            kosong (dict): Path shard → True (dihapus) atau False (dikosongkan)
+                           yang baru dikerjakan sesudah roster ditulis
+        """
+        op = record['op']
+        if op == 'setor':
+            t = record['transaksi']
+            entri = self._roster[record['nama'].casefold()]
+            tambahan.setdefault(self._path_siswa(entri['id']), []).append(t)
+            entri['saldo'] += t['jumlah']
+            entri['jumlah_transaksi'] += 1
+        elif op == 'keluar':
+            p = record['pengeluaran']
+            tambahan.setdefault(self.pengeluaran_file, []).append(p)
+            self._pengeluaran['total'] += p['jumlah']
+            self._pengeluaran['jumlah_transaksi'] += 1
+        elif op == 'tambah_siswa':
+            self._roster[record['nama'].casefold()] = self._entri_baru(record['nama'])
+        elif op == 'ubah_nama':
+            entri = self._roster.pop(record['lama'].casefold())
+            entri['nama'] = record['baru']
+            self._roster[record['baru'].casefold()] = entri
+        elif op == 'hapus_siswa':
+            entri = self._roster.pop(record['nama'].casefold())
+            self._tandai_kosong(self._path_siswa(entri['id']), tambahan, kosong, hapus=True)
+        elif op == 'reset_siswa':
+            entri = self._roster[record['nama'].casefold()]
+            self._tandai_kosong(self._path_siswa(entri['id']), tambahan, kosong)
+            entri['saldo'] = 0
+            entri['jumlah_transaksi'] = 0
+        elif op == 'reset_semua':
+            for entri in self._roster.values():
+                self._tandai_kosong(self._path_siswa(entri['id']), tambahan, kosong)
+                entri['saldo'] = 0
+                entri['jumlah_transaksi'] = 0
+            self._tandai_kosong(self.pengeluaran_file, tambahan, kosong)
+            self._pengeluaran = {'jumlah_transaksi': 0, 'total': 0}
+        else:
+            raise ValueError(f"jenis record tidak dikenal: {op}")
+    
+    def _entri_baru(self, nama):
+        """Helper: Buat entri roster dengan id shard baru"""
+        entri = {'id': self._id_berikut, 'nama': nama, 'saldo': 0, 'jumlah_transaksi': 0}
+        self._id_berikut += 1
+        return entri
+    
+    def _path_siswa(self, id_siswa):
+        return os.path.join(self.folder_siswa, f"{id_siswa}.jsonl")
+    
+    def _pemuat(self, path, batas):
+        """
+        Helper: Fungsi pembaca shard untuk RiwayatMalas.
+        
+        Hanya transaksi yang sudah tercatat di roster saat dimuat yang
+        dibaca; transaksi sesudahnya sudah ditahan oleh RiwayatMalas.
+        """
+        return lambda: self._baca_shard(path, batas)
+    
+    def _baca_shard(self, path, batas=None):
+        """
+        Membaca transaksi dari satu file shard.
+        
+        Baris terakhir yang terpotong menghentikan pembacaan dengan peringatan.
+        
+        Args:
+            path (str): File shard
+            batas (int): Jumlah transaksi maksimal yang dibaca (opsional)
+        """
+        if not os.path.exists(path):
+            return []
+        
+        hasil = []
+        with open(path, 'rb') as f:
+            for nomor_baris, baris in enumerate(f, 1):
+                if len(hasil) == batas:
+                    break
+                PENGUKUR.hitung('byte_dibaca', len(baris))
+                if not baris.strip():
+                    continue
+                try:
+                    hasil.append(json.loads(baris))
+                except (json.JSONDecodeError, UnicodeDecodeError):
+                    print(f"{Colors.YELLOW}⚠ Shard {path} rusak di baris {nomor_baris}, sisa riwayat diabaikan{Colors.END}")
+                    break
+        return hasil
+    
+    def _tulis_shard(self, path, daftar, mode):
+        """Helper: Tulis (mode 'w') atau tambahkan (mode 'a') transaksi ke shard"""
+        baris = ''.join(json.dumps(t, ensure_ascii=False) + '\n' for t in daftar).encode('utf-8')
+        with open(path, mode + 'b') as f:
+            f.write(baris)
+            f.flush()
+            os.fsync(f.fileno())
+        PENGUKUR.hitung('byte_ditulis', len(baris))
+    
+    @staticmethod
+    def _tandai_kosong(path, tambahan, kosong, hapus=False):
+        """Helper: Buang transaksi yang belum ditulis lalu catat shard untuk dikosongkan/dihapus"""
+        tambahan.pop(path, None)
+        kosong[path] = hapus
+    
+    def _kosongkan_shard(self, path, daftar, hapus=False):
+        """
+        Helper: Hapus file shard, atau ganti isinya dengan daftar lewat file sementara.
+        
+        Args:
+            path (str): File shard
+            daftar (list): Transaksi sesudah reset (biasanya kosong)
+            hapus (bool): Hapus file shard (siswa dihapus)
+        """
+        if hapus:
+            if os.path.exists(path):
+                os.remove(path)
+        elif daftar or os.path.exists(path):
+            self._tulis_shard(path + '.tmp', daftar, 'w')
+            os.replace(path + '.tmp', path)
+    
+    def _tulis_roster(self):
+        """Helper: Tulis roster ke file sementara lalu ganti file lama sekaligus"""
+        roster = {
+            'jurnal_seq': self._jurnal_seq,
+            'id_berikut': self._id_berikut,
+            'terakhir_update': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            'siswa': sorted(self._roster.values(), key=lambda entri: entri['nama']),
+            'pengeluaran': self._pengeluaran
+        }
+        sementara = self.roster_file + '.tmp'
+        with open(sementara, 'w', encoding='utf-8') as f:
+            json.dump(roster, f, indent=2, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(sementara, self.roster_file)
+
+
+def tentukan_folder_data():
+    """
+    Menentukan folder penyimpanan database.
+    
+    Menggunakan folder tempat script/exe berada. Jika folder tersebut
+    tidak bisa ditulisi, gunakan Documents/KasKelas.
+    
+    Returns:
+        str: Path folder data
+    """
+    # Dapatkan folder dimana script Python berada
+    if getattr(sys, 'frozen', False):
+        # Jika dijalankan sebagai .exe
+        app_path = os.path.dirname(sys.executable)
+    else:
+        # Jika dijalankan sebagai .py
+        app_path = os.path.dirname(os.path.abspath(__file__))
+    
+    # Jika tidak bisa tulis di folder script, gunakan Documents
+    try:
+        test_file = os.path.join(app_path, '.test_write')
+        with open(test_file, 'w') as f:
+            f.write('test')
+        os.remove(test_file)
+        # Bisa menulis di folder script
+        return app_path
+    except:
+        # Tidak bisa menulis, gunakan Documents
+        data_dir = os.path.join(os.path.expanduser('~'), 'Documents', 'KasKelas')
+        
+        # Buat folder jika belum ada
+        if not os.path.exists(data_dir):
+            os.makedirs(data_dir)
+        return data_dir
+
+
+def angka_dari_env(nama, bawaan):
+    """
+    Membaca pengaturan angka dari environment variable.
+    
+    Args:
+        nama (str): Nama environment variable
+        bawaan (int | float): Nilai jika variable tidak diisi atau tidak valid
+    
+    Returns:
+        int | float: Nilai pengaturan (bertipe sama dengan bawaan)
+    """
+    teks = os.environ.get(nama, '').strip()
+    if not teks:
+        return bawaan
+    try:
+        return type(bawaan)(teks)
+    except ValueError:
+        print(f"{Colors.YELLOW}⚠ {nama}={teks!r} bukan angka, memakai {bawaan}{Colors.END}", file=sys.stderr)
+        return bawaan
+
+
+def buat_penyimpanan(data_dir, jenis=None):
+    """
+    Memilih media penyimpanan yang dipakai.
+    
+    Urutan:
+    1. Parameter jenis / environment variable KALCER_STORAGE ('json', 'sqlite', 'shard' atau 'biner')
+    2. SQLite jika file kas_kelas_database.db sudah ada (hasil migrasi)
+    3. Shard jika folder kas_kelas_shard sudah berisi roster (hasil migrasi)
+    4. Biner jika file kas_kelas_database.kalc sudah ada (hasil migrasi)
+    5. JSON (default)
+    
+    Args:
+        data_dir (str): Folder data
+        jenis (str): Paksa jenis penyimpanan (opsional)
+    
+    Returns:
+        Penyimpanan: Objek penyimpanan yang dipilih
+    """
+    path_json = os.path.join(data_dir, 'kas_kelas_database.json')
+    path_db = os.path.join(data_dir, 'kas_kelas_database.db')
+    path_shard = os.path.join(data_dir, 'kas_kelas_shard')
+    path_biner = os.path.join(data_dir, 'kas_kelas_database.kalc')
+    
+    jenis = (jenis or os.environ.get('KALCER_STORAGE', '')).lower()
+    if not jenis:
+        if os.path.exists(path_db):
+            jenis = 'sqlite'
+        elif os.path.exists(os.path.join(path_shard, 'roster.json')):
+            jenis = 'shard'
+        elif os.path.exists(path_biner):
+            jenis = 'biner'
+        else:
+            jenis = 'json'
+    
+    if jenis == 'sqlite':
+        return PenyimpananSQLite(path_db)
+    if jenis == 'shard':
+        return PenyimpananShard(path_shard)
+    if jenis == 'biner':
+        return PenyimpananBiner(path_biner)
+    return PenyimpananJSON(path_json)
+
+
+def migrasi_dari_json(data_dir, jenis='sqlite'):
+    """
+    Memindahkan data dari kas_kelas_database.json (termasuk jurnal) ke
+    SQLite, folder shard atau file biner.
+    
+    File JSON tidak dihapus, sehingga bisa dipakai sebagai cadangan.
+    
+    Args:
+        data_dir (str): Folder data
+        jenis (str): Penyimpanan tujuan ('sqlite', 'shard' atau 'biner')
+    
+    Returns:
+        bool: True jika migrasi berhasil
+    """
+    path_json = os.path.join(data_dir, 'kas_kelas_database.json')
+    
+    if not os.path.exists(path_json):
+        print(f"{Colors.RED}⚠ File {path_json} tidak ditemukan!{Colors.END}")
+        return False
+    
+    tujuan = buat_penyimpanan(data_dir, jenis)
+    if tujuan.ada():
+        print(f"{Colors.RED}⚠ Database {tujuan.lokasi} sudah ada, migrasi dibatalkan{Colors.END}")
+        return False
+    
+    kas = KasKelas(PenyimpananJSON(path_json))
+    tujuan.simpan(kas.snapshot())
+    
+    print(f"\n{Colors.GREEN}✓ Migrasi selesai: {len(kas.data_siswa)} siswa dipindahkan ke{Colors.END}")
+    print(f"  {Colors.WHITE}{tujuan.lokasi}{Colors.END}")
+    return True
+
+
+def migrasi_ke_json(data_dir, jenis=None, timpa=False):
+    """
+    Kebalikan migrasi_dari_json: menulis database SQLite, shard atau biner
+    (termasuk jurnalnya) sebagai kas_kelas_database.json.
+    
+    Database asal tidak dihapus. Selama masih ada, database tersebut tetap
+    dipilih otomatis (lihat buat_penyimpanan), jadi pindahkan atau hapus
+    setelah hasil JSON dicek, atau pakai --storage json.
+    
+    Args:
+        data_dir (str): Folder data
+        jenis (str): Penyimpanan asal (default: dipilih otomatis)
+        timpa (bool): Timpa kas_kelas_database.json yang sudah ada
+    
+    Returns:
+        bool: True jika berhasil
+    """
+    sumber = buat_penyimpanan(data_dir, jenis)
+    if isinstance(sumber, PenyimpananJSON) and not isinstance(sumber, PenyimpananBiner):
+        print(f"{Colors.RED}⚠ Database di {data_dir} sudah berformat JSON{Colors.END}")
+        return False
+    if not sumber.ada():
+        print(f"{Colors.RED}⚠ Database {sumber.lokasi} tidak ditemukan!{Colors.END}")
+        return False
+    
+    tujuan = PenyimpananJSON(os.path.join(data_dir, 'kas_kelas_database.json'))
+    if tujuan.ada() and not timpa:
+        print(f"{Colors.RED}⚠ File {tujuan.lokasi} sudah ada, pakai --timpa untuk menimpanya{Colors.END}")
+        return False
+    
+    kas = KasKelas(sumber)
+    tujuan.simpan(kas.snapshot())
+    
+    print(f"\n{Colors.GREEN}✓ Migrasi selesai: {len(kas.data_siswa)} siswa ditulis ke{Colors.END}")
+    print(f"  {Colors.WHITE}{tujuan.lokasi}{Colors.END}")
+    print(f"  {Colors.GRAY}Pindahkan {sumber.lokasi} agar file JSON dipakai kembali{Colors.END}")
+    return True
+
+
+def tulis_export(baris, output, format_file, kolom):
+    """
+    Menulis baris export ke file satu per satu (tanpa mengumpulkan list).
+    
+    Args:
+        baris (iterable): Dict per baris (biasanya generator dari KasKelas.baris_export)
+        output: File teks tujuan (untuk CSV dibuka dengan newline='')
+        format_file (str): 'csv' atau 'jsonl'
+        kolom (list): Urutan kolom/key
+    
+    Returns:
+        int: Jumlah baris yang ditulis
+    """
+    jumlah = 0
+    if format_file == 'csv':
+        penulis = csv.writer(output)
+        penulis.writerow(kolom)
+        for b in baris:
+            penulis.writerow([b[k] for k in kolom])
+            jumlah += 1
+    else:
+        for b in baris:
+            output.write(json.dumps({k: b[k] for k in kolom}, ensure_ascii=False) + '\n')
+            jumlah += 1
+    PENGUKUR.hitung('baris_export', jumlah)
+    return jumlah
+
+
+class KatalogKelas:
+    """
+    Katalog kas beberapa kelas dalam satu folder data.
+    
+    Kelas pertama ('utama') adalah database di folder data itu sendiri,
+    sehingga data yang sudah ada langsung menjadi salah satu kelas. Kelas
+    lain disimpan di subfolder kelas/<id>, masing-masing dengan media
+    penyimpanannya sendiri (lihat buat_penyimpanan). Daftar kelas dan kelas
+    yang terakhir dibuka disimpan di katalog_kelas.json.
+    
+    Kas kelas yang sudah dimuat disimpan di cache LRU, jadi berpindah kelas
+    bolak-balik tidak membaca ulang file. Jika perkiraan memori cache
+    melebihi batas, kelas yang paling lama tidak dipakai dilepas (kelas
+    aktif tidak pernah dilepas); jurnalnya digabung dulu ke snapshot agar
+    pembukaan berikutnya cepat.
+    
+    Atribut:
+        BATAS_CACHE_MB: Batas perkiraan memori cache (bisa diubah lewat KALCER_CACHE_MB)
+        BYTE_PER_SISWA: Perkiraan memori satu data siswa
+        BYTE_PER_TRANSAKSI: Perkiraan memori satu transaksi yang sudah dimuat
+        kelas: List {'id', 'nama', 'folder'} (folder relatif terhadap folder data)
+        aktif: id kelas yang sedang dibuka
+    """
+    BATAS_CACHE_MB = 64
+    BYTE_PER_SISWA = 1024
+    BYTE_PER_TRANSAKSI = 600
+    
+    def __init__(self, data_dir, jenis=None, tenang=False):
+        """
+        Args:
+            data_dir (str): Folder data (berisi database kelas utama)
+            jenis (str): Paksa jenis penyimpanan semua kelas (opsional)
+            tenang (bool): Kas kelas dibuka dalam mode tenang (lihat KasKelas)
+        """
+        self.data_dir = data_dir
+        self.jenis = jenis
+        self.tenang = tenang
+        self.path = os.path.join(data_dir, 'katalog_kelas.json')
+        self.batas_byte = angka_dari_env('KALCER_CACHE_MB', self.BATAS_CACHE_MB) * 1024 * 1024
+        self.cache = OrderedDict()
+        self._ringkasan_lepas = {}
+        self.kelas = [{'id': 'utama', 'nama': 'Kelas Utama', 'folder': '.'}]
+        self.aktif = 'utama'
+        
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    katalog = json.load(f)
+                self.kelas = katalog['kelas']
+                self.aktif = katalog.get('aktif', self.kelas[0]['id'])
+            except (OSError, ValueError, KeyError, IndexError) as e:
+                print(f"{Colors.YELLOW}⚠ Katalog kelas tidak bisa dibaca ({e}), hanya kelas utama yang dipakai{Colors.END}",
+                      file=sys.stderr)
+        if self.cari(self.aktif) is None:
+            self.aktif = self.kelas[0]['id']
+    
+    def _simpan(self):
+        """Helper: Tulis katalog ke file sementara lalu ganti file lama sekaligus"""
+        sementara = self.path + '.tmp'
+        with open(sementara, 'w', encoding='utf-8') as f:
+            json.dump({'aktif': self.aktif, 'kelas': self.kelas}, f, indent=2, ensure_ascii=False)
+        os.replace(sementara, self.path)
+    
+    def cari(self, teks):
+        """
+        Mencari kelas berdasarkan id atau nama (case-insensitive).
+        
+        Returns:
+            dict: Entri kelas, atau None jika tidak ada
+        """
+        kunci = teks.strip().casefold()
+        for entri in self.kelas:
+            if entri['id'] == kunci or entri['nama'].casefold() == kunci:
+                return entri
+        return None
+    
+    def folder(self, entri):
+        """Mengembalikan path folder data sebuah kelas"""
+        return os.path.normpath(os.path.join(self.data_dir, entri['folder']))
+    
+    @property
+    def entri_aktif(self):
+        """Entri kelas yang sedang dibuka"""
+        return self.cari(self.aktif)
+    
+    def tambah(self, nama, daftar_siswa=()):
+        """
+        Mendaftarkan kelas baru beserta database awalnya.
+        
+        Args:
+            nama (str): Nama kelas, misal 'XI RPL 1'
+            daftar_siswa (iterable): Nama siswa awal (boleh kosong)
+        
+        Returns:
+            dict: Entri kelas baru
+        
+        Raises:
+            ValueError: Jika nama kosong atau sudah dipakai
+        """
+        nama = nama.strip()
+        if not nama:
+            raise ValueError("nama kelas tidak boleh kosong")
+        if self.cari(nama) is not None:
+            raise ValueError(f"kelas '{nama}' sudah ada")
+        
+        dasar = re.sub(r'[^a-z0-9]+', '-', nama.casefold()).strip('-') or 'kelas'
+        id_kelas, n = dasar, 1
+        while self.cari(id_kelas) is not None:
+            n += 1
+            id_kelas = f"{dasar}-{n}"
+        entri = {'id': id_kelas, 'nama': nama, 'folder': f"kelas/{id_kelas}"}
+        
+        folder = self.folder(entri)
+        os.makedirs(folder, exist_ok=True)
+        storage = buat_penyimpanan(folder, self.jenis)
+        if not storage.ada():
+            nama_siswa = sorted({n.strip().title() for n in daftar_siswa if n.strip()})
+            storage.simpan({
+                'data_siswa': [{"nama": n, "transaksi": [], "saldo": 0} for n in nama_siswa],
+                'pengeluaran_umum': [],
+                'terakhir_update': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+                'jurnal_seq': 0
+            })
+        
+        self.kelas.append(entri)
+        self._simpan()
+        return entri
+    
+    def pilih(self, entri):
+        """Menjadikan kelas sebagai kelas aktif (diingat untuk pembukaan berikutnya)"""
+        self.aktif = entri['id']
+        if len(self.kelas) > 1 or os.path.exists(self.path):
+            self._simpan()
+    
+    def buka(self, entri, tenang=None):
+        """
+        Mengambil kas sebuah kelas dari cache, atau memuatnya jika belum ada.
+        
+        Args:
+            entri (dict): Entri kelas
+            tenang (bool): Mode tenang (default: mengikuti katalog)
+        
+        Returns:
+            KasKelas: Kas kelas tersebut, atau None jika database tidak bisa
+                      dimuat dalam mode tenang
+        """
+        tenang = self.tenang if tenang is None else tenang
+        kas = self.cache.get(entri['id'])
+        if kas is None:
+            kas = KasKelas(buat_penyimpanan(self.folder(entri), self.jenis), tenang=tenang)
+            if kas.gagal_muat and tenang:
+                return None
+            self.cache[entri['id']] = kas
+            self._ringkasan_lepas.pop(entri['id'], None)
+        else:
+            self.cache.move_to_end(entri['id'])
+            kas.tenang = tenang
+        self._batasi()
+        return kas
+    
+    def _perkiraan_memori(self, kas):
+        """Helper: Perkiraan kasar memori satu kas dari jumlah data yang ada di memori"""
+        jumlah = 0
+        for daftar in [siswa['transaksi'] for siswa in kas.data_siswa] + [kas.pengeluaran_umum]:
+            if not isinstance(daftar, RiwayatMalas) or daftar.termuat:
+                jumlah += len(daftar)
+        jumlah += len(kas.indeks_waktu)
+        return len(kas.data_siswa) * self.BYTE_PER_SISWA + jumlah * self.BYTE_PER_TRANSAKSI
+    
+    def _batasi(self):
+        """
+        Helper: Lepas kelas yang paling lama tidak dipakai sampai cache di bawah batas.
+        
+        Kelas aktif dan kelas yang baru saja dibuka (paling akhir di cache)
+        tidak pernah dilepas, karena masih dipakai pemanggil.
+        """
+        total = sum(self._perkiraan_memori(kas) for kas in self.cache.values())
+        for id_kelas in list(self.cache)[:-1]:
+            if total <= self.batas_byte:
+                break
+            if id_kelas == self.aktif:
+                continue
+            kas = self.cache.pop(id_kelas)
+            total -= self._perkiraan_memori(kas)
+            self._lepas(id_kelas, kas)
+    
+    def _lepas(self, id_kelas, kas):
+        """Helper: Simpan ringkasan dan gabungkan jurnal kelas yang keluar dari cache"""
+        if kas.storage.perlu_kompaksi():
+            kas.checkpoint()
+        self._ringkasan_lepas[id_kelas] = kas.data_ringkasan()
+    
+    def ringkasan(self, entri):
+        """
+        Ringkasan kas satu kelas (lihat KasKelas.data_ringkasan).
+        
+        Kelas di cache memakai data di memori; kelas yang sudah dilepas
+        memakai ringkasan saat dilepas, jadi tidak perlu dimuat ulang.
+        
+        Returns:
+            dict: Ringkasan kas, atau None jika database tidak bisa dimuat
+        """
+        kas = self.cache.get(entri['id'])
+        if kas is not None:
+            return kas.data_ringkasan()
+        if entri['id'] in self._ringkasan_lepas:
+            return self._ringkasan_lepas[entri['id']]
+        kas = self.buka(entri, tenang=True)
+        return kas.data_ringkasan() if kas is not None else None
+    
+    def ringkasan_semua(self):
+        """
+        Ringkasan setiap kelas beserta totalnya.
+        
+        Returns:
+            tuple: (list (entri, ringkasan), dict total pemasukan, pengeluaran,
+                   saldo, jumlah siswa dan jumlah transaksi semua kelas)
+        """
+        per_kelas = [(entri, self.ringkasan(entri)) for entri in self.kelas]
+        kunci = ('total_pemasukan', 'total_pengeluaran', 'saldo', 'jumlah_siswa', 'jumlah_transaksi')
+        total = {k: sum(r[k] for _, r in per_kelas if r is not None) for k in kunci}
+        return per_kelas, total
+    
+    def tutup(self):
+        """Menggabungkan jurnal semua kelas di cache ke snapshot (dipanggil saat keluar)"""
+        for kas in self.cache.values():
+            if kas.storage.perlu_kompaksi():
+                kas.checkpoint()
+
+
 class KasKelas:
     """
     Kelas utama untuk sistem manajemen kas kelas.
     
     Mengelola data siswa, transaksi pemasukan dan pengeluaran,
     serta menyediakan berbagai laporan keuangan kelas.
+    
+    Atribut:
+        BATAS_GRID_SISWA: Jumlah siswa maksimal yang masih ditampilkan
+                          sebagai tabel saat memilih siswa
+        KOLOM_EXPORT: Kolom setiap jenis laporan export (lihat baris_export)
+        CHECKPOINT_RECORD: Jumlah record jurnal yang memicu checkpoint
+                           (bisa diubah lewat KALCER_CHECKPOINT_RECORD)
+        CHECKPOINT_DETIK: Umur checkpoint terakhir (detik) yang memicu checkpoint
+                          berikutnya (bisa diubah lewat KALCER_CHECKPOINT_DETIK)
+        PERKIRAAN_REPLAY: Perkiraan waktu replay per record (detik) sebelum
+                          ada hasil pengukuran dari jurnal yang dimuat
     """
+    BATAS_GRID_SISWA = 60
+    KOLOM_EXPORT = {
+        'transaksi': ['nama', 'jumlah', 'keterangan', 'tanggal', 'jenis'],
+        'siswa': ['nama', 'jumlah', 'keterangan', 'tanggal', 'jenis', 'saldo'],
+        'status': ['nama', 'transaksi', 'saldo', 'status']
+    }
+    CHECKPOINT_RECORD = 500
+    CHECKPOINT_DETIK = 300
+    PERKIRAAN_REPLAY = 0.0001
     
-    def __init__(self):
+    def __init__(self, storage=None, tenang=False):
         """
         Inisialisasi sistem kas kelas.
         
-        Menentukan lokasi penyimpanan database, menampilkan welcome screen,
+        Menentukan media penyimpanan database, menampilkan welcome screen,
         dan memuat data yang sudah ada atau membuat data baru.
-        """
-        # Dapatkan folder dimana script Python berada
-        if getattr(sys, 'frozen', False):
-            # Jika dijalankan sebagai .exe
-            app_path = os.path.dirname(sys.executable)
-        else:
-            # Jika dijalankan sebagai .py
-            app_path = os.path.dirname(os.path.abspath(__file__))
         
-        # Jika tidak bisa tulis di folder script, gunakan Documents
-        try:
-            test_file = os.path.join(app_path, '.test_write')
-            with open(test_file, 'w') as f:
-                f.write('test')
-            os.remove(test_file)
-            # Bisa menulis di folder script
-            self.data_dir = app_path
-        except:
-            # Tidak bisa menulis, gunakan Documents
-            self.data_dir = os.path.join(os.path.expanduser('~'), 'Documents', 'KasKelas')
-            
-            # Buat folder jika belum ada
-            if not os.path.exists(self.data_dir):
-                os.makedirs(self.data_dir)
-        
-        self.filename = os.path.join(self.data_dir, 'kas_kelas_database.json')
-        
-        self.print_welcome_screen()
+        Args:
+            storage (Penyimpanan): Media penyimpanan (default: dipilih otomatis,
+                                   lihat buat_penyimpanan)
+            tenang (bool): Mode tanpa tampilan (untuk perintah command-line):
+                           welcome screen dan pesan sukses tidak ditampilkan,
+                           peringatan ditulis ke stderr
+        """
+        if storage is None:
+            storage = buat_penyimpanan(tentukan_folder_data())
+        
+        self.storage = storage
+        self.filename = storage.lokasi
+        self.data_dir = os.path.dirname(self.filename)
+        self.jurnal_seq = 0
+        self.ringkasan = RingkasanKas()
+        self.rekap = RekapPeriode()
+        self.indeks_waktu = IndeksWaktu()
+        self.indeks_keterangan = IndeksKeterangan()
+        self.indeks_nama = IndeksNama()
+        self.layar = Layar()
+        self.tenang = tenang
+        self.gagal_muat = False
+        self.checkpoint_record = angka_dari_env('KALCER_CHECKPOINT_RECORD', self.CHECKPOINT_RECORD)
+        self.checkpoint_detik = angka_dari_env('KALCER_CHECKPOINT_DETIK', self.CHECKPOINT_DETIK)
+        self.waktu_checkpoint = time.monotonic()
+        self.detik_per_record = self.PERKIRAAN_REPLAY
+        
+        if not tenang:
+            self.print_welcome_screen()
         self.load_data()
     
+    def info(self, teks):
+        """Menampilkan pesan informasi (tidak ditampilkan dalam mode tenang)"""
+        if not self.tenang:
+            print(teks)
+    
+    def peringatan(self, teks):
+        """Menampilkan peringatan/error (ke stderr dalam mode tenang)"""
+        print(teks, file=sys.stderr if self.tenang else sys.stdout)
+    
     def print_welcome_screen(self):
         """
         Menampilkan layar selamat datang dengan desain box yang menarik.
@@ -108,37 +3361,235 @@ class KasKelas:
     
     def load_data(self):
         """
-        Memuat data dari file JSON.
+        Memuat data dari media penyimpanan.
         
-        Membaca data siswa dan pengeluaran umum dari file database.
+        Membaca data siswa dan pengeluaran umum dari database (snapshot),
+        lalu menerapkan ulang semua perubahan yang tercatat di jurnal.
         Jika file tidak ada atau rusak, akan membuat data baru.
         Menampilkan ringkasan data yang berhasil dimuat.
+        
+        Dilakukan sambil memegang kunci database, agar tidak membaca
+        snapshot yang sedang ditulis proses lain.
+        
+        Raises:
+            TimeoutError: Jika kunci database tidak didapat (lihat KunciBerkas)
         """
-        if os.path.exists(self.filename):
+        with self.storage.kunci():
+            self._muat_terkunci()
+            self.storage.tandai_sinkron()
+    
+    def _muat_terkunci(self):
+        """Helper: Isi load_data, dipanggil sambil memegang kunci database"""
+        if self.storage.ada():
             try:
-                with open(self.filename, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    self.data_siswa = data.get('data_siswa', [])
-                    self.pengeluaran_umum = data.get('pengeluaran_umum', [])
+                self._pasang_data(self.storage.muat())
+                jumlah_jurnal = self.muat_jurnal()
                 
-                print(f"{Colors.GREEN}✓ Data berhasil dimuat{Colors.END}")
-                print(f"  {Colors.GRAY}• Jumlah siswa: {Colors.WHITE}{len(self.data_siswa)} orang{Colors.END}")
-                
-                total_transaksi = sum(len(s['transaksi']) for s in self.data_siswa) + len(self.pengeluaran_umum)
-                print(f"  {Colors.GRAY}• Total transaksi: {Colors.WHITE}{total_transaksi}{Colors.END}")
+                self.info(f"{Colors.GREEN}✓ Data berhasil dimuat{Colors.END}")
+                self.info(f"  {Colors.GRAY}• Jumlah siswa: {Colors.WHITE}{len(self.data_siswa)} orang{Colors.END}")
+                self.info(f"  {Colors.GRAY}• Total transaksi: {Colors.WHITE}{self.ringkasan.jumlah_transaksi}{Colors.END}")
+                if jumlah_jurnal:
+                    self.info(f"  {Colors.GRAY}• Dari jurnal: {Colors.WHITE}{jumlah_jurnal} perubahan{Colors.END}")
                 
+            except DataRusak as e:
+                self.pulihkan_data(e)
+            except TimeoutError:
+                raise
             except json.JSONDecodeError:
-                print(f"{Colors.RED}⚠ File JSON rusak! Membuat data baru...{Colors.END}")
-                self.buat_data_baru()
+                self.peringatan(f"{Colors.RED}⚠ File JSON rusak! Membuat data baru...{Colors.END}")
+                self.ganti_data_rusak()
             except Exception as e:
-                print(f"{Colors.RED}⚠ Error: {e}{Colors.END}")
-                self.buat_data_baru()
+                self.peringatan(f"{Colors.RED}⚠ Error: {e}{Colors.END}")
+                self.ganti_data_rusak()
         else:
-            print(f"{Colors.YELLOW}⚠ File tidak ditemukan{Colors.END}")
-            print(f"{Colors.GREEN}✓ Membuat file baru...{Colors.END}")
+            self.info(f"{Colors.YELLOW}⚠ File tidak ditemukan{Colors.END}")
+            self.info(f"{Colors.GREEN}✓ Membuat file baru...{Colors.END}")
             self.buat_data_baru()
+            self.muat_jurnal()
             self.save_data()
     
+    def _pasang_data(self, data):
+        """
+        Helper: Pasang data hasil storage.muat sebagai data di memori.
+        
+        Args:
+            data (dict): Snapshot dari storage.muat
+        """
+        self.data_siswa = data['data_siswa']
+        self.pengeluaran_umum = data['pengeluaran_umum']
+        self.jurnal_seq = data['jurnal_seq']
+        self._normalisasi_data()
+        self.indeks_nama.bangun_ulang(self.data_siswa)
+        self.ringkasan.bangun_ulang(self.data_siswa, self.pengeluaran_umum)
+    
+    def muat_ulang(self):
+        """
+        Membuang data di memori dan memuat ulang dari media penyimpanan.
+        
+        Dipakai jika proses lain sudah menulis ulang snapshot (checkpoint)
+        atau perubahan dari proses lain bentrok dengan perubahan di memori.
+        Rekap periode dan indeks pencarian dibangun ulang saat dibutuhkan.
+        """
+        with self.storage.kunci():
+            self.rekap = RekapPeriode()
+            self.indeks_waktu = IndeksWaktu()
+            self.indeks_keterangan = IndeksKeterangan()
+            self._pasang_data(self.storage.muat())
+            self.muat_jurnal()
+            self.storage.tandai_sinkron()
+        PENGUKUR.hitung('muat_ulang')
+    
+    def sinkronkan(self):
+        """
+        Mengambil perubahan yang ditulis proses lain (harus memegang kunci).
+        
+        Biasanya cukup memutar record baru di ujung jurnal; jika proses
+        lain sudah melakukan checkpoint, data dimuat ulang seluruhnya.
+        
+        Returns:
+            bool: True jika ada perubahan dari proses lain
+        """
+        records = self.storage.perubahan_luar()
+        if records is None:
+            self.muat_ulang()
+            return True
+        return self._putar_jurnal(records) > 0
+    
+    def segarkan(self):
+        """
+        Menyinkronkan data dengan proses lain, dipanggil setiap kembali ke menu.
+        
+        Jika database sedang dikunci terlalu lama, data di memori dipakai
+        apa adanya dan dicoba lagi di kesempatan berikutnya.
+        
+        Returns:
+            bool: True jika ada perubahan dari proses lain
+        """
+        try:
+            with self.storage.kunci():
+                return self.sinkronkan()
+        except TimeoutError:
+            return False
+    
+    def pulihkan_data(self, rusak):
+        """
+        Menangani database yang rusak di tengah file.
+        
+        Posisi byte kerusakan selalu ditampilkan. Dalam mode menu, file lama
+        disalin dulu sebagai cadangan, lalu user bisa memilih memakai data
+        valid sebelum posisi kerusakan (ditambah perubahan dari jurnal yang
+        masih berlaku) atau membuat data baru. Dalam mode tenang tidak ada
+        file yang diubah (program keluar dengan error).
+        
+        Args:
+            rusak (DataRusak): Error dari storage.muat
+        """
+        self.peringatan(f"{Colors.RED}⚠ Database rusak di byte {rusak.offset}: {rusak.pesan}{Colors.END}")
+        sebagian = rusak.sebagian
+        
+        if self.tenang or sebagian is None:
+            self.ganti_data_rusak()
+            return
+        
+        cadangan = self.storage.cadangkan()
+        if cadangan:
+            print(f"  {Colors.GRAY}Salinan file rusak: {cadangan}{Colors.END}")
+        print(f"  {Colors.YELLOW}Data sebelum byte {rusak.offset} masih bisa dipulihkan: "
+              f"{len(sebagian['data_siswa'])} siswa, {len(sebagian['pengeluaran_umum'])} pengeluaran{Colors.END}")
+        
+        konfirm = input(f"\n{Colors.YELLOW}Pulihkan data tersebut? (y/n):{Colors.END} ")
+        if konfirm.lower() == 'y':
+            self._pasang_data(sebagian)
+            # Perubahan sesudah snapshot ada di jurnal; yang tidak berlaku lagi
+            # (misal siswanya ikut hilang) dilewati dengan peringatan
+            jumlah_jurnal = self.muat_jurnal()
+            if jumlah_jurnal:
+                print(f"  {Colors.GRAY}• Dari jurnal: {Colors.WHITE}{jumlah_jurnal} perubahan{Colors.END}")
+        else:
+            print(f"{Colors.GREEN}✓ Membuat data baru...{Colors.END}")
+            self.buat_data_baru()
+        self.save_data()
+    
+    def ganti_data_rusak(self):
+        """
+        Memakai data baru sebagai pengganti database yang tidak bisa dibaca.
+        
+        Perubahan atau checkpoint berikutnya akan menimpa file lama, jadi
+        dalam mode menu file tersebut disalin dulu sebagai cadangan. Dalam
+        mode tenang program keluar dengan error tanpa menyimpan apapun.
+        
+        Raises:
+            OSError: Jika salinan file lama tidak bisa dibuat
+        """
+        self.gagal_muat = True
+        if not self.tenang:
+            cadangan = self.storage.cadangkan()
+            if cadangan:
+                print(f"  {Colors.GRAY}Salinan file rusak: {cadangan}{Colors.END}")
+        self.buat_data_baru()
+    
+    def _normalisasi_data(self):
+        """
+        Helper: Normalkan sekali data lama yang baru dimuat (lihat lengkapi_transaksi).
+        
+        String tanggal yang belum punya 'ts' di-parse, dan saldo serta
+        nominal float diubah menjadi integer rupiah.
+        """
+        # Riwayat yang dibaca belakangan dinormalkan sendiri (lihat RiwayatMalas)
+        for siswa in self.data_siswa:
+            siswa['saldo'] = rupiah(siswa['saldo'])
+            if not isinstance(siswa['transaksi'], RiwayatMalas):
+                for t in siswa['transaksi']:
+                    lengkapi_transaksi(t)
+        if not isinstance(self.pengeluaran_umum, RiwayatMalas):
+            for p in self.pengeluaran_umum:
+                lengkapi_transaksi(p)
+    
+    def muat_jurnal(self):
+        """
+        Menerapkan ulang record dari jurnal di atas snapshot yang sudah dimuat.
+        
+        Record dengan nomor urut (seq) yang sudah termasuk dalam snapshot dilewati,
+        sehingga aman jika program berhenti di antara menulis snapshot dan
+        mengosongkan jurnal.
+        
+        Waktu replay diukur untuk memperkirakan lama pembukaan berikutnya
+        (lihat info_jurnal).
+        
+        Returns:
+            int: Jumlah record jurnal yang diterapkan
+        """
+        mulai = time.perf_counter()
+        jumlah = self._putar_jurnal(self.storage.baca_jurnal())
+        if jumlah:
+            self.detik_per_record = (time.perf_counter() - mulai) / jumlah
+        return jumlah
+    
+    def _putar_jurnal(self, records):
+        """
+        Helper: Terapkan record jurnal yang belum termasuk di data memori.
+        
+        Args:
+            records (iterable): Record jurnal urut seq
+        
+        Returns:
+            int: Jumlah record yang diterapkan
+        """
+        jumlah = 0
+        for record in records:
+            if record.get('seq', 0) <= self.jurnal_seq:
+                continue
+            
+            try:
+                self.terapkan_record(record)
+            except (KeyError, ValueError) as e:
+                self.peringatan(f"{Colors.YELLOW}⚠ Record jurnal #{record['seq']} tidak valid ({e}), dilewati{Colors.END}")
+            self.jurnal_seq = record['seq']
+            jumlah += 1
+        
+        PENGUKUR.hitung('record_jurnal_diputar', jumlah)
+        return jumlah
+    
     def buat_data_baru(self):
         """
         Membuat struktur data baru dengan daftar siswa default.
@@ -164,42 +3615,332 @@ class KasKelas:
         ]
         
         self.pengeluaran_umum = []
+        self.indeks_nama.bangun_ulang(self.data_siswa)
+        self.ringkasan.bangun_ulang(self.data_siswa, self.pengeluaran_umum)
+    
+    def snapshot(self):
+        """
+        Menyusun seluruh data di memori menjadi satu dict siap disimpan.
+        
+        Returns:
+            dict: Data lengkap (data_siswa, pengeluaran_umum, terakhir_update, jurnal_seq)
+        """
+        return {
+            'data_siswa': self.data_siswa,
+            'pengeluaran_umum': self.pengeluaran_umum,
+            'terakhir_update': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            'jurnal_seq': self.jurnal_seq
+        }
     
     def save_data(self):
         """
-        Menyimpan semua data ke file JSON.
+        Menyimpan semua data ke media penyimpanan (snapshot lengkap).
         
         Menyimpan data_siswa dan pengeluaran_umum beserta timestamp
-        terakhir update ke dalam file database JSON.
+        terakhir update. Untuk penyimpanan JSON, jurnal ikut dikosongkan
+        karena isinya sudah termasuk dalam snapshot. Perubahan dari proses
+        lain diambil dulu agar tidak tertimpa.
         
         Returns:
             bool: True jika berhasil menyimpan, False jika gagal
         """
         try:
-            data = {
-                'data_siswa': self.data_siswa,
-                'pengeluaran_umum': self.pengeluaran_umum,
-                'terakhir_update': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-            }
+            with self.storage.kunci():
+                self.sinkronkan()
+                self.storage.simpan(self.snapshot())
+            self.waktu_checkpoint = time.monotonic()
             
-            with open(self.filename, 'w', encoding='utf-8') as f:
-                json.dump(data, f, indent=2, ensure_ascii=False)
-            
-            print(f"{Colors.GREEN}✓ Data tersimpan{Colors.END}")
+            self.info(f"{Colors.GREEN}✓ Data tersimpan{Colors.END}")
             return True
             
         except Exception as e:
-            print(f"{Colors.RED}⚠ Gagal menyimpan!{Colors.END}")
-            print(f"  {Colors.GRAY}Error: {e}{Colors.END}")
+            self.peringatan(f"{Colors.RED}⚠ Gagal menyimpan!{Colors.END}")
+            self.peringatan(f"  {Colors.GRAY}Error: {e}{Colors.END}")
+            return False
+    
+    def catat_jurnal(self, records):
+        """
+        Menyimpan record perubahan ke media penyimpanan.
+        
+        Hanya perubahan tersebut yang ditulis (baris jurnal atau satu
+        transaksi SQL), sehingga biaya menyimpan transaksi tetap kecil
+        berapa pun banyaknya riwayat transaksi.
+        
+        Args:
+            records (list): Record perubahan (masing-masing punya key 'op' dan 'seq')
+        
+        Returns:
+            bool: True jika berhasil menyimpan, False jika gagal
+        """
+        try:
+            self.storage.catat_batch(records)
+            PENGUKUR.hitung('record_jurnal_ditulis', len(records))
+            
+            self.info(f"{Colors.GREEN}✓ Data tersimpan{Colors.END}")
+            
+        except Exception as e:
+            self.peringatan(f"{Colors.RED}⚠ Gagal menyimpan!{Colors.END}")
+            self.peringatan(f"  {Colors.GRAY}Error: {e}{Colors.END}")
+            return False
+        
+        if self.perlu_checkpoint():
+            self.checkpoint()
+        return True
+    
+    def perlu_checkpoint(self):
+        """
+        Mengecek apakah jurnal sudah waktunya digabung ke snapshot.
+        
+        Checkpoint dilakukan jika jurnal sudah berisi CHECKPOINT_RECORD
+        record, atau checkpoint terakhir sudah lebih dari CHECKPOINT_DETIK
+        detik yang lalu dan jurnal tidak kosong.
+        
+        Returns:
+            bool: True jika perlu checkpoint
+        """
+        if not self.storage.memakai_jurnal:
+            return False
+        jumlah, _ = self.storage.info_jurnal()
+        if not jumlah:
+            return False
+        return (jumlah >= self.checkpoint_record
+                or time.monotonic() - self.waktu_checkpoint >= self.checkpoint_detik)
+    
+    def checkpoint(self):
+        """
+        Menulis snapshot lengkap (atomik) dan mengosongkan jurnal.
+        
+        Sama dengan save_data tetapi tanpa pesan sukses, karena dipanggil
+        otomatis di sela-sela transaksi. Jika program berhenti di tengah
+        checkpoint, snapshot lama + jurnal tetap utuh dan dimuat seperti biasa.
+        
+        Returns:
+            bool: True jika berhasil
+        """
+        try:
+            with self.storage.kunci():
+                self.sinkronkan()
+                self.storage.simpan(self.snapshot())
+        except Exception as e:
+            self.peringatan(f"{Colors.YELLOW}⚠ Checkpoint gagal, jurnal tetap dipakai ({e}){Colors.END}")
+            return False
+        self.waktu_checkpoint = time.monotonic()
+        return True
+    
+    def info_jurnal(self):
+        """
+        Menyusun satu baris statistik jurnal untuk footer menu.
+        
+        Returns:
+            str: Jumlah dan ukuran jurnal, perkiraan waktu replay saat program
+                 dibuka, serta batas checkpoint; '' jika penyimpanan tanpa jurnal
+        """
+        if not self.storage.memakai_jurnal:
+            return ''
+        jumlah, ukuran = self.storage.info_jurnal()
+        perkiraan_ms = jumlah * self.detik_per_record * 1000
+        return (f"{Colors.GRAY}Jurnal:{Colors.END} {jumlah} perubahan ({ukuran / 1024:.1f} KB)"
+                f" {Colors.GRAY}• replay ±{perkiraan_ms:.0f} ms"
+                f" • checkpoint tiap {self.checkpoint_record} perubahan / {self.checkpoint_detik} detik{Colors.END}")
+    
+    def terapkan_record(self, record):
+        """
+        Menerapkan satu record perubahan ke data di memori.
+        
+        Dipakai saat transaksi baru dicatat maupun saat jurnal diputar ulang
+        ketika program dibuka, sehingga keduanya selalu menghasilkan data yang sama.
+        
+        Jenis record (key 'op'):
+            setor        : {'nama', 'transaksi'}
+            keluar       : {'pengeluaran'}
+            tambah_siswa : {'nama'}
+            ubah_nama    : {'lama', 'baru'}
+            hapus_siswa  : {'nama'}
+            reset_siswa  : {'nama'}
+            reset_semua  : {}
+        
+        Args:
+            record (dict): Record perubahan
+        
+        Raises:
+            KeyError: Jika siswa yang dirujuk tidak ditemukan
+            ValueError: Jika jenis record tidak dikenal
+        """
+        op = record['op']
+        # Rekap periode dan index waktu/keterangan hanya diperbarui jika sudah
+        # pernah dibangun (lihat rekap_periode, cari_rentang dan cari_keterangan)
+        rekap = self.rekap if self.rekap.siap else None
+        indeks_waktu = self.indeks_waktu if self.indeks_waktu.siap else None
+        indeks_ket = self.indeks_keterangan if self.indeks_keterangan.siap else None
+        
+        # Setiap perubahan data siswa: kurangi kontribusi lama dari ringkasan,
+        # ubah datanya, lalu tambahkan kontribusi barunya
+        if op == 'setor':
+            siswa = self.cari_siswa(record['nama'])
+            self.ringkasan.kurangi_siswa(siswa)
+            sisip_urut_waktu(siswa['transaksi'], lengkapi_transaksi(record['transaksi']))
+            siswa['saldo'] += record['transaksi']['jumlah']
+            self.ringkasan.tambah_siswa(siswa)
+            if rekap:
+                rekap.tambah(record['transaksi'], siswa['nama'])
+            if indeks_waktu:
+                indeks_waktu.tambah(siswa, record['transaksi'])
+            if indeks_ket:
+                indeks_ket.tambah(siswa, record['transaksi'])
+        elif op == 'keluar':
+            sisip_urut_waktu(self.pengeluaran_umum, lengkapi_transaksi(record['pengeluaran']))
+            self.ringkasan.tambah_pengeluaran(record['pengeluaran']['jumlah'])
+            if rekap:
+                rekap.tambah(record['pengeluaran'])
+            if indeks_ket:
+                indeks_ket.tambah(None, record['pengeluaran'])
+        elif op == 'tambah_siswa':
+            siswa = {"nama": record['nama'], "transaksi": [], "saldo": 0}
+            self.indeks_nama.sisipkan(siswa)
+            self.ringkasan.tambah_siswa(siswa)
+        elif op == 'ubah_nama':
+            siswa = self.cari_siswa(record['lama'])
+            self.indeks_nama.keluarkan(siswa)
+            siswa['nama'] = record['baru']
+            self.indeks_nama.sisipkan(siswa)
+            if rekap:
+                rekap.ganti_nama(record['lama'], record['baru'])
+        elif op == 'hapus_siswa':
+            siswa = self.cari_siswa(record['nama'])
+            self.indeks_nama.keluarkan(siswa)
+            self.ringkasan.kurangi_siswa(siswa)
+            if rekap:
+                for t in siswa['transaksi']:
+                    rekap.kurangi(t, siswa['nama'])
+            if indeks_waktu:
+                indeks_waktu.keluarkan_siswa(siswa)
+            if indeks_ket:
+                indeks_ket.keluarkan_siswa(siswa)
+        elif op == 'reset_siswa':
+            siswa = self.cari_siswa(record['nama'])
+            self.ringkasan.kurangi_siswa(siswa)
+            if rekap:
+                for t in siswa['transaksi']:
+                    rekap.kurangi(t, siswa['nama'])
+            if indeks_waktu:
+                indeks_waktu.keluarkan_siswa(siswa)
+            if indeks_ket:
+                indeks_ket.keluarkan_siswa(siswa)
+            siswa['transaksi'] = []
+            siswa['saldo'] = 0
+            self.ringkasan.tambah_siswa(siswa)
+        elif op == 'reset_semua':
+            for siswa in self.data_siswa:
+                siswa['transaksi'] = []
+                siswa['saldo'] = 0
+            self.pengeluaran_umum = []
+            self.ringkasan.bangun_ulang(self.data_siswa, self.pengeluaran_umum)
+            if rekap:
+                rekap.kosongkan()
+            if indeks_waktu:
+                indeks_waktu.kosongkan()
+            if indeks_ket:
+                indeks_ket.kosongkan()
+        else:
+            raise ValueError(f"jenis record tidak dikenal: {op}")
+    
+    def simpan_perubahan(self, op, **isi):
+        """
+        Menerapkan perubahan ke memori lalu mencatatnya ke jurnal.
+        
+        Args:
+            op (str): Jenis perubahan (lihat terapkan_record)
+            **isi: Data perubahan sesuai jenisnya
+        
+        Returns:
+            bool: True jika berhasil menyimpan, False jika gagal
+        """
+        return self.simpan_batch([(op, isi)])
+    
+    def simpan_batch(self, perubahan):
+        """
+        Menerapkan sekumpulan perubahan ke memori lalu menyimpannya sekaligus.
+        
+        Semua record ditulis dalam satu kali tulis jurnal (atau satu
+        transaksi SQL), dipakai misalnya untuk impor CSV.
+        
+        Selama menyimpan, kunci database dipegang dan perubahan dari proses
+        lain diterapkan lebih dulu, sehingga nomor seq tidak bentrok dan
+        tidak ada transaksi yang hilang. Jika perubahan ternyata tidak bisa
+        diterapkan lagi (misal siswanya baru dihapus bendahara lain), atau
+        jurnal gagal ditulis, data dimuat ulang sehingga perubahan yang
+        tidak tersimpan juga hilang dari memori.
+        
+        Args:
+            perubahan (list): List tuple (op, isi) sesuai terapkan_record
+        
+        Returns:
+            bool: True jika berhasil menyimpan, False jika gagal
+        """
+        try:
+            with self.storage.kunci():
+                if self.sinkronkan():
+                    self.info(f"{Colors.CYAN}ℹ Data diperbarui dengan perubahan dari pengguna lain{Colors.END}")
+                records = []
+                try:
+                    for op, isi in perubahan:
+                        self.jurnal_seq += 1
+                        record = {'seq': self.jurnal_seq, 'op': op, **isi}
+                        self.terapkan_record(record)
+                        records.append(record)
+                except (KeyError, ValueError) as e:
+                    self.peringatan(f"{Colors.RED}⚠ Data sudah diubah pengguna lain ({e}), perubahan dibatalkan{Colors.END}")
+                    self.muat_ulang()
+                    return False
+                if not self.catat_jurnal(records):
+                    # Perubahan sudah diterapkan ke memori tapi tidak tercatat
+                    self.muat_ulang()
+                    return False
+                return True
+        except TimeoutError as e:
+            self.peringatan(f"{Colors.RED}⚠ Gagal menyimpan: {e}{Colors.END}")
             return False
     
+    def cari_siswa(self, nama):
+        """
+        Mencari data siswa berdasarkan nama (case-insensitive).
+        
+        Args:
+            nama (str): Nama siswa
+        
+        Returns:
+            dict: Data siswa
+        
+        Raises:
+            KeyError: Jika siswa tidak ditemukan
+        """
+        siswa = self.indeks_nama.cari(nama)
+        if siswa is None:
+            raise KeyError(nama)
+        return siswa
+    
     def clear_screen(self):
         """
         Membersihkan layar terminal.
         
-        Menggunakan perintah 'cls' untuk Windows dan 'clear' untuk Unix/Linux.
+        Menggunakan kode ANSI (lihat Layar), tanpa menjalankan proses 'cls'/'clear'.
+        """
+        self.layar.bersihkan()
+    
+    def tampil(self, teks=''):
+        """
+        Menampilkan satu atau beberapa baris teks.
+        
+        Jika frame layar sedang disusun, teks masuk ke frame; jika tidak,
+        teks langsung dicetak ke terminal.
+        
+        Args:
+            teks (str): Teks yang akan ditampilkan
         """
-        os.system('cls' if os.name == 'nt' else 'clear')
+        if self.layar.menyusun:
+            self.layar.tulis(teks)
+        else:
+            print(teks)
     
     def print_box_header(self, title, icon=""):
         """
@@ -209,9 +3950,9 @@ class KasKelas:
             title (str): Judul yang akan ditampilkan
             icon (str): Emoji atau icon yang ditampilkan sebelum judul
         """
-        print(f"\n{Colors.CYAN}╔{'═'*88}╗{Colors.END}")
-        print(f"{Colors.CYAN}║{Colors.END}{Colors.BOLD}{Colors.WHITE} {icon} {title:<84}{Colors.END}{Colors.CYAN}║{Colors.END}")
-        print(f"{Colors.CYAN}╚{'═'*88}╝{Colors.END}")
+        self.tampil(f"\n{Colors.CYAN}╔{'═'*88}╗{Colors.END}")
+        self.tampil(f"{Colors.CYAN}║{Colors.END}{Colors.BOLD}{Colors.WHITE} {icon} {title:<84}{Colors.END}{Colors.CYAN}║{Colors.END}")
+        self.tampil(f"{Colors.CYAN}╚{'═'*88}╝{Colors.END}")
     
     def print_section_header(self, title):
         """
@@ -231,7 +3972,7 @@ class KasKelas:
         Args:
             color (str): Kode warna ANSI untuk garis pemisah (default: GRAY)
         """
-        print(f"{color}{'─'*90}{Colors.END}")
+        self.tampil(f"{color}{'─'*90}{Colors.END}")
     
     def print_menu_item(self, number, title, icon="•"):
         """
@@ -242,7 +3983,7 @@ class KasKelas:
             title (str): Judul menu
             icon (str): Icon atau emoji untuk menu (default: "•")
         """
-        print(f"  {Colors.CYAN}{icon}{Colors.END} {Colors.WHITE}{number}.{Colors.END} {title}")
+        self.tampil(f"  {Colors.CYAN}{icon}{Colors.END} {Colors.WHITE}{number}.{Colors.END} {title}")
     
     def pause(self):
         """
@@ -258,7 +3999,7 @@ class KasKelas:
         Memformat angka menjadi format mata uang Rupiah.
         
         Args:
-            nominal (float): Nilai nominal yang akan diformat
+            nominal (int): Nilai nominal (rupiah) yang akan diformat
             
         Returns:
             str: String dengan format "Rp X.XXX.XXX"
@@ -275,6 +4016,9 @@ class KasKelas:
         - Support untuk warna custom
         - Header opsional
         
+        Lebar tampil setiap sel hanya dihitung sekali, dan seluruh tabel
+        disusun di memori lalu ditulis ke terminal dalam satu kali tulis.
+        
         Args:
             data_rows (list): List of lists/tuples berisi data untuk setiap baris
                             Contoh: [['Lutfi', '5', 'Rp 50.000'], ['Kevin', '3', 'Rp 30.000']]
@@ -305,68 +4049,328 @@ class KasKelas:
             print(f"{Colors.RED}⚠ Jumlah header tidak sesuai dengan jumlah kolom!{Colors.END}")
             return
         
-        # Hitung lebar maksimal untuk setiap kolom
-        col_widths = [0] * num_cols
+        # Ubah semua sel ke string dan hitung lebar tampilnya (sekali saja)
+        rows = [[str(cell) for cell in row] for row in data_rows]
+        lebar_rows = [[lebar_tampil(cell) for cell in row] for row in rows]
         
-        # Cek lebar dari header
-        if headers:
-            for i, header in enumerate(headers):
-                col_widths[i] = len(str(header))
-        
-        # Cek lebar dari setiap data row
-        for row in data_rows:
-            for i, cell in enumerate(row):
-                # Hapus kode warna ANSI untuk menghitung panjang sebenarnya
-                cell_str = str(cell)
-                # Remove ANSI codes untuk perhitungan panjang
-                import re
-                clean_cell = re.sub(r'\033\[[0-9;]*m', '', cell_str)
-                col_widths[i] = max(col_widths[i], len(clean_cell))
+        # Hitung lebar maksimal untuk setiap kolom
+        col_widths = [len(str(header)) for header in headers] if headers else [0] * num_cols
+        for lebar_cells in lebar_rows:
+            for i, lebar in enumerate(lebar_cells):
+                if lebar > col_widths[i]:
+                    col_widths[i] = lebar
         
         # Tambah padding (2 spasi per sisi)
         col_widths = [w + 2 for w in col_widths]
         
-        # Fungsi helper untuk membuat separator
-        def buat_border(left, mid, right, line='─'):
-            return f"{border_color}{left}{mid.join([line * w for w in col_widths])}{right}{Colors.END}"
+        lines = [''] + self._kepala_tabel(col_widths, headers, border_color, text_color)
+        for row, lebar_cells in zip(rows, lebar_rows):
+            lines.append(self._baris_tabel(row, lebar_cells, col_widths, border_color, text_color))
+        lines.append(self._border_tabel(col_widths, '└', '┴', '┘', border_color))
         
-        # Print border atas
-        print(f"\n{buat_border('┌', '┬', '┐')}")
+        sys.stdout.write('\n'.join(lines) + '\n')
+        PENGUKUR.hitung('baris_tabel', len(rows))
+    
+    def buat_tabel_stream(self, rows, col_widths, headers=None, border_color=Colors.CYAN,
+                          text_color=Colors.WHITE, ukuran_batch=256):
+        """
+        Varian buat_tabel_dinamis untuk baris yang datang dari iterator/generator.
+        
+        Lebar kolom ditentukan di awal (tanpa membaca semua baris), sehingga
+        baris bisa dibuat satu per satu dan ditulis per batch tanpa menyimpan
+        seluruh tabel di memori. Sel yang lebih panjang dari lebar kolom
+        tetap ditampilkan utuh.
+        
+        Args:
+            rows (iterable): Baris-baris tabel (list/tuple berisi sel)
+            col_widths (list): Lebar isi setiap kolom (tanpa padding)
+            headers (list): List berisi nama kolom header (opsional)
+            border_color (str): Warna untuk border tabel (default: CYAN)
+            text_color (str): Warna untuk teks (default: WHITE)
+            ukuran_batch (int): Jumlah baris per sekali tulis ke terminal
         
-        # Print header jika ada
+        Returns:
+            int: Jumlah baris data yang ditampilkan
+        """
         if headers:
-            header_cells = []
-            for i, header in enumerate(headers):
-                padded_header = f" {str(header):<{col_widths[i]-1}}"
-                header_cells.append(f"{Colors.BOLD}{text_color}{padded_header}{Colors.END}")
-            
-            print(f"{border_color}│{Colors.END}" + f"{border_color}│{Colors.END}".join(header_cells) + f"{border_color}│{Colors.END}")
-            print(buat_border('├', '┼', '┤'))
-        
-        # Print data rows
-        for row in data_rows:
-            row_cells = []
-            for i, cell in enumerate(row):
-                cell_str = str(cell)
-                # Hitung panjang tanpa ANSI codes
-                import re
-                clean_cell = re.sub(r'\033\[[0-9;]*m', '', cell_str)
-                
-                # Hitung padding yang dibutuhkan
-                padding_needed = col_widths[i] - len(clean_cell) - 1
-                
-                # Tambahkan padding
-                if '\033[' in cell_str:  # Jika ada warna
-                    padded_cell = f" {cell_str}{' ' * padding_needed}"
-                else:
-                    padded_cell = f" {text_color}{cell_str}{' ' * padding_needed}{Colors.END}"
-                
-                row_cells.append(padded_cell)
+            col_widths = [max(w, len(str(h))) for w, h in zip(col_widths, headers)]
+        col_widths = [w + 2 for w in col_widths]
+        
+        buffer = [''] + self._kepala_tabel(col_widths, headers, border_color, text_color)
+        jumlah = 0
+        for row in rows:
+            cells = [str(cell) for cell in row]
+            buffer.append(self._baris_tabel(cells, [lebar_tampil(c) for c in cells], col_widths, border_color, text_color))
+            jumlah += 1
+            if len(buffer) >= ukuran_batch:
+                sys.stdout.write('\n'.join(buffer) + '\n')
+                buffer = []
+        
+        buffer.append(self._border_tabel(col_widths, '└', '┴', '┘', border_color))
+        sys.stdout.write('\n'.join(buffer) + '\n')
+        PENGUKUR.hitung('baris_tabel', jumlah)
+        return jumlah
+    
+    def _border_tabel(self, col_widths, left, mid, right, border_color, line='─'):
+        """Helper: Garis border tabel (atas/tengah/bawah)"""
+        return f"{border_color}{left}{mid.join([line * w for w in col_widths])}{right}{Colors.END}"
+    
+    def _kepala_tabel(self, col_widths, headers, border_color, text_color):
+        """Helper: Border atas tabel ditambah baris header (jika ada)"""
+        lines = [self._border_tabel(col_widths, '┌', '┬', '┐', border_color)]
+        if headers:
+            sep = f"{border_color}│{Colors.END}"
+            header_cells = [
+                f"{Colors.BOLD}{text_color} {str(header):<{col_widths[i]-1}}{Colors.END}"
+                for i, header in enumerate(headers)
+            ]
+            lines.append(sep + sep.join(header_cells) + sep)
+            lines.append(self._border_tabel(col_widths, '├', '┼', '┤', border_color))
+        return lines
+    
+    def _baris_tabel(self, cells, lebar_cells, col_widths, border_color, text_color):
+        """Helper: Satu baris data tabel dengan padding sesuai lebar tampil tiap sel"""
+        sep = f"{border_color}│{Colors.END}"
+        row_cells = []
+        for cell, lebar, col_width in zip(cells, lebar_cells, col_widths):
+            padding = ' ' * (col_width - lebar - 1)
+            if '\033[' in cell:  # Jika ada warna
+                row_cells.append(f" {cell}{padding}")
+            else:
+                row_cells.append(f" {text_color}{cell}{padding}{Colors.END}")
+        return sep + sep.join(row_cells) + sep
+    
+    def _lebar_kolom_siswa(self):
+        """
+        Helper: Lebar kolom No, Nama dan Saldo untuk tabel per siswa.
+        
+        Hanya membaca nama dan saldo (tanpa memformat setiap baris), dipakai
+        bersama buat_tabel_stream.
+        
+        Returns:
+            tuple: (lebar_no, lebar_nama, lebar_saldo)
+        """
+        if not self.data_siswa:
+            return 1, 0, 0
+        saldo_list = [siswa['saldo'] for siswa in self.data_siswa]
+        lebar_saldo = max(len(self.format_rupiah(max(saldo_list))), len(self.format_rupiah(min(saldo_list))))
+        lebar_nama = max(len(siswa['nama']) for siswa in self.data_siswa)
+        return len(str(len(self.data_siswa))), lebar_nama, lebar_saldo
+    
+    def tampilkan_halaman(self, sumber, judul, icon, kepala, format_baris, pembuka=(), penutup=()):
+        """
+        Menampilkan baris dari sumber halaman demi halaman, setinggi layar terminal.
+        
+        Hanya baris pada halaman yang terlihat yang diambil dari sumber dan
+        diformat, jadi riwayat sepanjang apapun langsung terbuka. Setiap
+        halaman disusun sebagai satu frame (lihat Layar) yang barisnya
+        dipotong selebar terminal, sehingga tinggi halaman sesuai jumlah
+        baris layar dan frame berikutnya bisa digambar ulang sebagian.
+        
+        Tombol:
+        - Enter/n: halaman berikutnya (di halaman terakhir: selesai)
+        - p: halaman sebelumnya
+        - t: lompat ke tanggal (transaksi pertama pada/sesudah tanggal itu)
+        - nomor: lompat ke nomor baris
+        - q/0: selesai
+        
+        Args:
+            sumber: Sumber baris (BarisDaftar, BarisGabungan atau BarisQuery)
+            judul (str): Judul box header
+            icon (str): Icon box header
+            kepala (str): Baris judul kolom
+            format_baris (callable): (nomor, baris) → teks satu baris tabel
+            pembuka (list): Baris teks di antara box header dan tabel
+            penutup (list): Baris teks ringkasan di bawah tabel
+        """
+        total = len(sumber)
+        if not total:
+            print(f"\n{Colors.YELLOW}⚠ Tidak ada data untuk ditampilkan{Colors.END}")
+            self.pause()
+            return
+        
+        # Box header (4), judul kolom (2), 2 separator, posisi, pesan dan bantuan
+        tetap = 11 + sum(teks.count('\n') + 1 for teks in (*pembuka, *penutup))
+        
+        awal = 0
+        pesan = ''
+        redraw_sebagian = False
+        while True:
+            # Dihitung ulang setiap halaman agar mengikuti ukuran terminal terbaru
+            tinggi = max(5, shutil.get_terminal_size().lines - tetap - Layar.RUANG_PROMPT)
+            akhir = min(awal + tinggi, total)
+            
+            self.layar.mulai(potong=True)
+            self.print_box_header(judul, icon)
+            for teks in pembuka:
+                self.tampil(teks)
+            self.tampil(f"\n{kepala}")
+            self.print_separator()
+            for no, baris in enumerate(sumber.potong(awal, akhir), awal + 1):
+                self.tampil(format_baris(no, baris))
+            if total > tinggi:
+                # Halaman terakhir diisi baris kosong agar ukuran frame tetap
+                for _ in range(tinggi - (akhir - awal)):
+                    self.tampil()
+            self.print_separator()
+            for teks in penutup:
+                self.tampil(teks)
+            self.tampil(f"{Colors.GRAY}Baris {Colors.WHITE}{awal + 1}–{akhir}{Colors.GRAY} dari {total}{Colors.END}")
+            self.tampil(pesan)
+            self.tampil(f"{Colors.GRAY}[Enter/n] berikutnya  [p] sebelumnya  [t] ke tanggal  "
+                        f"[nomor] ke baris  [q] selesai{Colors.END}")
+            self.layar.tampilkan(sebagian=redraw_sebagian)
+            redraw_sebagian = True
+            PENGUKUR.hitung('baris_tabel', akhir - awal)
             
-            print(f"{border_color}│{Colors.END}" + f"{border_color}│{Colors.END}".join(row_cells) + f"{border_color}│{Colors.END}")
+            pesan = ''
+            pilihan = input(f"{Colors.CYAN}→{Colors.END} ").strip().lower()
+            if pilihan in ('', 'n'):
+                if akhir >= total:
+                    if pilihan == '':
+                        return
+                    pesan = f"{Colors.YELLOW}⚠ Sudah di halaman terakhir{Colors.END}"
+                else:
+                    awal = akhir
+            elif pilihan == 'p':
+                if awal == 0:
+                    pesan = f"{Colors.YELLOW}⚠ Sudah di halaman pertama{Colors.END}"
+                awal = max(0, awal - tinggi)
+            elif pilihan == 't':
+                teks = input(f"{Colors.CYAN}→{Colors.END} Tanggal (YYYY-MM-DD atau dd/mm/yyyy): ").strip()
+                try:
+                    posisi = sumber.posisi_ts(parse_batas_tanggal(teks))
+                except ValueError:
+                    pesan = f"{Colors.RED}⚠ Format tanggal tidak valid!{Colors.END}"
+                    continue
+                if posisi >= total:
+                    pesan = f"{Colors.YELLOW}⚠ Tidak ada transaksi sesudah {teks}{Colors.END}"
+                    posisi = total - 1
+                awal = posisi
+            elif pilihan.isdigit() and pilihan != '0':
+                if int(pilihan) <= total:
+                    awal = int(pilihan) - 1
+                else:
+                    pesan = f"{Colors.RED}⚠ Nomor baris 1–{total}!{Colors.END}"
+            elif pilihan in ('q', '0'):
+                return
+            else:
+                pesan = f"{Colors.RED}⚠ Pilihan tidak valid!{Colors.END}"
+    
+    def rekap_periode(self):
+        """
+        Mengambil rekap per bulan/minggu, dibangun saat pertama kali diminta.
         
-        # Print border bawah
-        print(buat_border('└', '┴', '┘'))
+        Membangun rekap perlu membaca semua riwayat sekali; sesudahnya
+        rekap diperbarui di terapkan_record setiap ada perubahan.
+        
+        Returns:
+            RekapPeriode: Rekap yang selalu sinkron dengan data
+        """
+        if not self.rekap.siap:
+            self.rekap.bangun_ulang(self.data_siswa, self.pengeluaran_umum)
+        return self.rekap
+    
+    def cari_rentang(self, awal, akhir, nama=None, jenis=None):
+        """
+        Mengambil transaksi dalam rentang waktu, urut berdasarkan tanggal.
+        
+        Batas rentang dicari dengan binary search: riwayat satu siswa dan
+        pengeluaran umum sudah urut waktu, sedangkan setoran semua siswa
+        memakai IndeksWaktu (dibangun saat query pertama). Biayanya sebanding
+        dengan jumlah hasil, bukan jumlah seluruh transaksi.
+        
+        Args:
+            awal (int): Timestamp awal (inklusif)
+            akhir (int): Timestamp akhir (inklusif)
+            nama (str): Hanya setoran siswa ini (default: semua)
+            jenis (str): 'setor' atau 'keluar' (default: keduanya)
+        
+        Yields:
+            dict: {'tanggal', 'ts', 'nama', 'jumlah', 'keterangan', 'is_income'}
+                  seperti iter_semua_transaksi
+        
+        Raises:
+            KeyError: Jika siswa tidak ditemukan
+        """
+        sumber = []
+        
+        if jenis != 'keluar':
+            if nama is not None:
+                siswa = self.cari_siswa(nama)
+                lo, hi = rentang_ts(siswa['transaksi'], awal, akhir)
+                setoran = ((siswa, siswa['transaksi'][i]) for i in range(lo, hi))
+            else:
+                if not self.indeks_waktu.siap:
+                    self.indeks_waktu.bangun_ulang(self.data_siswa)
+                setoran = self.indeks_waktu.antara(awal, akhir)
+            sumber.append({
+                'tanggal': t['tanggal'],
+                'ts': t['ts'],
+                'nama': siswa['nama'],
+                'jumlah': t['jumlah'],
+                'keterangan': t.get('keterangan', 'Setoran Tunai'),
+                'is_income': True
+            } for siswa, t in setoran)
+        
+        if jenis != 'setor' and nama is None:
+            lo, hi = rentang_ts(self.pengeluaran_umum, awal, akhir)
+            sumber.append({
+                'tanggal': p['tanggal'],
+                'ts': p['ts'],
+                'nama': 'KAS UMUM',
+                'jumlah': p['jumlah'],
+                'keterangan': p['keterangan'],
+                'is_income': False
+            } for p in (self.pengeluaran_umum[i] for i in range(lo, hi)))
+        
+        yield from heapq.merge(*sumber, key=lambda t: t['ts'])
+    
+    def cari_keterangan(self, kata_kunci):
+        """
+        Mencari setoran dan pengeluaran berdasarkan kata di keterangannya.
+        
+        Memakai IndeksKeterangan (dibangun saat pencarian pertama), jadi
+        pencarian berikutnya tidak perlu membaca riwayat transaksi.
+        
+        Args:
+            kata_kunci (str): Satu atau beberapa kata (semua harus cocok)
+        
+        Returns:
+            list: dict {'tanggal', 'ts', 'nama', 'jumlah', 'keterangan', 'is_income'}
+                  seperti iter_semua_transaksi, urut berdasarkan tanggal
+        """
+        if not self.indeks_keterangan.siap:
+            self.indeks_keterangan.bangun_ulang(self.data_siswa, self.pengeluaran_umum)
+        
+        return [
+            {
+                'tanggal': t['tanggal'],
+                'ts': t['ts'],
+                'nama': siswa['nama'] if siswa is not None else 'KAS UMUM',
+                'jumlah': t['jumlah'],
+                'keterangan': IndeksKeterangan._keterangan(siswa, t),
+                'is_income': siswa is not None
+            }
+            for siswa, t in self.indeks_keterangan.cari(kata_kunci)
+        ]
+    
+    def data_ringkasan(self):
+        """
+        Ringkasan kas dalam bentuk dict (untuk output JSON).
+        
+        Returns:
+            dict: Total pemasukan, pengeluaran, saldo, jumlah siswa/transaksi
+        """
+        return {
+            'total_pemasukan': self.ringkasan.total_pemasukan,
+            'total_pengeluaran': self.ringkasan.total_pengeluaran,
+            'saldo': self.ringkasan.saldo,
+            'jumlah_siswa': self.ringkasan.jumlah_siswa,
+            'sudah_bayar': self.ringkasan.sudah_bayar,
+            'belum_bayar': self.ringkasan.belum_bayar,
+            'jumlah_transaksi': self.ringkasan.jumlah_transaksi
+        }
     
     def hitung_total_saldo(self):
         """
@@ -374,11 +4378,12 @@ class KasKelas:
         
         Total saldo = (Total pemasukan dari semua siswa) - (Total pengeluaran umum)
         
+        Nilainya dibaca dari ringkasan yang selalu diperbarui, tanpa menjumlah ulang.
+        
         Returns:
-            float: Total saldo kas kelas
+            int: Total saldo kas kelas
         """
-        total = sum(siswa['saldo'] for siswa in self.data_siswa)
-        return total - sum(p['jumlah'] for p in self.pengeluaran_umum)
+        return self.ringkasan.saldo
     
     # ========== KELOLA SISWA ==========
     
@@ -438,7 +4443,7 @@ class KasKelas:
         - Nama tidak boleh kosong
         - Nama tidak boleh duplikat (case-insensitive)
         
-        Jika valid, siswa baru ditambahkan dan daftar diurutkan alfabetis.
+        Jika valid, siswa baru disisipkan langsung di posisi alfabetisnya.
         """
         self.print_section_header("TAMBAH SISWA BARU")
         
@@ -448,16 +4453,11 @@ class KasKelas:
             print(f"{Colors.RED}⚠ Nama tidak boleh kosong!{Colors.END}")
             return
         
-        for siswa in self.data_siswa:
-            if siswa['nama'].lower() == nama.lower():
-                print(f"{Colors.RED}⚠ Nama '{nama}' sudah ada!{Colors.END}")
-                return
-        
-        siswa_baru = {"nama": nama, "transaksi": [], "saldo": 0}
-        self.data_siswa.append(siswa_baru)
-        self.data_siswa.sort(key=lambda x: x['nama'])
+        if self.indeks_nama.cari(nama):
+            print(f"{Colors.RED}⚠ Nama '{nama}' sudah ada!{Colors.END}")
+            return
         
-        if self.save_data():
+        if self.simpan_perubahan('tambah_siswa', nama=nama):
             print(f"\n{Colors.GREEN}✓ Siswa '{nama}' berhasil ditambahkan!{Colors.END}")
             print(f"  {Colors.GRAY}Total siswa: {len(self.data_siswa)} orang{Colors.END}")
     
@@ -470,7 +4470,7 @@ class KasKelas:
         2. Meminta input nomor siswa yang akan diedit
         3. Menampilkan data siswa saat ini
         4. Meminta nama baru (dengan validasi duplikasi)
-        5. Mengupdate nama dan mengurutkan ulang daftar
+        5. Mengupdate nama dan memindahkan siswa ke posisi alfabetis barunya
         
         User bisa membatalkan dengan memasukkan 0 atau string kosong.
         """
@@ -502,21 +4502,16 @@ class KasKelas:
             
             if not nama_baru:
                 print(f"{Colors.YELLOW}✓ Batal edit{Colors.END}")
-                return
-            
-            # Cek duplikat nama (kecuali nama sendiri)
-            for i, s in enumerate(self.data_siswa):
-                if i != nomor - 1 and s['nama'].lower() == nama_baru.lower():
-                    print(f"{Colors.RED}⚠ Nama '{nama_baru}' sudah digunakan siswa lain!{Colors.END}")
-                    return
-            
-            # Update nama
-            siswa['nama'] = nama_baru
+                return
             
-            # Sort ulang berdasarkan nama
-            self.data_siswa.sort(key=lambda x: x['nama'])
+            # Cek duplikat nama (kecuali nama sendiri)
+            pemilik = self.indeks_nama.cari(nama_baru)
+            if pemilik is not None and pemilik is not siswa:
+                print(f"{Colors.RED}⚠ Nama '{nama_baru}' sudah digunakan siswa lain!{Colors.END}")
+                return
             
-            if self.save_data():
+            # Update nama (daftar otomatis diurutkan ulang)
+            if self.simpan_perubahan('ubah_nama', lama=nama_lama, baru=nama_baru):
                 print(f"\n{Colors.GREEN}✓ Nama berhasil diubah!{Colors.END}")
                 print(f"  {Colors.GRAY}Dari: {nama_lama}{Colors.END}")
                 print(f"  {Colors.GRAY}Ke  : {nama_baru}{Colors.END}")
@@ -561,9 +4556,7 @@ class KasKelas:
                 if konfirm.lower() != 'y':
                     return
             
-            self.data_siswa.pop(nomor - 1)
-            
-            if self.save_data():
+            if self.simpan_perubahan('hapus_siswa', nama=siswa['nama']):
                 print(f"\n{Colors.GREEN}✓ Siswa '{siswa['nama']}' dihapus!{Colors.END}")
         
         except ValueError:
@@ -580,12 +4573,14 @@ class KasKelas:
         4. Hapus siswa
         
         Loop terus berjalan sampai user memilih untuk kembali.
+        Tampilan menu disusun sebagai satu frame (lihat Layar).
         """
+        redraw_sebagian = False
         while True:
-            self.clear_screen()
+            self.layar.mulai()
             self.print_box_header("KELOLA DATA SISWA", "⚙️")
             
-            print(f"\n{Colors.BOLD}Menu:{Colors.END}")
+            self.tampil(f"\n{Colors.BOLD}Menu:{Colors.END}")
             self.print_menu_item("1", "Lihat Daftar Siswa", "👁️")
             self.print_menu_item("2", "Tambah Siswa", "➕")
             self.print_menu_item("3", "Edit Siswa", "✏️")
@@ -593,6 +4588,8 @@ class KasKelas:
             self.print_menu_item("0", "Kembali", "◀️")
             
             self.print_separator()
+            self.layar.tampilkan(sebagian=redraw_sebagian)
+            redraw_sebagian = False
             
             pilihan = input(f"\n{Colors.CYAN}→{Colors.END} Pilih menu: ")
             
@@ -613,6 +4610,8 @@ class KasKelas:
             else:
                 print(f"{Colors.RED}⚠ Pilihan tidak valid!{Colors.END}")
                 self.pause()
+                # Layar masih berisi menu yang sama, cukup hapus pesan di bawahnya
+                redraw_sebagian = True
     
     # ========== PILIH SISWA ==========
     
@@ -620,7 +4619,12 @@ class KasKelas:
         """
         Menampilkan daftar siswa dan meminta user memilih salah satu.
         
-        Menampilkan siswa dalam format tabel multi-kolom untuk memudahkan pemilihan.
+        Menampilkan siswa dalam format tabel multi-kolom untuk memudahkan pemilihan
+        (untuk daftar yang sangat panjang, tabel dilewati). User bisa mengetik
+        nomor siswa, atau mengetik awal nama untuk langsung melompat ke siswa
+        tersebut. Jika awal nama cocok dengan beberapa siswa, user diminta
+        memilih dari daftar kandidat; jika tidak ada yang cocok, ditawarkan
+        nama yang mirip.
         
         Returns:
             int: Index siswa yang dipilih (0-based), atau None jika dibatalkan
@@ -635,46 +4639,87 @@ class KasKelas:
         rows_per_column = 10
         total_siswa = len(self.data_siswa)
         
-        # Hitung jumlah kolom yang dibutuhkan
-        num_columns = (total_siswa + rows_per_column - 1) // rows_per_column
+        if total_siswa <= self.BATAS_GRID_SISWA:
+            # Hitung jumlah kolom yang dibutuhkan
+            num_columns = (total_siswa + rows_per_column - 1) // rows_per_column
+            
+            # Lebar setiap kolom
+            col_width = 22
+            
+            # Print border atas
+            border_top = "┌" + "┬".join(["─" * col_width for _ in range(num_columns)]) + "┐"
+            print(f"\n{Colors.GRAY}{border_top}{Colors.END}")
+            
+            # Print data per baris
+            for row in range(rows_per_column):
+                row_data = []
+                for col in range(num_columns):
+                    idx = col * rows_per_column + row
+                    if idx < total_siswa:
+                        siswa_text = f"{Colors.CYAN}{idx+1:2}.{Colors.END} {self.data_siswa[idx]['nama']:<15}"
+                        row_data.append(siswa_text)
+                    else:
+                        row_data.append(" " * col_width)
+                
+                # Print baris dengan separator
+                line = f"{Colors.GRAY}│{Colors.END} " + f" {Colors.GRAY}│{Colors.END} ".join(row_data) + f" {Colors.GRAY}│{Colors.END}"
+                print(line)
+            
+            # Print border bawah
+            border_bottom = "└" + "┴".join(["─" * col_width for _ in range(num_columns)]) + "┘"
+            print(f"{Colors.GRAY}{border_bottom}{Colors.END}")
+        else:
+            print(f"\n{Colors.GRAY}{total_siswa} siswa terdaftar. Ketik awal nama untuk mencari.{Colors.END}")
         
-        # Lebar setiap kolom
-        col_width = 22
+        print(f"\n  {Colors.GRAY}0. Batal{Colors.END}")
         
-        # Print border atas
-        border_top = "┌" + "┬".join(["─" * col_width for _ in range(num_columns)]) + "┐"
-        print(f"\n{Colors.GRAY}{border_top}{Colors.END}")
+        pilih = input(f"\n{Colors.CYAN}→{Colors.END} Pilih nomor atau ketik nama siswa: ").strip()
         
-        # Print data per baris
-        for row in range(rows_per_column):
-            row_data = []
-            for col in range(num_columns):
-                idx = col * rows_per_column + row
-                if idx < total_siswa:
-                    siswa_text = f"{Colors.CYAN}{idx+1:2}.{Colors.END} {self.data_siswa[idx]['nama']:<15}"
-                    row_data.append(siswa_text)
-                else:
-                    row_data.append(" " * col_width)
-            
-            # Print baris dengan separator
-            line = f"{Colors.GRAY}│{Colors.END} " + f" {Colors.GRAY}│{Colors.END} ".join(row_data) + f" {Colors.GRAY}│{Colors.END}"
-            print(line)
+        if not pilih or pilih == '0':
+            return None
         
-        # Print border bawah
-        border_bottom = "└" + "┴".join(["─" * col_width for _ in range(num_columns)]) + "┘"
-        print(f"{Colors.GRAY}{border_bottom}{Colors.END}")
+        if pilih.isdigit():
+            nomor = int(pilih)
+            if 1 <= nomor <= total_siswa:
+                return nomor - 1
+            print(f"{Colors.RED}⚠ Nomor tidak valid!{Colors.END}")
+            return None
         
-        print(f"\n  {Colors.GRAY}0. Batal{Colors.END}")
+        # Cari berdasarkan nama: persis → awalan → mirip
+        siswa = self.indeks_nama.cari(pilih)
+        if siswa is not None:
+            return self.indeks_nama.posisi(siswa)
+        
+        kandidat = self.indeks_nama.cari_awalan(pilih)
+        if len(kandidat) == 1:
+            print(f"{Colors.GREEN}✓ {kandidat[0]['nama']}{Colors.END}")
+            return self.indeks_nama.posisi(kandidat[0])
+        
+        if not kandidat:
+            kandidat = self.indeks_nama.cari_mirip(pilih)
+            if not kandidat:
+                print(f"{Colors.RED}⚠ Siswa '{pilih}' tidak ditemukan!{Colors.END}")
+                return None
+            print(f"\n{Colors.YELLOW}Tidak ada nama '{pilih}'. Mungkin maksud Anda:{Colors.END}")
+        else:
+            print(f"\n{Colors.YELLOW}Ada {len(kandidat)} siswa yang cocok:{Colors.END}")
+        
+        return self._pilih_kandidat(kandidat)
+    
+    def _pilih_kandidat(self, kandidat):
+        """Helper: Minta user memilih satu siswa dari daftar kandidat hasil pencarian"""
+        for i, siswa in enumerate(kandidat, 1):
+            print(f"  {Colors.CYAN}{i}.{Colors.END} {siswa['nama']}")
         
         try:
-            pilih = int(input(f"\n{Colors.CYAN}→{Colors.END} Pilih nomor siswa: "))
+            pilih = int(input(f"\n{Colors.CYAN}→{Colors.END} Pilih (1-{len(kandidat)}), 0=batal: "))
             if pilih == 0:
                 return None
-            if 1 <= pilih <= len(self.data_siswa):
-                return pilih - 1
+            if 1 <= pilih <= len(kandidat):
+                return self.indeks_nama.posisi(kandidat[pilih - 1])
             print(f"{Colors.RED}⚠ Nomor tidak valid!{Colors.END}")
             return None
-        except:
+        except ValueError:
             print(f"{Colors.RED}⚠ Input tidak valid!{Colors.END}")
             return None
     
@@ -708,7 +4753,7 @@ class KasKelas:
         print(f"{Colors.GRAY}└{'─'*88}┘{Colors.END}")
         
         try:
-            jumlah = float(input(f"\n{Colors.CYAN}→{Colors.END} Jumlah (Rp): "))
+            jumlah = parse_jumlah(input(f"\n{Colors.CYAN}→{Colors.END} Jumlah (Rp): "))
             
             if jumlah <= 0:
                 print(f"{Colors.RED}⚠ Jumlah harus > 0!{Colors.END}")
@@ -736,17 +4781,17 @@ class KasKelas:
             else:
                 keterangan = "Setoran Tunai"
             
+            tanggal, ts = waktu_sekarang()
             transaksi = {
-                "tanggal": datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+                "tanggal": tanggal,
                 "jenis": "setor",
                 "jumlah": jumlah,
-                "keterangan": keterangan
+                "keterangan": keterangan,
+                "ts": ts
             }
             
-            siswa['transaksi'].append(transaksi)
-            siswa['saldo'] += jumlah
-            
-            if self.save_data():
+            if self.simpan_perubahan('setor', nama=siswa['nama'], transaksi=transaksi):
+                siswa = self.indeks_nama.cari(siswa['nama'])
                 print(f"\n{Colors.GREEN}╔{'═'*88}╗{Colors.END}")
                 print(f"{Colors.GREEN}║{Colors.END} {Colors.BOLD}✓ PEMASUKAN BERHASIL DICATAT{Colors.END}{' '*59} {Colors.GREEN}║{Colors.END}")
                 print(f"{Colors.GREEN}╠{'═'*88}╣{Colors.END}")
@@ -781,7 +4826,7 @@ class KasKelas:
         print(f"\n{Colors.GRAY}Total saldo kas:{Colors.END} {Colors.GREEN}{self.format_rupiah(total_saldo)}{Colors.END}")
         
         try:
-            jumlah = float(input(f"\n{Colors.CYAN}→{Colors.END} Jumlah pengeluaran (Rp): "))
+            jumlah = parse_jumlah(input(f"\n{Colors.CYAN}→{Colors.END} Jumlah pengeluaran (Rp): "))
             
             if jumlah <= 0:
                 print(f"{Colors.RED}⚠ Jumlah harus > 0!{Colors.END}")
@@ -832,15 +4877,15 @@ class KasKelas:
             if detail:
                 ket = f"{ket} - {detail}"
             
+            tanggal, ts = waktu_sekarang()
             pengeluaran = {
-                "tanggal": datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+                "tanggal": tanggal,
                 "keterangan": ket,
-                "jumlah": jumlah
+                "jumlah": jumlah,
+                "ts": ts
             }
             
-            self.pengeluaran_umum.append(pengeluaran)
-            
-            if self.save_data():
+            if self.simpan_perubahan('keluar', pengeluaran=pengeluaran):
                 print(f"\n{Colors.RED}╔{'═'*88}╗{Colors.END}")
                 print(f"{Colors.RED}║{Colors.END} {Colors.BOLD}✓ PENGELUARAN BERHASIL DICATAT{Colors.END}{' '*57} {Colors.RED}║{Colors.END}")
                 print(f"{Colors.RED}╠{'═'*88}╣{Colors.END}")
@@ -852,6 +4897,154 @@ class KasKelas:
         except ValueError:
             print(f"{Colors.RED}⚠ Input tidak valid!{Colors.END}")
     
+    def baca_csv_transaksi(self, path):
+        """
+        Membaca dan memvalidasi file CSV berisi setoran dan pengeluaran.
+        
+        Kolom: nama, jumlah, keterangan, tanggal (baris header opsional,
+        pemisah ',' atau ';'). Baris dengan nama kosong atau 'KAS UMUM'
+        dianggap pengeluaran, selain itu setoran dari siswa tersebut.
+        Tanggal boleh berformat 'YYYY-MM-DD HH:MM:SS', 'YYYY-MM-DD' atau
+        'DD/MM/YYYY'; jika kosong dipakai waktu saat ini.
+        
+        File dibaca sebagai UTF-8; jika gagal, dibaca ulang sebagai cp1252
+        (CSV dari Excel di Windows).
+        
+        Args:
+            path (str): Lokasi file CSV
+        
+        Returns:
+            tuple: (perubahan, kesalahan) dengan perubahan berupa list (op, isi)
+                   siap untuk simpan_batch, dan kesalahan berupa list
+                   (nomor_baris, pesan)
+        
+        Raises:
+            OSError: Jika file tidak bisa dibuka
+            UnicodeDecodeError: Jika file bukan UTF-8 maupun cp1252
+            csv.Error: Jika isi file bukan CSV yang valid
+        """
+        try:
+            return self._baca_csv_transaksi(path, 'utf-8-sig')
+        except UnicodeDecodeError:
+            return self._baca_csv_transaksi(path, 'cp1252')
+    
+    def _baca_csv_transaksi(self, path, encoding):
+        """Helper: Isi baca_csv_transaksi dengan encoding tertentu"""
+        perubahan = []
+        kesalahan = []
+        
+        with open(path, 'r', encoding=encoding, newline='') as f:
+            contoh = f.read(4096)
+            f.seek(0)
+            try:
+                dialect = csv.Sniffer().sniff(contoh, delimiters=',;')
+            except csv.Error:
+                dialect = csv.excel
+            
+            for nomor_baris, row in enumerate(csv.reader(f, dialect), 1):
+                if not any(cell.strip() for cell in row):
+                    continue
+                if nomor_baris == 1 and row[0].strip().lower() == 'nama':
+                    continue
+                
+                row = [cell.strip() for cell in row] + [''] * (4 - len(row))
+                nama, jumlah_teks, keterangan, tanggal_teks = row[:4]
+                
+                try:
+                    jumlah = parse_jumlah(jumlah_teks)
+                except ValueError:
+                    kesalahan.append((nomor_baris, f"jumlah '{jumlah_teks}' bukan angka"))
+                    continue
+                if jumlah <= 0:
+                    kesalahan.append((nomor_baris, "jumlah harus > 0"))
+                    continue
+                
+                try:
+                    tanggal, ts = self._parse_tanggal_impor(tanggal_teks)
+                except ValueError:
+                    kesalahan.append((nomor_baris, f"tanggal '{tanggal_teks}' tidak dikenali"))
+                    continue
+                
+                if not nama or nama.upper() == 'KAS UMUM':
+                    if not keterangan:
+                        kesalahan.append((nomor_baris, "keterangan pengeluaran wajib diisi"))
+                        continue
+                    perubahan.append(('keluar', {'pengeluaran': {
+                        "tanggal": tanggal, "keterangan": keterangan, "jumlah": jumlah, "ts": ts
+                    }}))
+                else:
+                    siswa = self.indeks_nama.cari(nama)
+                    if siswa is None:
+                        kesalahan.append((nomor_baris, f"siswa '{nama}' tidak ditemukan"))
+                        continue
+                    perubahan.append(('setor', {'nama': siswa['nama'], 'transaksi': {
+                        "tanggal": tanggal, "jenis": "setor", "jumlah": jumlah,
+                        "keterangan": keterangan or "Setoran Tunai", "ts": ts
+                    }}))
+        
+        return perubahan, kesalahan
+    
+    def _parse_tanggal_impor(self, teks):
+        """Helper: Tanggal dari CSV → (string '%Y-%m-%d %H:%M:%S', ts)"""
+        if not teks:
+            return waktu_sekarang()
+        waktu, _ = parse_tanggal_user(teks)
+        return waktu.strftime('%Y-%m-%d %H:%M:%S'), calendar.timegm(waktu.timetuple())
+    
+    def impor_csv(self):
+        """
+        Mengimpor banyak setoran dan pengeluaran sekaligus dari file CSV.
+        
+        Proses:
+        1. Meminta lokasi file CSV
+        2. Membaca dan memvalidasi semua baris (lihat baca_csv_transaksi)
+        3. Menampilkan kesalahan per baris (jika ada)
+        4. Setelah konfirmasi, semua baris valid diterapkan lalu disimpan
+           dalam satu kali tulis
+        """
+        self.clear_screen()
+        self.print_box_header("IMPOR TRANSAKSI (CSV)", "📥")
+        
+        print(f"\n{Colors.GRAY}Format kolom: nama, jumlah, keterangan, tanggal{Colors.END}")
+        print(f"{Colors.GRAY}Nama kosong atau 'KAS UMUM' = pengeluaran{Colors.END}")
+        
+        path = input(f"\n{Colors.CYAN}→{Colors.END} Lokasi file CSV: ").strip().strip('"')
+        if not path:
+            print(f"{Colors.YELLOW}⚠ Batal{Colors.END}")
+            return
+        
+        try:
+            perubahan, kesalahan = self.baca_csv_transaksi(path)
+        except (OSError, UnicodeDecodeError, csv.Error) as e:
+            print(f"{Colors.RED}⚠ File tidak bisa dibaca: {e}{Colors.END}")
+            return
+        
+        if kesalahan:
+            print(f"\n{Colors.RED}⚠ {len(kesalahan)} baris tidak valid:{Colors.END}")
+            for nomor_baris, pesan in kesalahan:
+                print(f"  {Colors.GRAY}Baris {nomor_baris}:{Colors.END} {pesan}")
+        
+        if not perubahan:
+            print(f"\n{Colors.YELLOW}⚠ Tidak ada baris yang bisa diimpor{Colors.END}")
+            return
+        
+        jumlah_setor = sum(1 for op, _ in perubahan if op == 'setor')
+        total_setor = sum(isi['transaksi']['jumlah'] for op, isi in perubahan if op == 'setor')
+        total_keluar = sum(isi['pengeluaran']['jumlah'] for op, isi in perubahan if op == 'keluar')
+        
+        print(f"\n{Colors.BOLD}Siap diimpor:{Colors.END}")
+        print(f"  {Colors.GRAY}• Setoran:{Colors.END} {jumlah_setor} baris, {Colors.GREEN}{self.format_rupiah(total_setor)}{Colors.END}")
+        print(f"  {Colors.GRAY}• Pengeluaran:{Colors.END} {len(perubahan) - jumlah_setor} baris, {Colors.RED}{self.format_rupiah(total_keluar)}{Colors.END}")
+        
+        konfirm = input(f"\n{Colors.YELLOW}Impor {len(perubahan)} transaksi? (y/n):{Colors.END} ")
+        if konfirm.lower() != 'y':
+            print(f"{Colors.GREEN}✓ Batal{Colors.END}")
+            return
+        
+        if self.simpan_batch(perubahan):
+            print(f"\n{Colors.GREEN}✓ {len(perubahan)} transaksi berhasil diimpor!{Colors.END}")
+            print(f"  {Colors.GRAY}Saldo kas: {self.format_rupiah(self.hitung_total_saldo())}{Colors.END}")
+    
     # ========== LAPORAN ==========
     def lihat_saldo(self):
         """
@@ -867,9 +5060,9 @@ class KasKelas:
         self.clear_screen()
         self.print_box_header("RINGKASAN SALDO", "💵")
         
-        total_pemasukan = sum(siswa['saldo'] for siswa in self.data_siswa)
-        total_pengeluaran = sum(p['jumlah'] for p in self.pengeluaran_umum)
-        saldo_akhir = total_pemasukan - total_pengeluaran
+        total_pemasukan = self.ringkasan.total_pemasukan
+        total_pengeluaran = self.ringkasan.total_pengeluaran
+        saldo_akhir = self.ringkasan.saldo
         
         # Data ringkasan utama
         ringkasan_utama = [
@@ -883,20 +5076,24 @@ class KasKelas:
         # Detail saldo per siswa
         print(f"\n{Colors.BOLD}DETAIL SALDO PER SISWA{Colors.END}")
         
-        siswa_data = []
-        for i, siswa in enumerate(self.data_siswa, 1):
-            saldo_color = Colors.GREEN if siswa['saldo'] > 0 else Colors.GRAY
-            siswa_data.append([
-                f"{Colors.CYAN}{i}{Colors.END}",
-                siswa['nama'],
-                f"{saldo_color}{self.format_rupiah(siswa['saldo'])}{Colors.END}"
-            ])
-        
-        self.buat_tabel_dinamis(
-            siswa_data,
-            headers=['No', 'Nama', 'Saldo'],
-            border_color=Colors.GRAY
-        )
+        def baris_siswa():
+            for i, siswa in enumerate(self.data_siswa, 1):
+                saldo_color = Colors.GREEN if siswa['saldo'] > 0 else Colors.GRAY
+                yield (
+                    f"{Colors.CYAN}{i}{Colors.END}",
+                    siswa['nama'],
+                    f"{saldo_color}{self.format_rupiah(siswa['saldo'])}{Colors.END}"
+                )
+        
+        if self.data_siswa:
+            self.buat_tabel_stream(
+                baris_siswa(),
+                self._lebar_kolom_siswa(),
+                headers=['No', 'Nama', 'Saldo'],
+                border_color=Colors.GRAY
+            )
+        else:
+            print(f"{Colors.YELLOW}⚠ Tidak ada data untuk ditampilkan{Colors.END}")
         
         # Saldo akhir dengan border lebih teb
         saldo_color = Colors.GREEN if saldo_akhir >= 0 else Colors.RED
@@ -909,8 +5106,7 @@ class KasKelas:
         
         # Footer statistik
         print(f"\n{Colors.GRAY}• Jumlah Siswa: {Colors.WHITE}{len(self.data_siswa)} orang{Colors.END}")
-        total_transaksi = sum(len(siswa['transaksi']) for siswa in self.data_siswa) + len(self.pengeluaran_umum)
-        print(f"{Colors.GRAY}• Total Transaksi: {Colors.WHITE}{total_transaksi}{Colors.END}")
+        print(f"{Colors.GRAY}• Total Transaksi: {Colors.WHITE}{self.ringkasan.jumlah_transaksi}{Colors.END}")
 
 
     def lihat_transaksi_siswa(self):
@@ -920,8 +5116,9 @@ class KasKelas:
         Proses:
         1. Memilih siswa dari daftar
         2. Menampilkan informasi siswa (nama dan saldo)
-        3. Menampilkan semua transaksi dalam format buku tabungan
-            dengan kolom Debet (pengeluaran) dan Kredit (pemasukan)
+        3. Menampilkan transaksi per halaman dalam format buku tabungan
+            dengan kolom Debet (pengeluaran) dan Kredit (pemasukan),
+            lihat tampilkan_halaman
         4. Menampilkan ringkasan total transaksi dan saldo akhir
         """
         self.clear_screen()
@@ -929,46 +5126,54 @@ class KasKelas:
         
         idx = self.pilih_siswa()
         if idx is None:
+            self.pause()
             return
         
         siswa = self.data_siswa[idx]
         
-        print(f"\n{Colors.CYAN}╔{'═'*88}╗{Colors.END}")
-        print(f"{Colors.CYAN}║{Colors.END} {Colors.BOLD}Nama:{Colors.END} {siswa['nama']:<81} {Colors.CYAN}║{Colors.END}")
-        print(f"{Colors.CYAN}║{Colors.END} {Colors.BOLD}Saldo Akhir:{Colors.END} {Colors.GREEN}{self.format_rupiah(siswa['saldo']):<73}{Colors.END} {Colors.CYAN}║{Colors.END}")
-        print(f"{Colors.CYAN}╚{'═'*88}╝{Colors.END}")
+        info_siswa = [
+            f"\n{Colors.CYAN}╔{'═'*88}╗{Colors.END}",
+            f"{Colors.CYAN}║{Colors.END} {Colors.BOLD}Nama:{Colors.END} {siswa['nama']:<81} {Colors.CYAN}║{Colors.END}",
+            f"{Colors.CYAN}║{Colors.END} {Colors.BOLD}Saldo Akhir:{Colors.END} {Colors.GREEN}{self.format_rupiah(siswa['saldo']):<73}{Colors.END} {Colors.CYAN}║{Colors.END}",
+            f"{Colors.CYAN}╚{'═'*88}╝{Colors.END}"
+        ]
         
         if not siswa['transaksi']:
+            print('\n'.join(info_siswa))
             print(f"\n{Colors.YELLOW}⚠ Belum ada transaksi{Colors.END}")
+            self.pause()
             return
         
-        # Header seperti buku tabungan
-        print(f"\n{Colors.GRAY}{'No':<4} {'Tanggal':<20} {'Keterangan/Uraian':<30} {'Debet (DB)':<18} {'Kredit (KR)':<18}{Colors.END}")
-        self.print_separator()
-        
-        saldo_berjalan = 0
+        if self.storage.mendukung_query:
+            riwayat = self.storage.riwayat_siswa(siswa['nama'])
+        else:
+            riwayat = siswa['transaksi']
         
-        for i, t in enumerate(siswa['transaksi'], 1):
-            tanggal = t['tanggal']
+        def format_baris(i, t):
             jenis = t['jenis']
-            jumlah = t['jumlah']
             ket = t.get('keterangan', 'Setoran Tunai' if jenis == 'setor' else 'Penarikan')
             
             # Tentukan Debet atau Kredit
             if jenis == 'setor':
                 debet = '-'
-                kredit = f"{Colors.GREEN}{self.format_rupiah(jumlah)}{Colors.END}"
-                saldo_berjalan += jumlah
+                kredit = f"{Colors.GREEN}{self.format_rupiah(t['jumlah'])}{Colors.END}"
             else:
-                debet = f"{Colors.RED}{self.format_rupiah(jumlah)}{Colors.END}"
+                debet = f"{Colors.RED}{self.format_rupiah(t['jumlah'])}{Colors.END}"
                 kredit = '-'
-                saldo_berjalan -= jumlah
             
-            print(f"{Colors.CYAN}{i:<4}{Colors.END} {tanggal:<20} {ket:<30} {debet:<28} {kredit:<28}")
+            return f"{Colors.CYAN}{i:<4}{Colors.END} {t['tanggal']:<20} {ket:<30} {debet:<28} {kredit:<28}"
         
-        self.print_separator()
-        print(f"\n{Colors.GRAY}• Total Transaksi: {Colors.WHITE}{len(siswa['transaksi'])}{Colors.END}")
-        print(f"{Colors.GRAY}• Saldo Akhir: {Colors.GREEN}{self.format_rupiah(siswa['saldo'])}{Colors.END}")
+        # Header seperti buku tabungan
+        self.tampilkan_halaman(
+            BarisDaftar(riwayat), "TRANSAKSI PER SISWA", "📋",
+            f"{Colors.GRAY}{'No':<4} {'Tanggal':<20} {'Keterangan/Uraian':<30} {'Debet (DB)':<18} {'Kredit (KR)':<18}{Colors.END}",
+            format_baris,
+            pembuka=info_siswa,
+            penutup=[
+                f"{Colors.GRAY}• Total Transaksi: {Colors.WHITE}{len(riwayat)}{Colors.END}   "
+                f"{Colors.GRAY}• Saldo Akhir: {Colors.GREEN}{self.format_rupiah(siswa['saldo'])}{Colors.END}"
+            ]
+        )
     
     def lihat_semua_transaksi(self):
         """
@@ -978,59 +5183,103 @@ class KasKelas:
         - Semua transaksi siswa (pemasukan)
         - Semua pengeluaran umum
         
-        Transaksi diurutkan berdasarkan waktu (chronological order).
-        Menampilkan tanggal, jam, nama, jenis, dan keterangan setiap transaksi.
+        Transaksi diurutkan berdasarkan waktu (chronological order) dan
+        ditampilkan per halaman (lihat tampilkan_halaman): hanya baris pada
+        halaman yang terlihat yang diambil dari sumber_semua_transaksi dan
+        diformat. Menampilkan tanggal, jam, nama, jenis, dan keterangan
+        setiap transaksi.
         """
+        sumber = self.sumber_semua_transaksi()
+        
+        def format_baris(no, t):
+            # Pisahkan tanggal dan jam
+            tanggal, jam = pisah_tanggal_jam(t['ts'])
+            
+            if t['is_income']:
+                jenis = f"{Colors.GREEN}{'Pemasukan':<12}{Colors.END}"
+            else:
+                jenis = f"{Colors.RED}{'Pengeluaran':<12}{Colors.END}"
+            
+            return f"{Colors.CYAN}{no:<4}{Colors.END} {tanggal:<12} {jam:<10} {t['nama']:<12} {jenis} {t['keterangan']:<25}"
+        
         self.clear_screen()
-        self.print_box_header("SEMUA TRANSAKSI", "📊")
+        self.tampilkan_halaman(
+            sumber, "SEMUA TRANSAKSI", "📊",
+            f"{Colors.GRAY}{'No':<4} {'Tanggal':<12} {'Jam':<10} {'Nama':<12} {'Jenis':<12} {'Keterangan':<25}{Colors.END}",
+            format_baris,
+            penutup=[
+                f"{Colors.GRAY}• Total Transaksi: {Colors.WHITE}{len(sumber)}{Colors.END}   "
+                f"{Colors.GRAY}• Saldo Kas: {Colors.GREEN}{self.format_rupiah(self.hitung_total_saldo())}{Colors.END}"
+            ]
+        )
+    
+    def sumber_semua_transaksi(self):
+        """
+        Sumber baris semua transaksi yang bisa diakses per posisi.
         
-        # Kumpulkan semua transaksi dengan info lengkap
-        semua_transaksi = []
+        Untuk penyimpanan yang mendukung query, halaman diambil lewat SQL;
+        selain itu setoran dibaca dari IndeksWaktu (dibangun saat pertama
+        kali dibutuhkan) dan digabung dengan pengeluaran umum per halaman.
         
-        # Transaksi siswa
-        for siswa in self.data_siswa:
-            for t in siswa['transaksi']:
-                semua_transaksi.append({
-                    'tanggal': t['tanggal'],
-                    'nama': siswa['nama'],
-                    'jenis': 'Pemasukan',
-                    'keterangan': t.get('keterangan', 'Setoran Tunai'),
-                    'debet': '-',
-                    'kredit': self.format_rupiah(t['jumlah']),
-                    'is_income': True
-                })
+        Returns:
+            BarisQuery | BarisGabungan: Sumber untuk tampilkan_halaman, urutan
+                                        sama dengan iter_semua_transaksi
+        """
+        if self.storage.mendukung_query:
+            return BarisQuery(self.storage)
+        if not self.indeks_waktu.siap:
+            self.indeks_waktu.bangun_ulang(self.data_siswa)
+        return BarisGabungan(self.indeks_waktu, self.pengeluaran_umum)
+    
+    def iter_semua_transaksi(self, sekali_jalan=False):
+        """
+        Menghasilkan semua transaksi siswa dan pengeluaran umum, urut berdasarkan tanggal.
+        
+        Riwayat setiap siswa dan daftar pengeluaran sudah tersimpan urut sesuai
+        waktu dicatat, jadi cukup digabung (k-way merge dengan heap) tanpa
+        perlu sorting ulang. Baris dihasilkan satu per satu (lazy), sehingga
+        memori tetap kecil dan baris pertama bisa langsung ditampilkan.
+        
+        Args:
+            sekali_jalan (bool): Riwayat yang belum dibuka tidak disimpan di
+                                 memori setelahnya (untuk export, lihat isi_riwayat)
+        
+        Yields:
+            dict: {'tanggal', 'ts', 'nama', 'jumlah', 'keterangan', 'is_income'}
+        """
+        if self.storage.mendukung_query:
+            # Query ber-index, hasil sudah urut berdasarkan tanggal
+            yield from self.storage.semua_transaksi()
+            return
         
-        # Pengeluaran umum
-        for p in self.pengeluaran_umum:
-            semua_transaksi.append({
+        sumber = [self._iter_transaksi_siswa(siswa, sekali_jalan) for siswa in self.data_siswa if siswa['transaksi']]
+        sumber.append(self._iter_pengeluaran(sekali_jalan))
+        yield from heapq.merge(*sumber, key=lambda t: t['ts'])
+    
+    def _iter_transaksi_siswa(self, siswa, sekali_jalan=False):
+        """Helper: Baris transaksi satu siswa untuk iter_semua_transaksi"""
+        nama = siswa['nama']
+        for t in isi_riwayat(siswa['transaksi']) if sekali_jalan else siswa['transaksi']:
+            yield {
+                'tanggal': t['tanggal'],
+                'ts': t['ts'],
+                'nama': nama,
+                'jumlah': t['jumlah'],
+                'keterangan': t.get('keterangan', 'Setoran Tunai'),
+                'is_income': True
+            }
+    
+    def _iter_pengeluaran(self, sekali_jalan=False):
+        """Helper: Baris pengeluaran umum untuk iter_semua_transaksi"""
+        for p in isi_riwayat(self.pengeluaran_umum) if sekali_jalan else self.pengeluaran_umum:
+            yield {
                 'tanggal': p['tanggal'],
+                'ts': p['ts'],
                 'nama': 'KAS UMUM',
-                'jenis': 'Pengeluaran',
+                'jumlah': p['jumlah'],
                 'keterangan': p['keterangan'],
-                'debet': self.format_rupiah(p['jumlah']),
-                'kredit': '-',
                 'is_income': False
-            })
-        
-        # Urutkan berdasarkan tanggal (terlama ke terbaru)
-        semua_transaksi.sort(key=lambda x: x['tanggal'])
-        
-        print(f"\n{Colors.GRAY}{'No':<4} {'Tanggal':<12} {'Jam':<10} {'Nama':<12} {'Jenis':<12} {'Keterangan':<25}{Colors.END}")
-        self.print_separator()
-        
-        for no, t in enumerate(semua_transaksi, 1):
-            # Pisahkan tanggal dan jam
-            tanggal_obj = datetime.strptime(t['tanggal'], '%Y-%m-%d %H:%M:%S')
-            tanggal = tanggal_obj.strftime('%d/%m/%Y')
-            jam = tanggal_obj.strftime('%H:%M:%S')
-            
-            jenis_color = Colors.GREEN if t['is_income'] else Colors.RED
-            
-            print(f"{Colors.CYAN}{no:<4}{Colors.END} {tanggal:<12} {jam:<10} {t['nama']:<12} {jenis_color}{t['jenis']:<12}{Colors.END} {t['keterangan']:<25}")
-        
-        self.print_separator()
-        print(f"\n{Colors.GRAY}• Total Transaksi: {Colors.WHITE}{len(semua_transaksi)}{Colors.END}")
-        print(f"{Colors.GRAY}• Saldo Kas: {Colors.GREEN}{self.format_rupiah(self.hitung_total_saldo())}{Colors.END}")
+            }
     
     def lihat_laporan_siswa(self):
         """
@@ -1057,17 +5306,10 @@ class KasKelas:
             print(f"\n{Colors.YELLOW}⚠ Belum ada siswa{Colors.END}")
             return
         
-        # Hitung statistik
-        sudah_bayar = 0
-        belum_bayar = 0
-        total_kas = 0
-        
-        for siswa in self.data_siswa:
-            if siswa['saldo'] > 0:
-                sudah_bayar += 1
-            else:
-                belum_bayar += 1
-            total_kas += siswa['saldo']
+        # Statistik dari ringkasan
+        sudah_bayar = self.ringkasan.sudah_bayar
+        belum_bayar = self.ringkasan.belum_bayar
+        total_kas = self.ringkasan.total_pemasukan
         
         # Hitung persentase
         persen_sudah = (sudah_bayar / len(self.data_siswa) * 100) if len(self.data_siswa) > 0 else 0
@@ -1089,38 +5331,484 @@ class KasKelas:
                 f"{Colors.WHITE}{self.format_rupiah(rata_rata)}{Colors.END}"
             ])
         
-        # Tampilkan tabel ringkasan dengan border cyan
-        print(f"\n{Colors.BOLD}RINGKASAN{Colors.END}")
-        self.buat_tabel_dinamis(ringkasan_data, border_color=Colors.CYAN)
+        # Tampilkan tabel ringkasan dengan border cyan
+        print(f"\n{Colors.BOLD}RINGKASAN{Colors.END}")
+        self.buat_tabel_dinamis(ringkasan_data, border_color=Colors.CYAN)
+        
+        # Tampilkan detail per siswa
+        print(f"\n{Colors.BOLD}DETAIL PER SISWA{Colors.END}")
+        
+        def baris_siswa():
+            for i, siswa in enumerate(self.data_siswa, 1):
+                jml_transaksi = len(siswa['transaksi'])
+                
+                if siswa['saldo'] > 0:
+                    status = f"{Colors.GREEN}✓ Sudah Bayar{Colors.END}"
+                    saldo_display = f"{Colors.GREEN}{self.format_rupiah(siswa['saldo'])}{Colors.END}"
+                else:
+                    status = f"{Colors.YELLOW}⚠ Belum Bayar{Colors.END}"
+                    saldo_display = f"{Colors.GRAY}{self.format_rupiah(siswa['saldo'])}{Colors.END}"
+                
+                yield (
+                    f"{Colors.CYAN}{i}{Colors.END}",
+                    siswa['nama'],
+                    str(jml_transaksi),
+                    saldo_display,
+                    status
+                )
+        
+        # Tampilkan tabel siswa dengan header (baris dibuat satu per satu)
+        lebar_no, lebar_nama, lebar_saldo = self._lebar_kolom_siswa()
+        lebar_transaksi = max((len(str(len(siswa['transaksi']))) for siswa in self.data_siswa), default=1)
+        self.buat_tabel_stream(
+            baris_siswa(),
+            [lebar_no, lebar_nama, lebar_transaksi, lebar_saldo, len('✓ Sudah Bayar')],
+            headers=['No', 'Nama', 'Transaksi', 'Saldo', 'Status'],
+            border_color=Colors.GRAY
+        )
+    
+    # ========== EXPORT ==========
+    
+    def baris_export(self, laporan, siswa=None):
+        """
+        Menghasilkan baris laporan untuk export, satu per satu.
+        
+        Jenis laporan:
+            transaksi : semua setoran dan pengeluaran, urut tanggal
+                        (lihat iter_semua_transaksi)
+            siswa     : rekening per siswa, berisi saldo berjalan setelah
+                        setiap transaksi
+            status    : status bayar semua siswa (seperti Laporan Status Siswa)
+        
+        Urutan kolom transaksi sama dengan format Impor Transaksi (CSV),
+        sehingga hasil export CSV bisa diimpor lagi. Riwayat yang belum
+        pernah dibuka tidak ditahan di memori setelah export (lihat isi_riwayat).
+        
+        Args:
+            laporan (str): Salah satu key KOLOM_EXPORT
+            siswa (dict): Untuk laporan 'siswa': hanya siswa ini (default: semua)
+        
+        Yields:
+            dict: Satu baris dengan key sesuai KOLOM_EXPORT[laporan]
+        """
+        if laporan == 'transaksi':
+            for t in self.iter_semua_transaksi(sekali_jalan=True):
+                yield {
+                    'nama': t['nama'],
+                    'jumlah': t['jumlah'],
+                    'keterangan': t['keterangan'],
+                    'tanggal': t['tanggal'],
+                    'jenis': 'pemasukan' if t['is_income'] else 'pengeluaran'
+                }
+        elif laporan == 'siswa':
+            for data in [siswa] if siswa is not None else self.data_siswa:
+                saldo = 0
+                for t in isi_riwayat(data['transaksi']):
+                    saldo += t['jumlah']
+                    yield {
+                        'nama': data['nama'],
+                        'jumlah': t['jumlah'],
+                        'keterangan': t.get('keterangan', 'Setoran Tunai'),
+                        'tanggal': t['tanggal'],
+                        'jenis': t.get('jenis', 'setor'),
+                        'saldo': saldo
+                    }
+        else:
+            for data in self.data_siswa:
+                yield {
+                    'nama': data['nama'],
+                    'transaksi': len(data['transaksi']),
+                    'saldo': data['saldo'],
+                    'status': 'sudah_bayar' if data['saldo'] > 0 else 'belum_bayar'
+                }
+    
+    def export_data(self):
+        """
+        Menyimpan laporan ke file CSV atau JSON Lines.
+        
+        Proses:
+        1. Memilih laporan: semua transaksi, rekening per siswa, atau status siswa
+        2. Untuk rekening per siswa, memilih satu siswa atau semua siswa
+        3. Memilih format dan lokasi file (default: folder database)
+        4. Baris ditulis langsung ke file satu per satu (lihat tulis_export)
+        """
+        self.clear_screen()
+        self.print_box_header("EXPORT DATA", "📤")
+        
+        print(f"\n  {Colors.CYAN}1.{Colors.END} Semua transaksi (urut tanggal)")
+        print(f"  {Colors.CYAN}2.{Colors.END} Rekening per siswa")
+        print(f"  {Colors.CYAN}3.{Colors.END} Status siswa")
+        pilih = input(f"\n{Colors.CYAN}→{Colors.END} Pilih laporan: ").strip()
+        laporan = {'1': 'transaksi', '2': 'siswa', '3': 'status'}.get(pilih)
+        if laporan is None:
+            print(f"{Colors.YELLOW}⚠ Batal{Colors.END}")
+            return
+        
+        siswa = None
+        if laporan == 'siswa':
+            nama = input(f"{Colors.CYAN}→{Colors.END} Nama siswa (Enter=semua siswa): ").strip()
+            if nama:
+                siswa = self.indeks_nama.cari(nama)
+                if siswa is None:
+                    print(f"{Colors.RED}⚠ Siswa '{nama}' tidak ditemukan!{Colors.END}")
+                    return
+        
+        pilih = input(f"{Colors.CYAN}→{Colors.END} Format (1=CSV, 2=JSON Lines) [1]: ").strip()
+        format_file = 'jsonl' if pilih == '2' else 'csv'
+        
+        bawaan = os.path.join(self.data_dir, f"export_{laporan}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{format_file}")
+        print(f"{Colors.GRAY}Enter = {bawaan}{Colors.END}")
+        path = input(f"{Colors.CYAN}→{Colors.END} Lokasi file: ").strip().strip('"') or bawaan
+        
+        mulai = time.perf_counter()
+        try:
+            with open(path, 'w', encoding='utf-8-sig' if format_file == 'csv' else 'utf-8', newline='') as f:
+                jumlah = tulis_export(self.baris_export(laporan, siswa), f, format_file, self.KOLOM_EXPORT[laporan])
+        except OSError as e:
+            print(f"{Colors.RED}⚠ File tidak bisa ditulis: {e}{Colors.END}")
+            return
+        
+        print(f"\n{Colors.GREEN}✓ {jumlah} baris ditulis ke {path}{Colors.END}")
+        print(f"  {Colors.GRAY}Waktu: {(time.perf_counter() - mulai) * 1000:.0f} ms{Colors.END}")
+    
+    # ========== PENCARIAN ==========
+    
+    def cari_transaksi_tanggal(self):
+        """
+        Menampilkan transaksi dalam rentang tanggal tertentu.
+        
+        Proses:
+        1. Meminta tanggal awal dan akhir (Enter = tanpa batas)
+        2. Meminta filter: semua, setoran saja, pengeluaran saja,
+           atau setoran satu siswa
+        3. Menampilkan transaksi yang cocok beserta total pemasukan,
+           pengeluaran dan selisihnya (lihat cari_rentang)
+        """
+        self.clear_screen()
+        self.print_box_header("CARI TRANSAKSI PER TANGGAL", "🗓")
+        
+        print(f"\n{Colors.GRAY}Format tanggal: YYYY-MM-DD atau dd/mm/yyyy{Colors.END}")
+        try:
+            dari = input(f"\n{Colors.CYAN}→{Colors.END} Dari tanggal (Enter=paling awal): ").strip()
+            awal = parse_batas_tanggal(dari) if dari else 0
+            sampai = input(f"{Colors.CYAN}→{Colors.END} Sampai tanggal (Enter=paling akhir): ").strip()
+            akhir = parse_batas_tanggal(sampai, akhir_hari=True) if sampai else sys.maxsize
+        except ValueError:
+            print(f"{Colors.RED}⚠ Format tanggal tidak valid!{Colors.END}")
+            return
+        if awal > akhir:
+            print(f"{Colors.RED}⚠ Tanggal awal setelah tanggal akhir!{Colors.END}")
+            return
+        
+        print(f"\n  {Colors.CYAN}1.{Colors.END} Semua transaksi")
+        print(f"  {Colors.CYAN}2.{Colors.END} Setoran saja")
+        print(f"  {Colors.CYAN}3.{Colors.END} Pengeluaran saja")
+        print(f"  {Colors.CYAN}4.{Colors.END} Setoran satu siswa")
+        pilihan = input(f"\n{Colors.CYAN}→{Colors.END} Pilih filter (Enter=semua): ").strip()
+        
+        nama = None
+        jenis = {'': None, '1': None, '2': 'setor', '3': 'keluar', '4': 'setor'}.get(pilihan, '?')
+        if jenis == '?':
+            print(f"{Colors.RED}⚠ Pilihan tidak valid!{Colors.END}")
+            return
+        if pilihan == '4':
+            idx = self.pilih_siswa()
+            if idx is None:
+                return
+            nama = self.data_siswa[idx]['nama']
+        
+        print(f"\n{Colors.GRAY}{'No':<4} {'Tanggal':<12} {'Jam':<10} {'Nama':<12} {'Jumlah':<14} {'Keterangan':<25}{Colors.END}")
+        self.print_separator()
+        
+        no = 0
+        total_masuk = total_keluar = 0
+        for no, t in enumerate(self.cari_rentang(awal, akhir, nama, jenis), 1):
+            tanggal, jam = pisah_tanggal_jam(t['ts'])
+            if t['is_income']:
+                total_masuk += t['jumlah']
+                jumlah = f"{Colors.GREEN}{'+' + self.format_rupiah(t['jumlah']):<14}{Colors.END}"
+            else:
+                total_keluar += t['jumlah']
+                jumlah = f"{Colors.RED}{'-' + self.format_rupiah(t['jumlah']):<14}{Colors.END}"
+            print(f"{Colors.CYAN}{no:<4}{Colors.END} {tanggal:<12} {jam:<10} {t['nama']:<12} {jumlah} {t['keterangan']:<25}")
+        
+        self.print_separator()
+        if not no:
+            print(f"{Colors.YELLOW}⚠ Tidak ada transaksi dalam rentang ini{Colors.END}")
+            return
+        selisih = total_masuk - total_keluar
+        print(f"\n{Colors.GRAY}• Jumlah Transaksi: {Colors.WHITE}{no}{Colors.END}")
+        print(f"{Colors.GRAY}• Pemasukan: {Colors.GREEN}{self.format_rupiah(total_masuk)}{Colors.END}")
+        print(f"{Colors.GRAY}• Pengeluaran: {Colors.RED}{self.format_rupiah(total_keluar)}{Colors.END}")
+        print(f"{Colors.GRAY}• Selisih: {Colors.GREEN if selisih >= 0 else Colors.RED}{self.format_rupiah(selisih)}{Colors.END}")
+    
+    def cari_transaksi_keterangan(self):
+        """
+        Mencari transaksi berdasarkan kata di keterangan.
+        
+        Menampilkan setoran dan pengeluaran yang keterangannya memuat semua
+        kata yang diketik (awal kata cukup, misal 'foto' untuk 'Fotokopi'),
+        beserta total pemasukan dan pengeluarannya. User bisa mencari
+        berulang kali sampai menekan Enter tanpa kata kunci.
+        """
+        self.clear_screen()
+        self.print_box_header("CARI KETERANGAN TRANSAKSI", "🔍")
+        
+        while True:
+            kata_kunci = input(f"\n{Colors.CYAN}→{Colors.END} Kata kunci (Enter=selesai): ").strip()
+            if not kata_kunci:
+                return
+            if not token_teks(kata_kunci):
+                print(f"{Colors.RED}⚠ Kata kunci harus berisi huruf atau angka!{Colors.END}")
+                continue
+            
+            hasil = self.cari_keterangan(kata_kunci)
+            if not hasil:
+                print(f"{Colors.YELLOW}⚠ Tidak ada transaksi dengan keterangan '{kata_kunci}'{Colors.END}")
+                continue
+            
+            print(f"\n{Colors.GRAY}{'No':<4} {'Tanggal':<12} {'Nama':<12} {'Jumlah':<14} {'Keterangan':<25}{Colors.END}")
+            self.print_separator()
+            total_masuk = total_keluar = 0
+            for no, t in enumerate(hasil, 1):
+                tanggal, _ = pisah_tanggal_jam(t['ts'])
+                if t['is_income']:
+                    total_masuk += t['jumlah']
+                    jumlah = f"{Colors.GREEN}{'+' + self.format_rupiah(t['jumlah']):<14}{Colors.END}"
+                else:
+                    total_keluar += t['jumlah']
+                    jumlah = f"{Colors.RED}{'-' + self.format_rupiah(t['jumlah']):<14}{Colors.END}"
+                print(f"{Colors.CYAN}{no:<4}{Colors.END} {tanggal:<12} {t['nama']:<12} {jumlah} {t['keterangan']:<25}")
+            self.print_separator()
+            
+            print(f"{Colors.GRAY}• Ditemukan: {Colors.WHITE}{len(hasil)} transaksi{Colors.END}")
+            print(f"{Colors.GRAY}• Pemasukan: {Colors.GREEN}{self.format_rupiah(total_masuk)}{Colors.END}"
+                  f"   {Colors.GRAY}• Pengeluaran: {Colors.RED}{self.format_rupiah(total_keluar)}{Colors.END}")
+    
+    # ========== ARUS KAS ==========
+    
+    def lihat_arus_kas(self):
+        """
+        Menampilkan laporan arus kas per bulan atau per minggu.
+        
+        Menampilkan:
+        - Pemasukan, pengeluaran, selisih dan saldo berjalan setiap periode
+        - Rincian satu periode: pemasukan per siswa dan per keterangan
+        
+        Data diambil dari rekap periode (lihat rekap_periode), jadi biayanya
+        sebanding dengan jumlah periode, bukan jumlah transaksi.
+        """
+        self.clear_screen()
+        self.print_box_header("ARUS KAS PER PERIODE", "📅")
+        
+        print(f"\n  {Colors.CYAN}1.{Colors.END} Per bulan")
+        print(f"  {Colors.CYAN}2.{Colors.END} Per minggu")
+        pilihan = input(f"\n{Colors.CYAN}→{Colors.END} Pilih (Enter=per bulan): ").strip()
+        if pilihan not in ('', '1', '2'):
+            print(f"{Colors.RED}⚠ Pilihan tidak valid!{Colors.END}")
+            return
+        
+        rekap = self.rekap_periode()
+        mingguan = pilihan == '2'
+        tabel = rekap.minggu if mingguan else rekap.bulan
+        if not tabel:
+            print(f"\n{Colors.YELLOW}⚠ Belum ada transaksi{Colors.END}")
+            return
+        
+        rows = []
+        saldo_berjalan = 0
+        for kunci in sorted(tabel):
+            periode = tabel[kunci]
+            selisih = periode['pemasukan'] - periode['pengeluaran']
+            saldo_berjalan += selisih
+            warna = Colors.GREEN if selisih >= 0 else Colors.RED
+            rows.append([
+                f"{Colors.CYAN}{kunci}{Colors.END}",
+                f"{Colors.GREEN}{self.format_rupiah(periode['pemasukan'])}{Colors.END}",
+                f"{Colors.RED}{self.format_rupiah(periode['pengeluaran'])}{Colors.END}",
+                f"{warna}{self.format_rupiah(selisih)}{Colors.END}",
+                self.format_rupiah(saldo_berjalan)
+            ])
+        
+        print(f"\n{Colors.BOLD}ARUS KAS {'MINGGUAN' if mingguan else 'BULANAN'}{Colors.END}")
+        self.buat_tabel_dinamis(rows, headers=['Periode', 'Pemasukan', 'Pengeluaran', 'Selisih', 'Saldo Akhir'])
+        
+        while True:
+            contoh = max(tabel)
+            kunci = input(f"\n{Colors.CYAN}→{Colors.END} Rincian periode (misal {contoh}, Enter=selesai): ").strip().upper()
+            if not kunci:
+                return
+            if kunci not in tabel:
+                print(f"{Colors.RED}⚠ Periode '{kunci}' tidak ada transaksi{Colors.END}")
+                continue
+            self._rincian_periode(kunci, tabel[kunci])
+    
+    def _rincian_periode(self, kunci, periode):
+        """Helper: Tabel pemasukan per siswa dan per keterangan untuk satu periode"""
+        print(f"\n{Colors.BOLD}RINCIAN {kunci}{Colors.END}")
+        print(f"{Colors.GRAY}• Pemasukan: {Colors.GREEN}{self.format_rupiah(periode['pemasukan'])}{Colors.END}"
+              f"   {Colors.GRAY}• Pengeluaran: {Colors.RED}{self.format_rupiah(periode['pengeluaran'])}{Colors.END}")
+        
+        if periode['per_siswa']:
+            print(f"\n{Colors.BOLD}Pemasukan per siswa{Colors.END}")
+            self.buat_tabel_dinamis(
+                [[nama, f"{Colors.GREEN}{self.format_rupiah(jumlah)}{Colors.END}"]
+                 for nama, jumlah in sorted(periode['per_siswa'].items(), key=lambda x: (-x[1], x[0]))],
+                headers=['Nama', 'Pemasukan'], border_color=Colors.GRAY
+            )
+        
+        print(f"\n{Colors.BOLD}Per keterangan{Colors.END}")
+        self.buat_tabel_dinamis(
+            [[keterangan,
+              f"{Colors.GREEN}{self.format_rupiah(masuk)}{Colors.END}" if masuk else '-',
+              f"{Colors.RED}{self.format_rupiah(keluar)}{Colors.END}" if keluar else '-']
+             for keterangan, (masuk, keluar) in sorted(periode['per_keterangan'].items())],
+            headers=['Keterangan', 'Pemasukan', 'Pengeluaran'], border_color=Colors.GRAY
+        )
+    
+    # ========== KELAS ==========
+    
+    def ganti_kelas(self, katalog):
+        """
+        Menampilkan daftar kelas dan berpindah ke kelas lain.
+        
+        Menampilkan ringkasan kas setiap kelas beserta total semua kelas
+        (lihat KatalogKelas.ringkasan_semua). User bisa memilih kelas lain
+        atau mendaftarkan kelas baru.
         
-        # Tampilkan detail per siswa
-        print(f"\n{Colors.BOLD}DETAIL PER SISWA{Colors.END}")
+        Args:
+            katalog (KatalogKelas): Katalog kelas yang sedang dipakai
         
-        siswa_data = []
-        for i, siswa in enumerate(self.data_siswa, 1):
-            jml_transaksi = len(siswa['transaksi'])
-            
-            if siswa['saldo'] > 0:
-                status = f"{Colors.GREEN}✓ Sudah Bayar{Colors.END}"
-                saldo_display = f"{Colors.GREEN}{self.format_rupiah(siswa['saldo'])}{Colors.END}"
-            else:
-                status = f"{Colors.YELLOW}⚠ Belum Bayar{Colors.END}"
-                saldo_display = f"{Colors.GRAY}{self.format_rupiah(siswa['saldo'])}{Colors.END}"
-            
-            siswa_data.append([
+        Returns:
+            KasKelas: Kas kelas tujuan, atau None jika tetap di kelas ini
+        """
+        self.clear_screen()
+        self.print_box_header("DAFTAR KELAS", "🏫")
+        
+        per_kelas, total = katalog.ringkasan_semua()
+        rows = []
+        for i, (entri, ringkasan) in enumerate(per_kelas, 1):
+            nama = f"{Colors.GREEN}{entri['nama']} ★{Colors.END}" if entri['id'] == katalog.aktif else entri['nama']
+            if ringkasan is None:
+                rows.append([f"{Colors.CYAN}{i}{Colors.END}", nama, '-', '-', '-', f"{Colors.RED}rusak{Colors.END}"])
+                continue
+            saldo_color = Colors.GREEN if ringkasan['saldo'] >= 0 else Colors.RED
+            rows.append([
                 f"{Colors.CYAN}{i}{Colors.END}",
-                siswa['nama'],
-                str(jml_transaksi),
-                saldo_display,
-                status
+                nama,
+                str(ringkasan['jumlah_siswa']),
+                f"{Colors.GREEN}{self.format_rupiah(ringkasan['total_pemasukan'])}{Colors.END}",
+                f"{Colors.RED}{self.format_rupiah(ringkasan['total_pengeluaran'])}{Colors.END}",
+                f"{saldo_color}{self.format_rupiah(ringkasan['saldo'])}{Colors.END}"
             ])
+        self.buat_tabel_dinamis(rows, headers=['No', 'Kelas', 'Siswa', 'Pemasukan', 'Pengeluaran', 'Saldo'])
+        
+        print(f"\n{Colors.BOLD}SEMUA KELAS{Colors.END}")
+        print(f"{Colors.GRAY}• Siswa: {Colors.WHITE}{total['jumlah_siswa']} orang{Colors.END}"
+              f"   {Colors.GRAY}• Transaksi: {Colors.WHITE}{total['jumlah_transaksi']}{Colors.END}")
+        print(f"{Colors.GRAY}• Pemasukan: {Colors.GREEN}{self.format_rupiah(total['total_pemasukan'])}{Colors.END}"
+              f"   {Colors.GRAY}• Pengeluaran: {Colors.RED}{self.format_rupiah(total['total_pengeluaran'])}{Colors.END}"
+              f"   {Colors.GRAY}• Saldo: {Colors.WHITE}{self.format_rupiah(total['saldo'])}{Colors.END}")
+        
+        print(f"\n  {Colors.CYAN}b.{Colors.END} Tambah kelas baru")
+        print(f"  {Colors.GRAY}0. Kembali{Colors.END}")
+        pilih = input(f"\n{Colors.CYAN}→{Colors.END} Pilih nomor kelas: ").strip()
+        
+        if pilih.lower() == 'b':
+            nama = input(f"\n{Colors.CYAN}→{Colors.END} Nama kelas: ").strip()
+            siswa = input(f"{Colors.CYAN}→{Colors.END} Nama siswa, pisahkan dengan koma (Enter=kosong): ")
+            try:
+                entri = katalog.tambah(nama, siswa.split(','))
+            except (ValueError, OSError) as e:
+                print(f"{Colors.RED}⚠ Kelas tidak bisa dibuat: {e}{Colors.END}")
+                return None
+            print(f"\n{Colors.GREEN}✓ Kelas '{entri['nama']}' berhasil dibuat{Colors.END}")
+            print(f"  {Colors.GRAY}Folder: {katalog.folder(entri)}{Colors.END}")
+            konfirm = input(f"\n{Colors.YELLOW}Buka kelas ini sekarang? (y/n):{Colors.END} ")
+            if konfirm.lower() != 'y':
+                return None
+        elif not pilih or pilih == '0':
+            return None
+        else:
+            try:
+                entri = per_kelas[int(pilih) - 1][0]
+                if int(pilih) < 1:
+                    raise IndexError
+            except (ValueError, IndexError):
+                print(f"{Colors.RED}⚠ Nomor tidak valid!{Colors.END}")
+                return None
+            if entri['id'] == katalog.aktif:
+                print(f"{Colors.YELLOW}⚠ Kelas '{entri['nama']}' sedang dibuka{Colors.END}")
+                return None
         
-        # Tampilkan tabel siswa dengan header
-        self.buat_tabel_dinamis(
-            siswa_data, 
-            headers=['No', 'Nama', 'Transaksi', 'Saldo', 'Status'],
-            border_color=Colors.GRAY
-        )
+        try:
+            kas = katalog.buka(entri)
+        except TimeoutError as e:
+            print(f"{Colors.RED}⚠ Kelas tidak bisa dibuka: {e}{Colors.END}")
+            return None
+        katalog.pilih(entri)
+        print(f"\n{Colors.GREEN}✓ Pindah ke kelas '{entri['nama']}'{Colors.END}")
+        return kas
+    
+    # ========== DIAGNOSTIK ==========
+    
+    def diagnostik(self):
+        """
+        Menu tersembunyi (ketik 'd' di menu utama): hasil profiling.
+        
+        Menampilkan waktu setiap operasi yang diukur, counter (byte dibaca/
+        ditulis, baris tabel, record jurnal), dan hasil cProfile terakhir.
+        Hasil bisa disimpan ke file JSON, dan aksi menu berikutnya bisa
+        dijalankan di bawah cProfile.
+        """
+        while True:
+            self.clear_screen()
+            self.print_box_header("DIAGNOSTIK", "🩺")
+            
+            if not PENGUKUR.aktif:
+                print(f"\n{Colors.YELLOW}⚠ Profiling nonaktif.{Colors.END}")
+                print(f"  {Colors.GRAY}Jalankan dengan KALCER_PROFIL=1 atau opsi --profil{Colors.END}")
+                return
+            
+            data = PENGUKUR.data()
+            if data['operasi']:
+                self.buat_tabel_dinamis(
+                    [[nama, str(o['panggilan']), f"{o['total_ms']:.1f}", f"{o['rata_ms']:.1f}", f"{o['maks_ms']:.1f}"]
+                     for nama, o in data['operasi'].items()],
+                    headers=['Operasi', 'Panggilan', 'Total ms', 'Rata-rata ms', 'Maks ms']
+                )
+            if data['counter']:
+                self.buat_tabel_dinamis(
+                    [[nama, f"{jumlah:,}".replace(',', '.')] for nama, jumlah in data['counter'].items()],
+                    headers=['Counter', 'Jumlah'], border_color=Colors.GRAY
+                )
+            if PENGUKUR.laporan_cprofile:
+                print(f"\n{Colors.GRAY}{PENGUKUR.laporan_cprofile.strip()}{Colors.END}")
+            if PENGUKUR.profil_berikut:
+                print(f"\n{Colors.YELLOW}• Aksi menu berikutnya akan diprofil dengan cProfile{Colors.END}")
+            
+            print(f"\n  {Colors.CYAN}1.{Colors.END} Simpan ke file (JSON)")
+            print(f"  {Colors.CYAN}2.{Colors.END} Profil aksi menu berikutnya (cProfile)")
+            print(f"  {Colors.CYAN}3.{Colors.END} Reset catatan")
+            print(f"  {Colors.CYAN}0.{Colors.END} Kembali")
+            pilihan = input(f"\n{Colors.CYAN}→{Colors.END} Pilih: ").strip()
+            
+            if pilihan == '1':
+                path = os.path.join(self.data_dir, f"kalcer_profil_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+                try:
+                    with open(path, 'w', encoding='utf-8') as f:
+                        json.dump(data, f, indent=2, ensure_ascii=False)
+                    print(f"{Colors.GREEN}✓ Disimpan ke {path}{Colors.END}")
+                except OSError as e:
+                    print(f"{Colors.RED}⚠ Gagal menyimpan: {e}{Colors.END}")
+                self.pause()
+            elif pilihan == '2':
+                PENGUKUR.profil_berikut = True
+                return
+            elif pilihan == '3':
+                PENGUKUR.reset()
+            else:
+                return
     
     # ========== RESET ==========
     
@@ -1162,10 +5850,8 @@ class KasKelas:
         print(f"{Colors.RED}║{Colors.END}{Colors.BOLD}{Colors.RED} ⚠ RESET SEMUA TRANSAKSI ⚠{Colors.END}{' '*60} {Colors.RED}║{Colors.END}")
         print(f"{Colors.RED}╚{'═'*88}╝{Colors.END}")
         
-        total_transaksi = sum(len(s['transaksi']) for s in self.data_siswa) + len(self.pengeluaran_umum)
-        
         print(f"\n{Colors.YELLOW}Menghapus SEMUA transaksi!{Colors.END}")
-        print(f"{Colors.GRAY}• Total transaksi: {Colors.WHITE}{total_transaksi}{Colors.END}")
+        print(f"{Colors.GRAY}• Total transaksi: {Colors.WHITE}{self.ringkasan.jumlah_transaksi}{Colors.END}")
         print(f"{Colors.GRAY}• Saldo: {Colors.WHITE}{self.format_rupiah(self.hitung_total_saldo())}{Colors.END}")
         print(f"\n{Colors.GREEN}⚠ Data siswa TIDAK dihapus{Colors.END}")
         print(f"{Colors.RED}⚠⚠⚠ TIDAK BISA dikembalikan! ⚠⚠⚠{Colors.END}")
@@ -1176,13 +5862,7 @@ class KasKelas:
             konfirm2 = input(f"{Colors.RED}Ketik 'YAKIN' untuk konfirmasi:{Colors.END} ")
             
             if konfirm2.upper() == 'YAKIN':
-                for siswa in self.data_siswa:
-                    siswa['transaksi'] = []
-                    siswa['saldo'] = 0
-                
-                self.pengeluaran_umum = []
-                
-                if self.save_data():
+                if self.simpan_perubahan('reset_semua'):
                     print(f"\n{Colors.RED}╔{'═'*88}╗{Colors.END}")
                     print(f"{Colors.RED}║{Colors.END} {Colors.BOLD}✓✓✓ SEMUA TRANSAKSI DIHAPUS! ✓✓✓{Colors.END}{' '*53} {Colors.RED}║{Colors.END}")
                     print(f"{Colors.RED}╚{'═'*88}╝{Colors.END}")
@@ -1235,10 +5915,7 @@ class KasKelas:
                 konfirm = input(f"\n{Colors.RED}Ketik 'HAPUS' untuk konfirmasi:{Colors.END} ")
                 
                 if konfirm.upper() == 'HAPUS':
-                    siswa['transaksi'] = []
-                    siswa['saldo'] = 0
-                    
-                    if self.save_data():
+                    if self.simpan_perubahan('reset_siswa', nama=siswa['nama']):
                         print(f"\n{Colors.GREEN}✓ Transaksi {siswa['nama']} berhasil dihapus!{Colors.END}")
                 else:
                     print(f"{Colors.GREEN}✓ Batal{Colors.END}")
@@ -1250,58 +5927,91 @@ class KasKelas:
     
     # ========== MENU ==========
     
-    def menu_utama(self):
+    def menu_utama(self, katalog=None, sambut=True):
         """
         Menampilkan dan mengelola menu utama aplikasi.
         
         Menu dibagi menjadi beberapa kategori:
-        1. TRANSAKSI: Setor iuran dan tambah pengeluaran
+        1. TRANSAKSI: Setor iuran, tambah pengeluaran dan impor CSV
         2. LAPORAN: Berbagai jenis laporan keuangan
-        3. PENGATURAN: Kelola data siswa dan reset transaksi
+        3. PENGATURAN: Kelola data siswa, reset transaksi dan ganti kelas
+        
+        Loop akan terus berjalan hingga user memilih untuk keluar (0) atau
+        berpindah ke kelas lain. Menampilkan informasi saldo kas, lokasi
+        database dan statistik jurnal di footer.
+        Menu disusun sebagai satu frame dan ditulis sekaligus (lihat Layar).
+        
+        Args:
+            katalog (KatalogKelas): Katalog kelas untuk menu Ganti Kelas (opsional)
+            sambut (bool): Tampilkan prompt 'Tekan Enter untuk mulai'
         
-        Loop akan terus berjalan hingga user memilih untuk keluar (0).
-        Menampilkan informasi saldo kas dan lokasi database di footer.
+        Returns:
+            KasKelas: Kas kelas tujuan jika user berpindah kelas, None jika keluar
         """
-        input(f"\n{Colors.GRAY}[Tekan Enter untuk mulai]{Colors.END}")
+        if sambut:
+            input(f"\n{Colors.GRAY}[Tekan Enter untuk mulai]{Colors.END}")
         
+        redraw_sebagian = False
         while True:
-            self.clear_screen()
+            # Ambil perubahan dari bendahara lain yang memakai database yang sama
+            self.segarkan()
+            
+            # Checkpoint berbasis waktu juga dicek saat kembali ke menu
+            if self.perlu_checkpoint():
+                self.checkpoint()
+            
+            # Susun seluruh menu sebagai satu frame, lalu tulis sekaligus
+            self.layar.mulai()
             
             # Header dengan box
-            print(f"\n{Colors.CYAN}╔{'═'*88}╗{Colors.END}")
-            print(f"{Colors.CYAN}║{Colors.END}{Colors.BOLD}{Colors.WHITE} 🏛️  KALCer - MENU UTAMA{Colors.END}{' '*59} {Colors.CYAN}║{Colors.END}")
-            print(f"{Colors.CYAN}╚{'═'*88}╝{Colors.END}")
+            self.tampil(f"\n{Colors.CYAN}╔{'═'*88}╗{Colors.END}")
+            self.tampil(f"{Colors.CYAN}║{Colors.END}{Colors.BOLD}{Colors.WHITE} 🏛️  KALCer - MENU UTAMA{Colors.END}{' '*59} {Colors.CYAN}║{Colors.END}")
+            self.tampil(f"{Colors.CYAN}╚{'═'*88}╝{Colors.END}")
             
             # Menu Transaksi
-            print(f"\n{Colors.YELLOW}┌─ TRANSAKSI {'─'*74}┐{Colors.END}")
+            self.tampil(f"\n{Colors.YELLOW}┌─ TRANSAKSI {'─'*74}┐{Colors.END}")
             self.print_menu_item("1", "Setor Iuran", "💰")
             self.print_menu_item("2", "Tambah Pengeluaran", "💸")
-            print(f"{Colors.YELLOW}└{'─'*88}┘{Colors.END}")
+            self.print_menu_item("9", "Impor Transaksi (CSV)", "📥")
+            self.tampil(f"{Colors.YELLOW}└{'─'*88}┘{Colors.END}")
             
             # Menu Laporan
-            print(f"\n{Colors.BLUE}┌─ LAPORAN {'─'*76}┐{Colors.END}")
+            self.tampil(f"\n{Colors.BLUE}┌─ LAPORAN {'─'*76}┐{Colors.END}")
             self.print_menu_item("3", "Lihat Saldo", "💵")
             self.print_menu_item("4", "Transaksi Per Siswa", "📋")
             self.print_menu_item("5", "Semua Transaksi", "📊")
             self.print_menu_item("6", "Laporan Status Siswa", "📈")
-            print(f"{Colors.BLUE}└{'─'*88}┘{Colors.END}")
+            self.print_menu_item("10", "Arus Kas Bulanan/Mingguan", "📅")
+            self.print_menu_item("11", "Cari Transaksi per Tanggal", "🗓")
+            self.print_menu_item("12", "Cari Keterangan Transaksi", "🔍")
+            self.print_menu_item("14", "Export Data (CSV/JSONL)", "📤")
+            self.tampil(f"{Colors.BLUE}└{'─'*88}┘{Colors.END}")
             
             # Menu Pengaturan
-            print(f"\n{Colors.GRAY}┌─ PENGATURAN {'─'*73}┐{Colors.END}")
+            self.tampil(f"\n{Colors.GRAY}┌─ PENGATURAN {'─'*73}┐{Colors.END}")
             self.print_menu_item("7", "Kelola Data Siswa", "⚙️")
             self.print_menu_item("8", "Reset Transaksi", "🗑️")
-            print(f"{Colors.GRAY}└{'─'*88}┘{Colors.END}")
+            if katalog is not None:
+                self.print_menu_item("13", "Ganti Kelas", "🏫")
+            self.tampil(f"{Colors.GRAY}└{'─'*88}┘{Colors.END}")
             
             # Exit
-            print(f"\n  {Colors.RED}•{Colors.END} {Colors.WHITE}0.{Colors.END} Keluar")
+            self.tampil(f"\n  {Colors.RED}•{Colors.END} {Colors.WHITE}0.{Colors.END} Keluar")
             
             # Info Footer
             self.print_separator()
             saldo = self.hitung_total_saldo()
             saldo_color = Colors.GREEN if saldo >= 0 else Colors.RED
-            print(f"{Colors.GRAY}Saldo Kas:{Colors.END} {saldo_color}{Colors.BOLD}{self.format_rupiah(saldo)}{Colors.END}")
-            print(f"{Colors.GRAY}Database:{Colors.END} {self.filename}")
+            self.tampil(f"{Colors.GRAY}Saldo Kas:{Colors.END} {saldo_color}{Colors.BOLD}{self.format_rupiah(saldo)}{Colors.END}")
+            if katalog is not None and len(katalog.kelas) > 1:
+                self.tampil(f"{Colors.GRAY}Kelas:{Colors.END} {katalog.entri_aktif['nama']} {Colors.GRAY}(dari {len(katalog.kelas)} kelas){Colors.END}")
+            self.tampil(f"{Colors.GRAY}Database:{Colors.END} {self.filename}")
+            statistik_jurnal = self.info_jurnal()
+            if statistik_jurnal:
+                self.tampil(statistik_jurnal)
             self.print_separator()
+            self.layar.tampilkan(sebagian=redraw_sebagian)
+            redraw_sebagian = False
             
             pilihan = input(f"\n{Colors.CYAN}→{Colors.END} Pilih menu: ")
             
@@ -1316,10 +6026,8 @@ class KasKelas:
                 self.pause()
             elif pilihan == '4':
                 self.lihat_transaksi_siswa()
-                self.pause()
             elif pilihan == '5':
                 self.lihat_semua_transaksi()
-                self.pause()
             elif pilihan == '6':
                 self.lihat_laporan_siswa()
                 self.pause()
@@ -1328,8 +6036,34 @@ class KasKelas:
             elif pilihan == '8':
                 self.reset_transaksi()
                 self.pause()
+            elif pilihan == '9':
+                self.impor_csv()
+                self.pause()
+            elif pilihan == '10':
+                self.lihat_arus_kas()
+                self.pause()
+            elif pilihan == '11':
+                self.cari_transaksi_tanggal()
+                self.pause()
+            elif pilihan == '12':
+                self.cari_transaksi_keterangan()
+            elif pilihan == '14':
+                self.export_data()
+                self.pause()
+            elif pilihan == '13' and katalog is not None:
+                kas_baru = self.ganti_kelas(katalog)
+                self.pause()
+                if kas_baru is not None:
+                    return kas_baru
+            elif pilihan.lower() == 'd':
+                # Menu tersembunyi, tidak ditampilkan di daftar menu
+                self.diagnostik()
+                self.pause()
             elif pilihan == '0':
                 self.clear_screen()
+                # Gabungkan jurnal ke snapshot agar pembukaan berikutnya cepat
+                if self.storage.perlu_kompaksi():
+                    self.save_data()
                 print(f"\n{Colors.GREEN}╔{'═'*88}╗{Colors.END}")
                 print(f"{Colors.GREEN}║{Colors.END} {Colors.BOLD}✓ Terima kasih telah menggunakan KALCer!{Colors.END}{' '*36} {Colors.GREEN}║{Colors.END}")
                 print(f"{Colors.GREEN}║{Colors.END} {Colors.BOLD}by Team Persian SMKN 2 Bojonegoro{Colors.END}{' '*36} {Colors.GREEN}║{Colors.END}")
@@ -1341,6 +6075,797 @@ class KasKelas:
             else:
                 print(f"{Colors.RED}⚠ Pilihan tidak valid!{Colors.END}")
                 self.pause()
+                # Layar masih berisi menu yang sama, cukup hapus pesan di bawahnya
+                redraw_sebagian = True
+
+
+# ========== COMMAND-LINE ==========
+
+# Kode keluar untuk perintah command-line
+KELUAR_OK = 0
+KELUAR_GAGAL = 1      # Gagal membaca/menyimpan database
+KELUAR_INPUT = 2      # Input tidak valid (nama tidak ada, jumlah salah, dll)
+KELUAR_DITOLAK = 3    # Ditolak karena aturan (misal saldo tidak cukup)
+
+
+def cetak_json(data):
+    """Menulis satu objek JSON (satu baris) ke stdout"""
+    print(json.dumps(data, ensure_ascii=False))
+
+
+def buat_parser():
+    """
+    Membuat parser argumen command-line.
+    
+    Tanpa subcommand, aplikasi berjalan dalam mode menu interaktif.
+    
+    Returns:
+        argparse.ArgumentParser: Parser yang sudah dikonfigurasi
+    """
+    parser = argparse.ArgumentParser(
+        prog='KALCer',
+        description='KALCer - Kas Kelas Cerdas. Tanpa perintah: menu interaktif.'
+    )
+    parser.add_argument('--data-dir', help='Folder database (default: folder script)')
+    parser.add_argument('--storage', choices=['json', 'sqlite', 'shard', 'biner'], help='Jenis penyimpanan')
+    parser.add_argument('--profil', action='store_true',
+                        help='Catat waktu dan counter operasi (juga lewat KALCER_PROFIL=1)')
+    parser.add_argument('--kelas', help='Nama atau id kelas di katalog (default: kelas utama; menu: kelas terakhir)')
+    sub = parser.add_subparsers(dest='perintah', metavar='PERINTAH')
+    
+    p = sub.add_parser('setor', help='Catat setoran siswa')
+    p.add_argument('nama', help='Nama siswa (case-insensitive)')
+    p.add_argument('jumlah', help='Jumlah setoran (Rp)')
+    p.add_argument('-k', '--keterangan', default='Setoran Tunai')
+    p.add_argument('-t', '--tanggal', help="Tanggal transaksi (default: sekarang)")
+    
+    p = sub.add_parser('keluar', help='Catat pengeluaran kas')
+    p.add_argument('jumlah', help='Jumlah pengeluaran (Rp)')
+    p.add_argument('keterangan', help='Keterangan pengeluaran')
+    p.add_argument('-t', '--tanggal', help="Tanggal transaksi (default: sekarang)")
+    p.add_argument('--paksa', action='store_true', help='Tetap catat walau saldo jadi minus')
+    
+    sub.add_parser('saldo', help='Tampilkan ringkasan saldo kas (JSON)')
+    
+    p = sub.add_parser('laporan', help='Laporan status siswa atau riwayat satu siswa (JSON)')
+    p.add_argument('--siswa', help='Tampilkan riwayat transaksi siswa ini')
+    
+    p = sub.add_parser('arus-kas', help='Rekap pemasukan/pengeluaran per bulan atau minggu (JSON)')
+    p.add_argument('--mingguan', action='store_true', help='Rekap per minggu (ISO) alih-alih per bulan')
+    p.add_argument('--periode', help="Rincian satu periode, misal 2025-10 atau 2025-W42")
+    
+    p = sub.add_parser('rentang', help='Transaksi dalam rentang tanggal (JSON)')
+    p.add_argument('--dari', help='Tanggal awal, YYYY-MM-DD (default: paling awal)')
+    p.add_argument('--sampai', help='Tanggal akhir, inklusif (default: paling akhir)')
+    p.add_argument('--siswa', help='Hanya setoran siswa ini')
+    p.add_argument('--jenis', choices=['setor', 'keluar'], help='Hanya setoran atau hanya pengeluaran')
+    
+    p = sub.add_parser('cari', help='Cari transaksi berdasarkan kata di keterangan (JSON)')
+    p.add_argument('kata', nargs='+', help="Kata kunci, misal 'fotokopi' atau 'study tour'")
+    
+    p = sub.add_parser('export', help='Export transaksi, rekening siswa atau status siswa (JSON Lines/CSV)')
+    p.add_argument('-l', '--laporan', choices=list(KasKelas.KOLOM_EXPORT),
+                   help='Jenis laporan (default: transaksi; siswa jika --siswa diisi)')
+    p.add_argument('--siswa', help='Rekening siswa ini saja (laporan siswa)')
+    p.add_argument('-f', '--format', choices=['csv', 'jsonl'],
+                   help='Format file (default: csv jika output berakhiran .csv, selain itu jsonl)')
+    p.add_argument('-o', '--output', help='File tujuan (default: stdout)')
+    
+    p = sub.add_parser('impor', help='Impor setoran/pengeluaran dari file CSV')
+    p.add_argument('file', help='File CSV (nama, jumlah, keterangan, tanggal)')
+    p.add_argument('--lewati-salah', action='store_true', help='Tetap impor baris yang valid walau ada baris salah')
+    
+    sub.add_parser('kelas', help='Daftar kelas di katalog beserta ringkasan dan totalnya (JSON)')
+    p = sub.add_parser('kelas-baru', help='Daftarkan kelas baru di katalog')
+    p.add_argument('nama', help="Nama kelas, misal 'XI RPL 1'")
+    p.add_argument('-s', '--siswa', nargs='*', default=[], help='Nama siswa awal')
+    
+    p = sub.add_parser('serve', help='Server HTTP/JSON lokal untuk aplikasi lain (web/HP)')
+    p.add_argument('--host', default='127.0.0.1', help='Alamat server (default: 127.0.0.1)')
+    p.add_argument('--port', type=int, default=8765, help='Port server (default: 8765)')
+    
+    sub.add_parser('konversi-rupiah', help='Tulis ulang database dengan nominal integer rupiah (untuk data lama)')
+    sub.add_parser('migrasi-sqlite', help='Pindahkan database JSON ke SQLite')
+    sub.add_parser('migrasi-shard', help='Pindahkan database JSON ke folder shard (roster + riwayat per siswa)')
+    sub.add_parser('migrasi-biner', help='Pindahkan database JSON ke file biner ringkas (.kalc)')
+    p = sub.add_parser('migrasi-json', help='Tulis database SQLite/shard/biner kembali sebagai file JSON')
+    p.add_argument('--timpa', action='store_true', help='Timpa kas_kelas_database.json yang sudah ada')
+    
+    return parser
+
+
+def jalankan_perintah(args):
+    """
+    Menjalankan satu perintah command-line tanpa menu interaktif.
+    
+    Tidak ada welcome screen, prompt Enter, maupun pembersihan layar.
+    Hasil ditulis sebagai JSON ke stdout, pesan error ke stderr.
+    
+    Args:
+        args (argparse.Namespace): Hasil parsing argumen
+    
+    Returns:
+        int: Kode keluar (lihat KELUAR_*)
+    """
+    data_dir = args.data_dir or tentukan_folder_data()
+    katalog = KatalogKelas(data_dir, args.storage, tenang=True)
+    
+    if args.perintah == 'kelas':
+        return perintah_kelas(katalog)
+    if args.perintah == 'kelas-baru':
+        try:
+            entri = katalog.tambah(args.nama, args.siswa)
+        except (ValueError, OSError) as e:
+            print(f"{Colors.RED}⚠ {e}{Colors.END}", file=sys.stderr)
+            return KELUAR_INPUT
+        cetak_json({**entri, 'lokasi': katalog.folder(entri)})
+        return KELUAR_OK
+    if args.kelas:
+        entri = katalog.cari(args.kelas)
+        if entri is None:
+            print(f"{Colors.RED}⚠ kelas '{args.kelas}' tidak ada di katalog{Colors.END}", file=sys.stderr)
+            return KELUAR_INPUT
+        data_dir = katalog.folder(entri)
+    
+    if args.perintah in ('migrasi-sqlite', 'migrasi-shard', 'migrasi-biner'):
+        jenis = args.perintah.split('-')[1]
+        return KELUAR_OK if migrasi_dari_json(data_dir, jenis) else KELUAR_GAGAL
+    if args.perintah == 'migrasi-json':
+        return KELUAR_OK if migrasi_ke_json(data_dir, args.storage, args.timpa) else KELUAR_GAGAL
+    
+    try:
+        kas = KasKelas(buat_penyimpanan(data_dir, args.storage), tenang=True)
+    except TimeoutError as e:
+        print(f"{Colors.RED}⚠ {e}{Colors.END}", file=sys.stderr)
+        return KELUAR_GAGAL
+    if kas.gagal_muat:
+        return KELUAR_GAGAL
+    
+    if args.perintah == 'setor':
+        return perintah_setor(kas, args)
+    if args.perintah == 'keluar':
+        return perintah_keluar(kas, args)
+    if args.perintah == 'saldo':
+        cetak_json(kas.data_ringkasan())
+        return KELUAR_OK
+    if args.perintah == 'laporan':
+        return perintah_laporan(kas, args)
+    if args.perintah == 'arus-kas':
+        return perintah_arus_kas(kas, args)
+    if args.perintah == 'rentang':
+        return perintah_rentang(kas, args)
+    if args.perintah == 'cari':
+        return perintah_cari(kas, args)
+    if args.perintah == 'export':
+        return perintah_export(kas, args)
+    if args.perintah == 'impor':
+        return perintah_impor(kas, args)
+    if args.perintah == 'serve':
+        return perintah_serve(kas, args)
+    if args.perintah == 'konversi-rupiah':
+        # Nominal float sudah dinormalkan saat dimuat; cukup tulis ulang snapshot
+        if not kas.save_data():
+            return KELUAR_GAGAL
+        cetak_json({'lokasi': kas.filename, **kas.data_ringkasan()})
+        return KELUAR_OK
+    return KELUAR_INPUT
+
+
+def _jumlah_dan_tanggal(kas, args):
+    """Helper: Validasi argumen jumlah dan tanggal, None jika tidak valid"""
+    try:
+        return _periksa_jumlah_tanggal(kas, args.jumlah, args.tanggal)
+    except ValueError as e:
+        kas.peringatan(str(e))
+        return None
+
+
+def _periksa_jumlah_tanggal(kas, jumlah, tanggal):
+    """
+    Helper: Validasi jumlah dan tanggal transaksi dari input luar.
+    
+    Args:
+        kas (KasKelas): Kas kelas
+        jumlah (str/int): Jumlah transaksi
+        tanggal (str): Tanggal transaksi, kosong/None untuk sekarang
+    
+    Returns:
+        tuple: (jumlah, tanggal, ts)
+    
+    Raises:
+        ValueError: Dengan pesan yang siap ditampilkan jika tidak valid
+    """
+    try:
+        nilai = parse_jumlah(str(jumlah))
+    except ValueError:
+        raise ValueError(f"jumlah '{jumlah}' bukan angka") from None
+    if nilai <= 0:
+        raise ValueError("jumlah harus > 0")
+    try:
+        tanggal, ts = kas._parse_tanggal_impor(tanggal or '')
+    except ValueError:
+        raise ValueError(f"tanggal '{tanggal}' tidak dikenali") from None
+    return nilai, tanggal, ts
+
+
+def _data_riwayat_siswa(siswa):
+    """Helper: Riwayat transaksi satu siswa dalam bentuk dict (untuk output JSON)"""
+    return {
+        'nama': siswa['nama'],
+        'saldo': siswa['saldo'],
+        'transaksi': [
+            {k: t.get(k) for k in ('tanggal', 'jenis', 'jumlah', 'keterangan')}
+            for t in siswa['transaksi']
+        ]
+    }
+
+
+def _data_status_siswa(kas):
+    """Helper: Ringkasan kas dan status bayar semua siswa (untuk output JSON)"""
+    return {'ringkasan': kas.data_ringkasan(), 'siswa': list(kas.baris_export('status'))}
+
+
+def perintah_kelas(katalog):
+    """Perintah 'kelas': ringkasan setiap kelas di katalog dan total semua kelas"""
+    per_kelas, total = katalog.ringkasan_semua()
+    cetak_json({
+        'kelas': [
+            {'id': entri['id'], 'nama': entri['nama'], 'lokasi': katalog.folder(entri), 'ringkasan': ringkasan}
+            for entri, ringkasan in per_kelas
+        ],
+        'total': total
+    })
+    return KELUAR_OK
+
+
+def perintah_setor(kas, args):
+    """Perintah 'setor': sama seperti menu Setor Iuran"""
+    siswa = kas.indeks_nama.cari(args.nama)
+    if siswa is None:
+        kas.peringatan(f"siswa '{args.nama}' tidak ditemukan")
+        return KELUAR_INPUT
+    hasil = _jumlah_dan_tanggal(kas, args)
+    if hasil is None:
+        return KELUAR_INPUT
+    jumlah, tanggal, ts = hasil
+    
+    transaksi = {"tanggal": tanggal, "jenis": "setor", "jumlah": jumlah, "keterangan": args.keterangan, "ts": ts}
+    if not kas.simpan_perubahan('setor', nama=siswa['nama'], transaksi=transaksi):
+        return KELUAR_GAGAL
+    # Data bisa saja dimuat ulang saat menyimpan (lihat simpan_batch)
+    siswa = kas.indeks_nama.cari(siswa['nama'])
+    
+    cetak_json({
+        'nama': siswa['nama'], 'jumlah': jumlah, 'keterangan': args.keterangan,
+        'tanggal': tanggal, 'saldo_siswa': siswa['saldo'], 'saldo_kas': kas.hitung_total_saldo()
+    })
+    return KELUAR_OK
+
+
+def perintah_keluar(kas, args):
+    """Perintah 'keluar': sama seperti menu Tambah Pengeluaran"""
+    hasil = _jumlah_dan_tanggal(kas, args)
+    if hasil is None:
+        return KELUAR_INPUT
+    jumlah, tanggal, ts = hasil
+    if not args.keterangan.strip():
+        kas.peringatan("keterangan wajib diisi")
+        return KELUAR_INPUT
+    if jumlah > kas.hitung_total_saldo() and not args.paksa:
+        kas.peringatan(f"saldo tidak cukup ({kas.format_rupiah(kas.hitung_total_saldo())}), pakai --paksa untuk tetap mencatat")
+        return KELUAR_DITOLAK
+    
+    pengeluaran = {"tanggal": tanggal, "keterangan": args.keterangan.strip(), "jumlah": jumlah, "ts": ts}
+    if not kas.simpan_perubahan('keluar', pengeluaran=pengeluaran):
+        return KELUAR_GAGAL
+    
+    cetak_json({
+        'keterangan': pengeluaran['keterangan'], 'jumlah': jumlah,
+        'tanggal': tanggal, 'saldo_kas': kas.hitung_total_saldo()
+    })
+    return KELUAR_OK
+
+
+def perintah_laporan(kas, args):
+    """Perintah 'laporan': status semua siswa, atau riwayat satu siswa dengan --siswa"""
+    if args.siswa:
+        siswa = kas.indeks_nama.cari(args.siswa)
+        if siswa is None:
+            kas.peringatan(f"siswa '{args.siswa}' tidak ditemukan")
+            return KELUAR_INPUT
+        cetak_json(_data_riwayat_siswa(siswa))
+        return KELUAR_OK
+    
+    cetak_json(_data_status_siswa(kas))
+    return KELUAR_OK
+
+
+def perintah_arus_kas(kas, args):
+    """Perintah 'arus-kas': total per periode, atau rincian satu periode dengan --periode"""
+    rekap = kas.rekap_periode()
+    tabel = rekap.minggu if args.mingguan or (args.periode and '-W' in args.periode.upper()) else rekap.bulan
+    
+    if args.periode:
+        kunci = args.periode.strip().upper()
+        if kunci not in tabel:
+            kas.peringatan(f"periode '{args.periode}' tidak ada transaksi")
+            return KELUAR_INPUT
+        periode = tabel[kunci]
+        cetak_json({
+            'periode': kunci,
+            'pemasukan': periode['pemasukan'],
+            'pengeluaran': periode['pengeluaran'],
+            'per_siswa': periode['per_siswa'],
+            'per_keterangan': {
+                keterangan: {'pemasukan': masuk, 'pengeluaran': keluar}
+                for keterangan, (masuk, keluar) in sorted(periode['per_keterangan'].items())
+            }
+        })
+        return KELUAR_OK
+    
+    cetak_json([
+        {'periode': kunci, 'pemasukan': tabel[kunci]['pemasukan'], 'pengeluaran': tabel[kunci]['pengeluaran']}
+        for kunci in sorted(tabel)
+    ])
+    return KELUAR_OK
+
+
+def perintah_rentang(kas, args):
+    """Perintah 'rentang': transaksi antara --dari dan --sampai beserta totalnya"""
+    try:
+        awal = parse_batas_tanggal(args.dari) if args.dari else 0
+        akhir = parse_batas_tanggal(args.sampai, akhir_hari=True) if args.sampai else sys.maxsize
+    except ValueError as e:
+        kas.peringatan(str(e))
+        return KELUAR_INPUT
+    if args.siswa:
+        if args.jenis == 'keluar':
+            kas.peringatan("--siswa hanya bisa dipakai untuk setoran")
+            return KELUAR_INPUT
+        siswa = kas.indeks_nama.cari(args.siswa)
+        if siswa is None:
+            kas.peringatan(f"siswa '{args.siswa}' tidak ditemukan")
+            return KELUAR_INPUT
+        args.siswa = siswa['nama']
+    
+    transaksi = []
+    total_masuk = total_keluar = 0
+    for t in kas.cari_rentang(awal, akhir, args.siswa, args.jenis):
+        if t['is_income']:
+            total_masuk += t['jumlah']
+        else:
+            total_keluar += t['jumlah']
+        transaksi.append({
+            'tanggal': t['tanggal'],
+            'nama': t['nama'],
+            'jenis': 'pemasukan' if t['is_income'] else 'pengeluaran',
+            'jumlah': t['jumlah'],
+            'keterangan': t['keterangan']
+        })
+    
+    cetak_json({
+        'jumlah_transaksi': len(transaksi),
+        'total_pemasukan': total_masuk,
+        'total_pengeluaran': total_keluar,
+        'transaksi': transaksi
+    })
+    return KELUAR_OK
+
+
+def perintah_cari(kas, args):
+    """Perintah 'cari': transaksi yang keterangannya memuat semua kata kunci"""
+    kata_kunci = ' '.join(args.kata)
+    if not token_teks(kata_kunci):
+        kas.peringatan("kata kunci harus berisi huruf atau angka")
+        return KELUAR_INPUT
+    
+    hasil = kas.cari_keterangan(kata_kunci)
+    cetak_json({
+        'kata_kunci': kata_kunci,
+        'jumlah_transaksi': len(hasil),
+        'total_pemasukan': sum(t['jumlah'] for t in hasil if t['is_income']),
+        'total_pengeluaran': sum(t['jumlah'] for t in hasil if not t['is_income']),
+        'transaksi': [
+            {
+                'tanggal': t['tanggal'],
+                'nama': t['nama'],
+                'jenis': 'pemasukan' if t['is_income'] else 'pengeluaran',
+                'jumlah': t['jumlah'],
+                'keterangan': t['keterangan']
+            }
+            for t in hasil
+        ]
+    })
+    return KELUAR_OK
+
+
+def perintah_export(kas, args):
+    """Perintah 'export': sama seperti menu Export Data, ke file atau stdout"""
+    laporan = args.laporan or ('siswa' if args.siswa else 'transaksi')
+    siswa = None
+    if args.siswa:
+        siswa = kas.indeks_nama.cari(args.siswa)
+        if laporan != 'siswa' or siswa is None:
+            kas.peringatan(f"siswa '{args.siswa}' tidak ditemukan" if siswa is None else "--siswa hanya untuk laporan siswa")
+            return KELUAR_INPUT
+    format_file = args.format or ('csv' if args.output and args.output.lower().endswith('.csv') else 'jsonl')
+    baris = kas.baris_export(laporan, siswa)
+    kolom = KasKelas.KOLOM_EXPORT[laporan]
+    
+    if not args.output:
+        tulis_export(baris, sys.stdout, format_file, kolom)
+        return KELUAR_OK
+    try:
+        with open(args.output, 'w', encoding='utf-8-sig' if format_file == 'csv' else 'utf-8', newline='') as f:
+            jumlah = tulis_export(baris, f, format_file, kolom)
+    except OSError as e:
+        kas.peringatan(f"file tidak bisa ditulis: {e}")
+        return KELUAR_GAGAL
+    cetak_json({'laporan': laporan, 'format': format_file, 'baris': jumlah, 'lokasi': args.output})
+    return KELUAR_OK
+
+
+def perintah_impor(kas, args):
+    """Perintah 'impor': sama seperti menu Impor Transaksi (CSV), tanpa konfirmasi"""
+    try:
+        perubahan, kesalahan = kas.baca_csv_transaksi(args.file)
+    except (OSError, UnicodeDecodeError, csv.Error) as e:
+        kas.peringatan(f"file tidak bisa dibaca: {e}")
+        return KELUAR_GAGAL
+    
+    for nomor_baris, pesan in kesalahan:
+        kas.peringatan(f"baris {nomor_baris}: {pesan}")
+    if kesalahan and not args.lewati_salah:
+        return KELUAR_INPUT
+    
+    if perubahan and not kas.simpan_batch(perubahan):
+        return KELUAR_GAGAL
+    
+    cetak_json({'diimpor': len(perubahan), 'salah': len(kesalahan), 'saldo_kas': kas.hitung_total_saldo()})
+    return KELUAR_OK
+
+
+# ========== SERVER HTTP ==========
+
+class ServerKas:
+    """
+    Server HTTP/JSON lokal (asyncio) di atas satu KasKelas.
+    
+    Endpoint:
+        GET  /saldo         : ringkasan kas (seperti menu Lihat Saldo)
+        GET  /siswa         : status bayar semua siswa (Laporan Per Siswa)
+        GET  /siswa/<nama>  : riwayat transaksi satu siswa
+        POST /setor         : {"nama", "jumlah", "keterangan"?, "tanggal"?}
+        POST /keluar        : {"jumlah", "keterangan", "tanggal"?, "paksa"?}
+    
+    Semua permintaan baca dilayani langsung dari data di memori. Permintaan
+    tulis masuk antrean dan dikerjakan satu task penulis: permintaan yang
+    datang hampir bersamaan dicatat sebagai satu batch (satu kali tulis
+    jurnal lewat simpan_batch), bukan satu penyimpanan per permintaan.
+    Perubahan dari proses lain (menu atau command-line) diambil secara
+    berkala dan sebelum setiap batch ditulis.
+    
+    Kunci database ditunggu dengan asyncio.sleep (lihat _kunci), jadi
+    permintaan baca tetap dilayani selama menu atau command-line memegang
+    kunci. Bagian yang memegang kunci tidak pernah await, sehingga task
+    lain tidak bisa masuk di tengahnya lewat kunci yang reentrant.
+    
+    Atribut:
+        JEDA_BATCH: Waktu menunggu permintaan tulis lain sebelum batch ditulis (detik)
+        BATAS_BATCH: Jumlah permintaan tulis maksimal per batch
+        INTERVAL_SEGAR: Jeda pengecekan perubahan dari proses lain dan checkpoint (detik)
+        BATAS_BODY: Ukuran body permintaan maksimal (byte)
+    """
+    JEDA_BATCH = 0.005
+    BATAS_BATCH = 500
+    INTERVAL_SEGAR = 1.0
+    BATAS_BODY = 64 * 1024
+    
+    def __init__(self, kas, host='127.0.0.1', port=8765):
+        self.kas = kas
+        self.host = host
+        self.port = port
+        self.antrean = None
+    
+    async def jalankan(self):
+        """Menjalankan server sampai dihentikan (Ctrl+C)"""
+        self.antrean = asyncio.Queue()
+        server = await asyncio.start_server(self._layani, self.host, self.port)
+        tugas = [asyncio.create_task(self._penulis()), asyncio.create_task(self._perawatan())]
+        print(f"{Colors.GREEN}✓ Server berjalan di http://{self.host}:{self.port} "
+              f"{Colors.GRAY}(Ctrl+C untuk berhenti){Colors.END}", file=sys.stderr)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            for t in tugas:
+                t.cancel()
+    
+    async def _layani(self, reader, writer):
+        """Helper: Melayani satu koneksi (boleh beberapa permintaan, keep-alive)"""
+        try:
+            while True:
+                try:
+                    permintaan = await self._baca_permintaan(reader)
+                except ValueError as e:
+                    self._kirim(writer, HTTPStatus.BAD_REQUEST, {'error': str(e)}, False)
+                    await writer.drain()
+                    break
+                if permintaan is None:
+                    break
+                metode, path, tetap_terbuka, body = permintaan
+                PENGUKUR.hitung('permintaan_http')
+                status, isi = await self._proses(metode, path, body)
+                self._kirim(writer, status, isi, tetap_terbuka)
+                await writer.drain()
+                if not tetap_terbuka:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+    
+    async def _baca_permintaan(self, reader):
+        """
+        Helper: Membaca satu permintaan HTTP/1.x.
+        
+        Returns:
+            tuple: (metode, path, tetap_terbuka, body), None jika koneksi ditutup
+        
+        Raises:
+            ValueError: Jika permintaan tidak valid
+        """
+        baris = await reader.readline()
+        if not baris.strip():
+            return None
+        try:
+            metode, path, versi = baris.decode('latin-1').split()
+        except ValueError:
+            raise ValueError("baris permintaan tidak valid") from None
+        
+        header = {}
+        while True:
+            baris = await reader.readline()
+            if not baris.strip():
+                break
+            kunci, _, nilai = baris.decode('latin-1').partition(':')
+            header[kunci.strip().lower()] = nilai.strip()
+        
+        try:
+            panjang = int(header.get('content-length', 0))
+        except ValueError:
+            raise ValueError("Content-Length tidak valid") from None
+        if not 0 <= panjang <= self.BATAS_BODY:
+            raise ValueError(f"body maksimal {self.BATAS_BODY} byte")
+        body = await reader.readexactly(panjang) if panjang else b''
+        
+        koneksi = header.get('connection', '').lower()
+        tetap_terbuka = koneksi == 'keep-alive' if versi == 'HTTP/1.0' else koneksi != 'close'
+        return metode.upper(), path, tetap_terbuka, body
+    
+    def _kirim(self, writer, status, isi, tetap_terbuka):
+        """Helper: Menulis respons JSON"""
+        body = json.dumps(isi, ensure_ascii=False).encode('utf-8')
+        writer.write(
+            f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+            f"Content-Type: application/json; charset=utf-8\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if tetap_terbuka else 'close'}\r\n\r\n".encode('latin-1') + body
+        )
+    
+    async def _proses(self, metode, path, body):
+        """
+        Helper: Menjalankan satu permintaan sesuai endpoint-nya.
+        
+        Returns:
+            tuple: (HTTPStatus, dict isi respons)
+        """
+        bagian = [unquote(b) for b in urlsplit(path).path.split('/') if b]
+        kas = self.kas
+        
+        if bagian in (['saldo'], ['siswa']) or (len(bagian) == 2 and bagian[0] == 'siswa'):
+            if metode != 'GET':
+                return HTTPStatus.METHOD_NOT_ALLOWED, {'error': 'pakai GET'}
+            if bagian == ['saldo']:
+                return HTTPStatus.OK, kas.data_ringkasan()
+            if bagian == ['siswa']:
+                return HTTPStatus.OK, _data_status_siswa(kas)
+            siswa = kas.indeks_nama.cari(bagian[1])
+            if siswa is None:
+                return HTTPStatus.NOT_FOUND, {'error': f"siswa '{bagian[1]}' tidak ditemukan"}
+            return HTTPStatus.OK, _data_riwayat_siswa(siswa)
+        
+        if bagian not in (['setor'], ['keluar']):
+            return HTTPStatus.NOT_FOUND, {'error': f"endpoint '{urlsplit(path).path}' tidak ada"}
+        if metode != 'POST':
+            return HTTPStatus.METHOD_NOT_ALLOWED, {'error': 'pakai POST'}
+        try:
+            data = json.loads(body or b'{}')
+            if not isinstance(data, dict):
+                raise ValueError("body harus objek JSON")
+            permintaan = self._periksa_tulis(bagian[0], data)
+        except ValueError as e:
+            return HTTPStatus.BAD_REQUEST, {'error': str(e)}
+        
+        hasil = asyncio.get_running_loop().create_future()
+        await self.antrean.put((bagian[0], permintaan, hasil))
+        return await hasil
+    
+    def _periksa_tulis(self, jenis, data):
+        """
+        Helper: Validasi isi permintaan tulis yang tidak bergantung pada data kas.
+        
+        Keberadaan siswa dan kecukupan saldo dicek belakangan oleh task
+        penulis, karena bisa berubah oleh permintaan lain di batch yang sama.
+        
+        Returns:
+            dict: Permintaan yang sudah dinormalkan
+        
+        Raises:
+            ValueError: Jika ada field yang kosong atau tidak valid
+        """
+        if 'jumlah' not in data:
+            raise ValueError("jumlah wajib diisi")
+        jumlah, tanggal, ts = _periksa_jumlah_tanggal(self.kas, data['jumlah'], data.get('tanggal'))
+        keterangan = str(data.get('keterangan') or '').strip()
+        
+        if jenis == 'setor':
+            nama = str(data.get('nama') or '').strip()
+            if not nama:
+                raise ValueError("nama wajib diisi")
+            return {'nama': nama, 'jumlah': jumlah, 'tanggal': tanggal, 'ts': ts,
+                    'keterangan': keterangan or 'Setoran Tunai'}
+        
+        if not keterangan:
+            raise ValueError("keterangan wajib diisi")
+        return {'jumlah': jumlah, 'tanggal': tanggal, 'ts': ts,
+                'keterangan': keterangan, 'paksa': bool(data.get('paksa'))}
+    
+    @asynccontextmanager
+    async def _kunci(self):
+        """
+        Helper: Memegang kunci database tanpa memblokir event loop.
+        
+        Seperti KunciBerkas di dalam 'with', tetapi selama menunggu (dicoba
+        ulang setiap 50 ms, paling lama batas_tunggu) task lain tetap jalan.
+        
+        Raises:
+            TimeoutError: Jika kunci tidak didapat
+        """
+        kunci = self.kas.storage.kunci()
+        batas = time.monotonic() + kunci.batas_tunggu
+        while not kunci.coba():
+            if time.monotonic() >= batas:
+                raise TimeoutError(f"database sedang dipakai proses lain ({kunci.path})")
+            await asyncio.sleep(0.05)
+        try:
+            yield kunci
+        finally:
+            kunci.lepas()
+    
+    @staticmethod
+    def _jawab(hasil, status, isi):
+        """Helper: Menjawab satu permintaan tulis (klien yang sudah putus dilewati)"""
+        if not hasil.done():
+            hasil.set_result((status, isi))
+    
+    async def _penulis(self):
+        """
+        Helper: Task tunggal yang menulis semua permintaan tulis, per batch.
+        
+        Error saat menulis satu batch dijawab 500 untuk batch itu saja;
+        task tetap berjalan untuk permintaan berikutnya.
+        """
+        while True:
+            batch = [await self.antrean.get()]
+            # Beri kesempatan permintaan lain yang datang bersamaan ikut batch ini
+            await asyncio.sleep(self.JEDA_BATCH)
+            while len(batch) < self.BATAS_BATCH and not self.antrean.empty():
+                batch.append(self.antrean.get_nowait())
+            try:
+                await self._tulis_batch(batch)
+            except Exception as e:
+                self.kas.peringatan(f"{Colors.RED}⚠ Gagal menulis batch: {e}{Colors.END}")
+                for _, _, hasil in batch:
+                    self._jawab(hasil, HTTPStatus.INTERNAL_SERVER_ERROR, {'error': f"gagal menyimpan: {e}"})
+    
+    async def _tulis_batch(self, batch):
+        """
+        Helper: Validasi lalu simpan satu batch permintaan tulis sekaligus.
+        
+        Permintaan dicek berurutan terhadap data terbaru (termasuk perubahan
+        proses lain dan permintaan sebelumnya di batch yang sama); yang
+        ditolak dijawab langsung, sisanya disimpan dengan satu simpan_batch.
+        
+        Args:
+            batch (list): List tuple (jenis, permintaan, future)
+        """
+        kas = self.kas
+        jawab = self._jawab
+        
+        try:
+            async with self._kunci():
+                kas.sinkronkan()
+                saldo_kas = kas.hitung_total_saldo()
+                perubahan = []
+                diterima = []
+                for jenis, p, hasil in batch:
+                    if jenis == 'setor':
+                        siswa = kas.indeks_nama.cari(p['nama'])
+                        if siswa is None:
+                            jawab(hasil, HTTPStatus.NOT_FOUND, {'error': f"siswa '{p['nama']}' tidak ditemukan"})
+                            continue
+                        p['nama'] = siswa['nama']
+                        transaksi = {"tanggal": p['tanggal'], "jenis": "setor", "jumlah": p['jumlah'],
+                                     "keterangan": p['keterangan'], "ts": p['ts']}
+                        perubahan.append(('setor', {'nama': siswa['nama'], 'transaksi': transaksi}))
+                        saldo_kas += p['jumlah']
+                    else:
+                        if p['jumlah'] > saldo_kas and not p['paksa']:
+                            jawab(hasil, HTTPStatus.CONFLICT,
+                                  {'error': f"saldo tidak cukup ({kas.format_rupiah(saldo_kas)}), kirim \"paksa\": true"})
+                            continue
+                        pengeluaran = {"tanggal": p['tanggal'], "keterangan": p['keterangan'],
+                                       "jumlah": p['jumlah'], "ts": p['ts']}
+                        perubahan.append(('keluar', {'pengeluaran': pengeluaran}))
+                        saldo_kas -= p['jumlah']
+                    diterima.append((jenis, p, hasil))
+                
+                berhasil = not perubahan or kas.simpan_batch(perubahan)
+        except TimeoutError as e:
+            for _, _, hasil in batch:
+                jawab(hasil, HTTPStatus.SERVICE_UNAVAILABLE, {'error': str(e)})
+            return
+        
+        PENGUKUR.hitung('batch_ditulis')
+        saldo_kas = kas.hitung_total_saldo()
+        for jenis, p, hasil in diterima:
+            if not berhasil:
+                jawab(hasil, HTTPStatus.INTERNAL_SERVER_ERROR, {'error': 'gagal menyimpan'})
+            elif jenis == 'setor':
+                jawab(hasil, HTTPStatus.OK, {
+                    'nama': p['nama'], 'jumlah': p['jumlah'], 'keterangan': p['keterangan'],
+                    'tanggal': p['tanggal'], 'saldo_siswa': kas.indeks_nama.cari(p['nama'])['saldo'],
+                    'saldo_kas': saldo_kas
+                })
+            else:
+                jawab(hasil, HTTPStatus.OK, {
+                    'keterangan': p['keterangan'], 'jumlah': p['jumlah'],
+                    'tanggal': p['tanggal'], 'saldo_kas': saldo_kas
+                })
+    
+    async def _perawatan(self):
+        """
+        Helper: Secara berkala ambil perubahan proses lain dan checkpoint jika perlu.
+        
+        Jika kunci sedang dipegang proses lain, dicoba lagi di putaran berikutnya.
+        """
+        while True:
+            await asyncio.sleep(self.INTERVAL_SEGAR)
+            try:
+                async with self._kunci():
+                    self.kas.sinkronkan()
+                    if self.kas.perlu_checkpoint():
+                        self.kas.checkpoint()
+            except TimeoutError:
+                continue
+            except Exception as e:
+                self.kas.peringatan(f"{Colors.YELLOW}⚠ Gagal menyegarkan data: {e}{Colors.END}")
+
+
+def perintah_serve(kas, args):
+    """Perintah 'serve': server HTTP/JSON lokal sampai dihentikan dengan Ctrl+C"""
+    try:
+        asyncio.run(ServerKas(kas, args.host, args.port).jalankan())
+    except KeyboardInterrupt:
+        pass
+    except OSError as e:
+        kas.peringatan(f"server tidak bisa dijalankan: {e}")
+        return KELUAR_GAGAL
+    # Gabungkan jurnal ke snapshot seperti saat keluar dari menu
+    if kas.storage.perlu_kompaksi():
+        kas.save_data()
+    return KELUAR_OK
 
 
 def main():
@@ -1348,6 +6873,14 @@ def main():
     Fungsi utama untuk menjalankan aplikasi.
     
     Menangani:
+    - Perintah command-line (setor, keluar, saldo, laporan, arus-kas, rentang, cari, export, impor,
+      kelas, kelas-baru, serve, konversi-rupiah, migrasi-sqlite, migrasi-shard, migrasi-biner,
+      migrasi-json) yang berjalan
+      tanpa menu interaktif, untuk kelas utama atau kelas pilihan (--kelas)
+    - Katalog beberapa kelas (lihat KatalogKelas): menu dimulai dari kelas
+      terakhir yang dibuka dan bisa berpindah kelas lewat menu Ganti Kelas
+    - Mengaktifkan profiling (--profil / KALCER_PROFIL); untuk perintah
+      command-line hasilnya ditulis sebagai JSON ke stderr
     - Inisialisasi objek KasKelas
     - Menjalankan menu utama
     - Exception handling untuk KeyboardInterrupt (Ctrl+C)
@@ -1355,9 +6888,35 @@ def main():
     
     Aplikasi akan terus berjalan hingga user memilih keluar atau menekan Ctrl+C.
     """
+    args = buat_parser().parse_args()
+    
+    if args.profil or os.environ.get('KALCER_PROFIL', '') not in ('', '0'):
+        PENGUKUR.aktifkan(KasKelas)
+    
+    if args.perintah:
+        try:
+            kode = jalankan_perintah(args)
+        except BrokenPipeError:
+            # Output dipotong pembacanya (misal '| head'); bukan error
+            os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+            kode = KELUAR_OK
+        if PENGUKUR.aktif:
+            print(json.dumps(PENGUKUR.data(), ensure_ascii=False), file=sys.stderr)
+        sys.exit(kode)
+    
     try:
-        kas = KasKelas()
-        kas.menu_utama()
+        katalog = KatalogKelas(args.data_dir or tentukan_folder_data(), args.storage)
+        entri = katalog.cari(args.kelas) if args.kelas else katalog.entri_aktif
+        if entri is None:
+            print(f"{Colors.RED}⚠ Kelas '{args.kelas}' tidak ada di katalog{Colors.END}")
+            return
+        katalog.pilih(entri)
+        kas = katalog.buka(entri)
+        sambut = True
+        while kas is not None:
+            kas = kas.menu_utama(katalog, sambut)
+            sambut = False
+        katalog.tutup()
     except KeyboardInterrupt:
         print(f"\n\n{Colors.YELLOW}✓ Program ditutup{Colors.END}")
     except Exception as e:
@@ -1366,4 +6925,4 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
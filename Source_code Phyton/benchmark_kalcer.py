@@ -0,0 +1,302 @@
+"""
+Benchmark KALCer dengan database sintetis.
+
+Membuat database palsu (format kas_kelas_database.json yang sekarang)
+dengan jumlah siswa, transaksi dan pengeluaran yang bisa diatur, lalu
+mengukur waktu dan puncak memori operasi utama KasKelas. Semua output
+layar ditangkap supaya yang terukur hanya kerja programnya.
+
+Contoh:
+    python benchmark_kalcer.py --siswa 200 --transaksi 100 --pengeluaran 2000
+    python benchmark_kalcer.py -o hasil_baru.json --banding hasil_lama.json
+"""
+import os
+import argparse
+import contextlib
+import io
+import json
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import KALCer  # noqa: E402
+
+
+KETERANGAN_SETOR = ['Setoran Tunai', 'Setoran Kas', 'Setoran Bulanan', 'Iuran Kegiatan', 'Donasi']
+KETERANGAN_KELUAR = ['Biaya Fotokopi', 'Biaya Kegiatan', 'Beli Spidol', 'Kebersihan', 'Konsumsi Rapat']
+
+
+def buat_database(folder, jumlah_siswa, transaksi_per_siswa, jumlah_pengeluaran, seed=1):
+    """
+    Menulis database sintetis ke folder/kas_kelas_database.json.
+
+    Tanggal transaksi tersebar dalam satu tahun ke belakang dan setiap
+    riwayat sudah urut waktu, sama seperti data yang dicatat aplikasi.
+
+    Args:
+        folder (str): Folder tujuan
+        jumlah_siswa (int): Jumlah siswa
+        transaksi_per_siswa (int): Jumlah setoran per siswa
+        jumlah_pengeluaran (int): Jumlah pengeluaran umum
+        seed (int): Seed random agar hasil bisa diulang
+
+    Returns:
+        str: Path file database
+    """
+    acak = random.Random(seed)
+    akhir = int(time.time())
+    awal = akhir - 365 * 86400
+
+    def transaksi_acak(n):
+        hasil = []
+        for ts in sorted(acak.randrange(awal, akhir) for _ in range(n)):
+            tanggal = time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime(ts))
+            hasil.append((tanggal, ts))
+        return hasil
+
+    data_siswa = []
+    for i in range(jumlah_siswa):
+        transaksi = [
+            {
+                "tanggal": tanggal,
+                "jenis": "setor",
+                "jumlah": acak.randrange(1, 21) * 5000,
+                "keterangan": acak.choice(KETERANGAN_SETOR),
+                "ts": ts
+            }
+            for tanggal, ts in transaksi_acak(transaksi_per_siswa)
+        ]
+        data_siswa.append({
+            "nama": f"Siswa {i + 1:05d}",
+            "transaksi": transaksi,
+            "saldo": sum(t['jumlah'] for t in transaksi)
+        })
+
+    pengeluaran_umum = [
+        {
+            "tanggal": tanggal,
+            "keterangan": acak.choice(KETERANGAN_KELUAR),
+            "jumlah": acak.randrange(1, 11) * 10000,
+            "ts": ts
+        }
+        for tanggal, ts in transaksi_acak(jumlah_pengeluaran)
+    ]
+
+    path = os.path.join(folder, 'kas_kelas_database.json')
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({
+            'data_siswa': data_siswa,
+            'pengeluaran_umum': pengeluaran_umum,
+            'terakhir_update': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            'jurnal_seq': 0
+        }, f, indent=2, ensure_ascii=False)
+    return path
+
+
+def ukur(fungsi, ulang):
+    """
+    Mengukur waktu dan puncak memori satu operasi.
+
+    Waktu diukur tanpa tracemalloc (yang memperlambat program), lalu
+    operasi dijalankan sekali lagi dengan tracemalloc untuk puncak memori.
+    Output ke stdout ditangkap selama pengukuran.
+
+    Args:
+        fungsi (callable): Operasi tanpa argumen
+        ulang (int): Jumlah pengulangan pengukuran waktu
+
+    Returns:
+        dict: detik_pertama, detik_min, detik_median, puncak_memori_kb
+    """
+    waktu = []
+    for _ in range(ulang):
+        with contextlib.redirect_stdout(io.StringIO()):
+            mulai = time.perf_counter()
+            fungsi()
+            waktu.append(time.perf_counter() - mulai)
+
+    tracemalloc.start()
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            fungsi()
+        _, puncak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'detik_pertama': round(waktu[0], 6),
+        'detik_min': round(min(waktu), 6),
+        'detik_median': round(statistics.median(waktu), 6),
+        'puncak_memori_kb': round(puncak / 1024, 1)
+    }
+
+
+def dengan_input(fungsi, tombol):
+    """
+    Membungkus aksi interaktif agar membaca tombol dari teks, bukan keyboard.
+
+    Args:
+        fungsi (callable): Aksi menu tanpa argumen
+        tombol (str): Input yang diketik, satu baris per tombol
+
+    Returns:
+        callable: Operasi tanpa argumen untuk ukur
+    """
+    def jalankan():
+        stdin = sys.stdin
+        sys.stdin = io.StringIO(tombol)
+        try:
+            fungsi()
+        finally:
+            sys.stdin = stdin
+    return jalankan
+
+
+def jalankan_benchmark(folder, ulang):
+    """
+    Menjalankan semua pengukuran pada database di folder.
+
+    Args:
+        folder (str): Folder berisi kas_kelas_database.json
+        ulang (int): Jumlah pengulangan per operasi
+
+    Returns:
+        dict: Hasil per operasi (lihat ukur)
+    """
+    path = os.path.join(folder, 'kas_kelas_database.json')
+
+    def buka():
+        return KALCer.KasKelas(KALCer.PenyimpananJSON(path), tenang=True)
+
+    # KasKelas dibuat saat stdout ditangkap, agar Layar ikut menulis ke tangkapan
+    with contextlib.redirect_stdout(io.StringIO()):
+        kas = buka()
+
+    jumlah_transaksi = len(kas.sumber_semua_transaksi())
+    baris_tabel = [
+        [str(i), siswa['nama'], kas.format_rupiah(siswa['saldo']), str(len(siswa['transaksi']))]
+        for i, siswa in enumerate(kas.data_siswa, 1)
+    ]
+
+    def setor():
+        tanggal, ts = KALCer.waktu_sekarang()
+        kas.simpan_perubahan('setor', nama=kas.data_siswa[0]['nama'], transaksi={
+            "tanggal": tanggal, "jenis": "setor", "jumlah": 5000, "keterangan": "Setoran Tunai", "ts": ts})
+
+    def keluar():
+        tanggal, ts = KALCer.waktu_sekarang()
+        kas.simpan_perubahan('keluar', pengeluaran={
+            "tanggal": tanggal, "keterangan": "Beli Spidol", "jumlah": 10000, "ts": ts})
+
+    def setor_batch():
+        # Seperti impor CSV: 100 setoran ke siswa yang berbeda dalam satu kali tulis
+        tanggal, ts = KALCer.waktu_sekarang()
+        kas.simpan_batch([
+            ('setor', {'nama': kas.data_siswa[i % len(kas.data_siswa)]['nama'], 'transaksi': {
+                "tanggal": tanggal, "jenis": "setor", "jumlah": 5000, "keterangan": "Setoran Kas", "ts": ts}})
+            for i in range(100)
+        ])
+
+    _, sekarang = KALCer.waktu_sekarang()
+
+    operasi = [
+        ('load_data', buka),
+        ('save_data', kas.save_data),
+        ('hitung_total_saldo', kas.hitung_total_saldo),
+        ('lihat_saldo', kas.lihat_saldo),
+        # Pager: buka, tampilkan halaman pertama lalu keluar (q)
+        ('lihat_semua_transaksi_halaman1', dengan_input(kas.lihat_semua_transaksi, 'q\n')),
+        # Pager: Enter sampai halaman terakhir (sebanding dengan mencetak semua transaksi)
+        ('lihat_semua_transaksi', dengan_input(kas.lihat_semua_transaksi, '\n' * (jumlah_transaksi + 1))),
+        ('lihat_laporan_siswa', kas.lihat_laporan_siswa),
+        ('buat_tabel_dinamis', lambda: kas.buat_tabel_dinamis(baris_tabel, ['No', 'Nama', 'Saldo', 'Transaksi'])),
+        # Rekap dibangun sekali lalu dipakai ulang; bangun_ulang mengukur pembangunannya sendiri
+        ('rekap_periode_bangun', lambda: kas.rekap.bangun_ulang(kas.data_siswa, kas.pengeluaran_umum)),
+        # Arus kas per bulan, tanpa rincian periode
+        ('lihat_arus_kas', dengan_input(kas.lihat_arus_kas, '\n\n')),
+        ('cari_rentang_30_hari', lambda: list(kas.cari_rentang(sekarang - 30 * 86400, sekarang))),
+        ('cari_keterangan', lambda: kas.cari_keterangan('kegiatan')),
+        # Perubahan dijalankan paling akhir agar laporan di atas memakai data yang sama
+        ('simpan_perubahan_setor', setor),
+        ('simpan_perubahan_keluar', keluar),
+        ('simpan_batch_100_setor', setor_batch),
+    ]
+
+    hasil = {}
+    for nama, fungsi in operasi:
+        print(f"  {nama:<32}", end='', flush=True)
+        hasil[nama] = ukur(fungsi, ulang)
+        print(f"{hasil[nama]['detik_median'] * 1000:>10.2f} ms  {hasil[nama]['puncak_memori_kb']:>10.1f} KB")
+    return hasil
+
+
+def banding(hasil, path_lama):
+    """
+    Menampilkan perbandingan waktu median dengan hasil benchmark sebelumnya.
+
+    Args:
+        hasil (dict): Hasil per operasi dari jalankan_benchmark
+        path_lama (str): File JSON hasil benchmark sebelumnya
+    """
+    with open(path_lama, 'r', encoding='utf-8') as f:
+        lama = json.load(f)['hasil']
+
+    print(f"\nPerbandingan dengan {path_lama} (median):")
+    for nama, baru in hasil.items():
+        if nama not in lama:
+            continue
+        sebelum = lama[nama]['detik_median']
+        sesudah = baru['detik_median']
+        perubahan = (sesudah - sebelum) / sebelum * 100 if sebelum else 0
+        print(f"  {nama:<32}{sebelum * 1000:>10.2f} ms → {sesudah * 1000:>10.2f} ms  ({perubahan:+.1f}%)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark KALCer dengan database sintetis')
+    parser.add_argument('--siswa', type=int, default=100, help='Jumlah siswa (default: 100)')
+    parser.add_argument('--transaksi', type=int, default=50, help='Setoran per siswa (default: 50)')
+    parser.add_argument('--pengeluaran', type=int, default=500, help='Jumlah pengeluaran umum (default: 500)')
+    parser.add_argument('--ulang', type=int, default=5, help='Pengulangan per operasi (default: 5)')
+    parser.add_argument('--seed', type=int, default=1, help='Seed data sintetis (default: 1)')
+    parser.add_argument('-o', '--output', default='hasil_benchmark.json', help='File hasil (JSON)')
+    parser.add_argument('--banding', help='File hasil benchmark sebelumnya untuk dibandingkan')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix='kalcer_bench_') as folder:
+        path = buat_database(folder, args.siswa, args.transaksi, args.pengeluaran, args.seed)
+        ukuran = os.path.getsize(path)
+        print(f"Database sintetis: {args.siswa} siswa × {args.transaksi} transaksi, "
+              f"{args.pengeluaran} pengeluaran ({ukuran / 1024 / 1024:.1f} MB)")
+        print(f"  {'operasi':<32}{'median':>13}  {'puncak memori':>13}")
+        hasil = jalankan_benchmark(folder, max(1, args.ulang))
+
+    laporan = {
+        'waktu': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'parameter': {
+            'siswa': args.siswa,
+            'transaksi_per_siswa': args.transaksi,
+            'pengeluaran': args.pengeluaran,
+            'ulang': args.ulang,
+            'seed': args.seed,
+            'ukuran_database_byte': ukuran
+        },
+        'hasil': hasil
+    }
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(laporan, f, indent=2, ensure_ascii=False)
+    print(f"\nHasil disimpan ke {args.output}")
+
+    if args.banding:
+        banding(hasil, args.banding)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,330 @@
+"""
+Test KALCer.
+
+Jalankan dari folder ini:
+    python -m unittest test_kalcer
+"""
+import os
+import contextlib
+import io
+import json
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import KALCer  # noqa: E402
+
+
+def buat_database(folder):
+    """Menulis database JSON kecil (3 siswa dengan riwayat, 2 pengeluaran) ke folder"""
+    data_siswa = []
+    for i in range(3):
+        transaksi = [
+            {"tanggal": f"2025-01-{hari:02d} 08:00:00", "jenis": "setor", "jumlah": 5000 * (i + 1),
+             "keterangan": "Setoran Tunai", "ts": KALCer.parse_tanggal(f"2025-01-{hari:02d} 08:00:00")}
+            for hari in range(1, 6)
+        ]
+        data_siswa.append({"nama": f"Siswa {i + 1}", "transaksi": transaksi,
+                           "saldo": sum(t['jumlah'] for t in transaksi)})
+    pengeluaran = [
+        {"tanggal": "2025-01-03 10:00:00", "keterangan": "Beli Spidol", "jumlah": 10000,
+         "ts": KALCer.parse_tanggal("2025-01-03 10:00:00")},
+        {"tanggal": "2025-01-04 10:00:00", "keterangan": "Fotokopi", "jumlah": 5000,
+         "ts": KALCer.parse_tanggal("2025-01-04 10:00:00")},
+    ]
+    with open(os.path.join(folder, 'kas_kelas_database.json'), 'w', encoding='utf-8') as f:
+        json.dump({'data_siswa': data_siswa, 'pengeluaran_umum': pengeluaran, 'jurnal_seq': 0}, f, indent=2)
+
+
+class TestGantiSnapshotGagal(unittest.TestCase):
+    """Checkpoint yang gagal mengganti file tidak boleh merusak pembacaan riwayat"""
+    JENIS = 'json'
+
+    def setUp(self):
+        self._folder = tempfile.TemporaryDirectory(prefix='kalcer_test_')
+        folder = self._folder.name
+        buat_database(folder)
+        with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+            if self.JENIS != 'json':
+                KALCer.migrasi_dari_json(folder, self.JENIS)
+            self.kas = KALCer.KasKelas(KALCer.buat_penyimpanan(folder, self.JENIS), tenang=True)
+
+    def tearDown(self):
+        self.kas.storage._tutup()
+        self._folder.cleanup()
+
+    def test_riwayat_tetap_terbaca_setelah_replace_gagal(self):
+        siswa = self.kas.data_siswa[1]
+        self.assertFalse(siswa['transaksi'].termuat)
+        harapan = siswa['transaksi'].baca()
+
+        with mock.patch('KALCer.os.replace', side_effect=PermissionError('file dipakai proses lain')), \
+                contextlib.redirect_stderr(io.StringIO()):
+            self.assertFalse(self.kas.checkpoint())
+
+        self.assertEqual(list(siswa['transaksi']), harapan)
+        self.assertEqual(list(self.kas.pengeluaran_umum)[-1]['keterangan'], 'Fotokopi')
+        self.assertFalse(os.path.exists(self.kas.storage.lokasi + '.tmp'))
+
+        # Checkpoint berikutnya tetap bisa berjalan normal
+        self.assertTrue(self.kas.checkpoint())
+        self.assertEqual(list(self.kas.data_siswa[2]['transaksi'])[0]['jumlah'], 15000)
+
+
+class TestGantiSnapshotGagalBiner(TestGantiSnapshotGagal):
+    JENIS = 'biner'
+
+
+class TestJurnalGagalDitulis(unittest.TestCase):
+    """Perubahan yang gagal dicatat ke jurnal tidak boleh tertinggal di memori"""
+
+    def setUp(self):
+        self._folder = tempfile.TemporaryDirectory(prefix='kalcer_test_')
+        buat_database(self._folder.name)
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.kas = KALCer.KasKelas(KALCer.buat_penyimpanan(self._folder.name, 'json'), tenang=True)
+
+    def tearDown(self):
+        self.kas.storage._tutup()
+        self._folder.cleanup()
+
+    def test_setoran_dibatalkan(self):
+        saldo = self.kas.cari_siswa('Siswa 1')['saldo']
+        transaksi = {"tanggal": "2025-01-06 08:00:00", "jenis": "setor", "jumlah": 5000,
+                     "keterangan": "Setoran Tunai", "ts": KALCer.parse_tanggal("2025-01-06 08:00:00")}
+
+        with mock.patch.object(KALCer.PenyimpananJSON, 'catat_batch', side_effect=OSError('disk penuh')), \
+                contextlib.redirect_stderr(io.StringIO()):
+            self.assertFalse(self.kas.simpan_perubahan('setor', nama='Siswa 1', transaksi=transaksi))
+
+        self.assertEqual(self.kas.cari_siswa('Siswa 1')['saldo'], saldo)
+        self.assertEqual(len(self.kas.cari_siswa('Siswa 1')['transaksi']), 5)
+
+        # Snapshot berikutnya juga tidak boleh memuat setoran tersebut
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.kas.save_data()
+            kas_baru = KALCer.KasKelas(KALCer.buat_penyimpanan(self._folder.name, 'json'), tenang=True)
+        self.assertEqual(kas_baru.cari_siswa('Siswa 1')['saldo'], saldo)
+        kas_baru.storage._tutup()
+
+
+class TestBinerRusak(unittest.TestCase):
+    """File biner yang tidak bisa dibaca disalin dulu sebelum diganti data baru"""
+
+    def setUp(self):
+        self._folder = tempfile.TemporaryDirectory(prefix='kalcer_test_')
+
+    def tearDown(self):
+        self._folder.cleanup()
+
+    def cek_dicadangkan(self, isi):
+        storage = KALCer.buat_penyimpanan(self._folder.name, 'biner')
+        with open(storage.lokasi, 'wb') as f:
+            f.write(isi)
+        with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+            kas = KALCer.KasKelas(storage, tenang=False)
+            kas.checkpoint()
+        storage._tutup()
+        self.assertTrue(kas.gagal_muat)
+        with open(storage.lokasi + '.rusak', 'rb') as f:
+            self.assertEqual(f.read(), isi)
+
+    def test_header_rusak(self):
+        self.cek_dicadangkan(bytes(range(200)))
+
+    def test_file_kosong(self):
+        self.cek_dicadangkan(b'')
+
+
+class TestShardBerhentiDiTengah(unittest.TestCase):
+    """Roster yang gagal ditulis tidak boleh meninggalkan shard yang sudah terpotong"""
+
+    def setUp(self):
+        self._folder = tempfile.TemporaryDirectory(prefix='kalcer_test_')
+        buat_database(self._folder.name)
+        with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+            KALCer.migrasi_dari_json(self._folder.name, 'shard')
+            self.kas = self.buka()
+
+    def tearDown(self):
+        self._folder.cleanup()
+
+    def buka(self):
+        return KALCer.KasKelas(KALCer.buat_penyimpanan(self._folder.name, 'shard'), tenang=True)
+
+    def riwayat(self, kas):
+        return {siswa['nama']: list(siswa['transaksi']) for siswa in kas.data_siswa}
+
+    def cek_gagal(self, fungsi):
+        harapan = self.riwayat(self.kas)
+        with mock.patch.object(KALCer.PenyimpananShard, '_tulis_roster', side_effect=OSError('disk penuh')), \
+                contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+            fungsi()
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.assertEqual(self.riwayat(self.buka()), harapan)
+
+    def test_reset_siswa(self):
+        self.cek_gagal(lambda: self.kas.simpan_perubahan('reset_siswa', nama='Siswa 2'))
+
+    def test_simpan_snapshot(self):
+        self.cek_gagal(lambda: self.assertRaises(OSError, self.kas.storage.simpan, {
+            'data_siswa': self.kas.data_siswa, 'pengeluaran_umum': self.kas.pengeluaran_umum,
+            'jurnal_seq': self.kas.jurnal_seq}))
+
+
+class TestImporCSV(unittest.TestCase):
+    """Impor CSV membaca file Excel Windows (cp1252) dan menyimpan semua baris dalam satu batch"""
+
+    def setUp(self):
+        self._folder = tempfile.TemporaryDirectory(prefix='kalcer_test_')
+        buat_database(self._folder.name)
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.kas = KALCer.KasKelas(KALCer.buat_penyimpanan(self._folder.name, 'json'), tenang=True)
+
+    def tearDown(self):
+        self.kas.storage._tutup()
+        self._folder.cleanup()
+
+    def test_impor_cp1252_satu_batch(self):
+        path = os.path.join(self._folder.name, 'impor.csv')
+        with open(path, 'w', encoding='cp1252', newline='') as f:
+            f.write("nama;jumlah;keterangan;tanggal\r\n"
+                    "Siswa 1;7000;Iuran café;2025-02-01\r\n"
+                    "siswa 2;3000;Donasi;01/02/2025 09:30:00\r\n"
+                    "KAS UMUM;2000;Beli kertas €;2025-02-02\r\n"
+                    "Siswa 9;1000;Tidak ada;2025-02-02\r\n")
+
+        perubahan, kesalahan = self.kas.baca_csv_transaksi(path)
+        self.assertEqual([op for op, _ in perubahan], ['setor', 'setor', 'keluar'])
+        self.assertEqual([nomor for nomor, _ in kesalahan], [5])
+
+        total = self.kas.hitung_total_saldo()
+        with mock.patch.object(self.kas.storage, 'catat_batch', wraps=self.kas.storage.catat_batch) as catat, \
+                contextlib.redirect_stdout(io.StringIO()):
+            self.assertTrue(self.kas.simpan_batch(perubahan))
+        self.assertEqual(catat.call_count, 1)
+        self.assertEqual(len(catat.call_args[0][0]), 3)
+        self.assertEqual(self.kas.hitung_total_saldo(), total + 8000)
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            kas_baru = KALCer.KasKelas(KALCer.buat_penyimpanan(self._folder.name, 'json'), tenang=True)
+        terakhir = list(kas_baru.cari_siswa('Siswa 1')['transaksi'])[-1]
+        self.assertEqual((terakhir['keterangan'], terakhir['tanggal']), ('Iuran café', '2025-02-01 00:00:00'))
+        self.assertEqual(list(kas_baru.pengeluaran_umum)[-1]['keterangan'], 'Beli kertas €')
+        kas_baru.storage._tutup()
+
+
+class TestDuaProsesSatuJurnal(unittest.TestCase):
+    """Dua KasKelas di atas database yang sama saling menggabungkan perubahan lewat jurnal"""
+
+    def setUp(self):
+        self._folder = tempfile.TemporaryDirectory(prefix='kalcer_test_')
+        buat_database(self._folder.name)
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.a = self.buka()
+            self.b = self.buka()
+
+    def tearDown(self):
+        self.a.storage._tutup()
+        self.b.storage._tutup()
+        self._folder.cleanup()
+
+    def buka(self):
+        return KALCer.KasKelas(KALCer.buat_penyimpanan(self._folder.name, 'json'), tenang=True)
+
+    @staticmethod
+    def setor(kas, nama, jumlah):
+        tanggal, ts = "2025-02-01 08:00:00", KALCer.parse_tanggal("2025-02-01 08:00:00")
+        with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+            return kas.simpan_perubahan('setor', nama=nama, transaksi={
+                "tanggal": tanggal, "jenis": "setor", "jumlah": jumlah, "keterangan": "Setoran Tunai", "ts": ts})
+
+    def test_perubahan_digabung(self):
+        total = self.a.hitung_total_saldo()
+        self.assertTrue(self.setor(self.a, 'Siswa 1', 1000))
+        # b belum melihat setoran a, tapi menggabungkannya sebelum menulis
+        self.assertTrue(self.setor(self.b, 'Siswa 2', 2000))
+        self.assertEqual(self.b.hitung_total_saldo(), total + 3000)
+        self.assertEqual(self.b.jurnal_seq, self.a.jurnal_seq + 1)
+
+        with self.a.storage.kunci():
+            self.assertTrue(self.a.sinkronkan())
+        self.assertEqual(self.a.hitung_total_saldo(), total + 3000)
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            kas_baru = self.buka()
+        self.assertEqual(kas_baru.hitung_total_saldo(), total + 3000)
+        self.assertEqual([len(siswa['transaksi']) for siswa in kas_baru.data_siswa], [6, 6, 5])
+        kas_baru.storage._tutup()
+
+    def test_bentrok_dibatalkan(self):
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.assertTrue(self.a.simpan_perubahan('hapus_siswa', nama='Siswa 3'))
+        self.assertFalse(self.setor(self.b, 'Siswa 3', 1000))
+        self.assertIsNone(self.b.indeks_nama.cari('Siswa 3'))
+        self.assertEqual(self.b.hitung_total_saldo(), self.a.hitung_total_saldo())
+
+
+class TestKonversiBiner(unittest.TestCase):
+    """JSON → biner → JSON tidak boleh mengubah atau menghilangkan data"""
+
+    def setUp(self):
+        self._folder = tempfile.TemporaryDirectory(prefix='kalcer_test_')
+        buat_database(self._folder.name)
+
+    def tearDown(self):
+        self._folder.cleanup()
+
+    def isi(self, jenis):
+        with contextlib.redirect_stdout(io.StringIO()):
+            kas = KALCer.KasKelas(KALCer.buat_penyimpanan(self._folder.name, jenis), tenang=True)
+        hasil = {
+            'siswa': [(siswa['nama'], siswa['saldo'], list(siswa['transaksi'])) for siswa in kas.data_siswa],
+            'pengeluaran': list(kas.pengeluaran_umum),
+            'jurnal_seq': kas.jurnal_seq
+        }
+        kas.storage._tutup()
+        return hasil
+
+    def test_bolak_balik(self):
+        harapan = self.isi('json')
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.assertTrue(KALCer.migrasi_dari_json(self._folder.name, 'biner'))
+        self.assertEqual(self.isi('biner'), harapan)
+
+        # Perubahan yang masih di jurnal biner ikut terbawa kembali ke JSON
+        with contextlib.redirect_stdout(io.StringIO()):
+            kas = KALCer.KasKelas(KALCer.buat_penyimpanan(self._folder.name, 'biner'), tenang=True)
+            kas.simpan_perubahan('ubah_nama', lama='Siswa 2', baru='Siswa Dua ☕')
+            kas.simpan_perubahan('keluar', pengeluaran={
+                "tanggal": "2025-02-01 08:00:00", "keterangan": "Kantin café", "jumlah": 1500,
+                "ts": KALCer.parse_tanggal("2025-02-01 08:00:00")})
+        kas.storage._tutup()
+        harapan = self.isi('biner')
+        self.assertEqual(harapan['siswa'][2][0], 'Siswa Dua ☕')
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.assertTrue(KALCer.migrasi_ke_json(self._folder.name, 'biner', timpa=True))
+        self.assertEqual(self.isi('json'), harapan)
+
+
+class TestPotongKolomTerminal(unittest.TestCase):
+    """Baris pager dipotong selebar terminal tanpa merusak kode warna"""
+
+    def test_teks_pendek_tidak_berubah(self):
+        teks = f"{KALCer.Colors.CYAN}12{KALCer.Colors.END} abc"
+        self.assertEqual(KALCer.potong_kolom_terminal(teks, 80), teks)
+
+    def test_teks_panjang_dipotong(self):
+        teks = f"{KALCer.Colors.CYAN}1234{KALCer.Colors.END} " + "Setoran 😀 " * 20
+        for lebar in (10, 16, 17, 40):
+            hasil = KALCer.potong_kolom_terminal(teks, lebar)
+            self.assertLessEqual(KALCer.lebar_kolom_terminal(hasil), lebar)
+            self.assertTrue(hasil.startswith(f"{KALCer.Colors.CYAN}1234{KALCer.Colors.END}"))
+            self.assertTrue(hasil.endswith('…' + KALCer.Colors.END))
+
+
+if __name__ == '__main__':
+    unittest.main()